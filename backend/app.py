@@ -1,21 +1,33 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextvars
 import json
-import datetime
-import openpyxl
 import os
-import tempfile
 import shutil
-from collections import Counter
-from docx2pdf import convert  # ✅ for DOCX → PDF
-import subprocess
+import tempfile
+import time
 
 
 # --- Import local modules
-from tailor import tailor_resume
-from writer import build_doc
-from parser import read_resume, clean_gemini_output, model
+from tailor import tailor_resume, tailor_batch, tailor_cache, jd_index, BATCH_CONCURRENCY, MAX_BATCH_CONCURRENCY
+from parser import read_resume
+from llm import get_model, model_id
+from scheduler import with_priority
+from jobs import Job, JobQueue, QueueFull
+from ledger import ApplicationLedger, DEFAULT_PAGE_SIZE, STATUSES
+from library import ResumeLibrary
+from artifacts import ArtifactStore
+from cache import ResultCache, file_key, make_key, normalize_question
+import retrieval
+import scoring
+from streaming import sse, sse_response, stream_model
+import prompts
+import metrics
+import output
+import export
+from sessions import SessionStore, InvalidSession, DEFAULT_SESSION
 
 app = Flask(__name__)
 CORS(app)
@@ -26,8 +38,98 @@ TAILORED_JSON_FILE = Path("tailored_resume.json")
 RESUMES_DIR = Path("Resumes")
 EXCEL_FILE = Path("Sai_Ram_Job_status.xlsx")
 
-# Ensure folder exists
-RESUMES_DIR.mkdir(exist_ok=True)
+# Bump when the upload prompt below changes so cached parses are not reused
+PARSE_PROMPT_VERSION = "1"
+# Same for the /chat prompt and its cached answers
+CHAT_PROMPT_VERSION = "1"
+
+# Per-request stage timings in a Server-Timing header; requests slower than
+# SLOW_REQUEST_SECONDS are logged with their stage breakdown
+TIMING_HEADER = True
+SLOW_REQUEST_SECONDS = 5.0
+
+# Render/extract worker processes (workers.py) are spawned and re-import this
+# script as __mp_main__; they must not open the stores or start the job queue.
+if __name__ != "__mp_main__":
+    # Ensure folder exists
+    RESUMES_DIR.mkdir(exist_ok=True)
+
+    # Rendered DOCX/PDF keyed by tailored JSON + renderer version (Resumes/.artifacts)
+    artifact_store = ArtifactStore(RESUMES_DIR / ".artifacts")
+
+    # Upload caches: file bytes -> extracted text, text -> parsed JSON
+    resume_text_cache = ResultCache("resume_text")
+    resume_parse_cache = ResultCache("resume_parse")
+    # /chat answers keyed by resume version + normalized question
+    chat_answer_cache = ResultCache("chat_answers")
+    resume_library = ResumeLibrary()
+
+    # Application tracker: SQLite ledger is the source of truth, EXCEL_FILE an export
+    ledger = ApplicationLedger()
+    ledger.import_excel(EXCEL_FILE)
+
+    # Background jobs (opt-in per request with "async")
+    job_queue = JobQueue()
+
+    # Per-session resume state; the default session is backed by the two files above
+    sessions = SessionStore({"resume": RESUME_JSON_FILE, "tailored": TAILORED_JSON_FILE})
+
+
+def session_id():
+    """Session from the X-Session-ID header, ?session_id= or the JSON body."""
+    sid = request.headers.get("X-Session-ID") or request.args.get("session_id") or request.form.get("session_id")
+    if not sid and request.is_json:
+        sid = (request.get_json(silent=True) or {}).get("session_id")
+    return sid or DEFAULT_SESSION
+
+
+@app.before_request
+def start_timing():
+    g.request_start = time.perf_counter()
+    g.metrics_token = metrics.start_request()
+
+
+@app.after_request
+def finish_timing(response):
+    """Record request latency; streamed bodies are only timed up to the first byte."""
+    if "metrics_token" not in g:
+        return response
+    total = time.perf_counter() - g.request_start
+    stages = metrics.finish_request(g.metrics_token)
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.REQUEST_SECONDS.observe(total, endpoint=endpoint)
+    if TIMING_HEADER:
+        response.headers["Server-Timing"] = metrics.server_timing(stages, total)
+    if total > SLOW_REQUEST_SECONDS:
+        metrics.SLOW_REQUESTS.inc(endpoint=endpoint)
+        breakdown = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in stages) or "no stages"
+        print(f"⚠️ Slow request: {request.method} {request.path} took {total:.2f}s ({breakdown})")
+    return response
+
+
+@app.errorhandler(InvalidSession)
+def invalid_session(e):
+    return {"error": str(e)}, 400
+
+
+def wants_async():
+    """True when the caller asked for a background job instead of a blocking call."""
+    flag = request.args.get("async") or request.form.get("async")
+    if flag is None and request.is_json:
+        flag = (request.get_json(silent=True) or {}).get("async")
+    return str(flag).lower() in ("1", "true", "yes")
+
+
+def submit_job(kind, fn, *args, on_discard=None):
+    """Run fn as a background job; on_discard() runs if it never starts (queue full or cancelled)."""
+    try:
+        # Model calls from background jobs queue behind interactive requests
+        job_id = job_queue.submit(kind, with_priority("background", fn), *args, on_discard=on_discard)
+    except QueueFull as e:
+        if on_discard:
+            on_discard()
+        return {"error": str(e)}, 429
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}, 202
 
 
 @app.route("/")
@@ -50,8 +152,38 @@ def upload_resume():
         temp_path = tmp.name
         file.save(temp_path)
 
+    sid = session_id()
+    if wants_async():
+        # The job deletes temp_path when it runs; if it never runs, delete it here
+        return submit_job("upload_resume", run_upload_resume, temp_path, file.filename, sid,
+                          on_discard=lambda: Path(temp_path).unlink(missing_ok=True))
+
     try:
-        resume_text = read_resume(temp_path)
+        return run_upload_resume(Job(), temp_path, file.filename, sid)
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+def run_upload_resume(job, temp_path, filename="", sid=DEFAULT_SESSION):
+    """
+    Parse an uploaded resume file into the session's resume. Deletes temp_path.
+    Byte-identical files skip extraction and the Gemini call entirely.
+    """
+    try:
+        with job.stage("extract_text"):
+            file_hash = file_key(temp_path)
+            resume_text = resume_text_cache.get(file_hash)
+            if resume_text is None:
+                resume_text = read_resume(temp_path)
+                resume_text_cache.set(file_hash, resume_text)
+
+        parse_key = make_key(resume_text, PARSE_PROMPT_VERSION, model_id())
+        parsed = resume_parse_cache.get(parse_key)
+        if parsed is not None:
+            with job.stage("save"):
+                sessions.set(sid, "resume", parsed)
+                resume_library.add(file_hash, filename, parsed)
+            return {"message": "✅ Resume uploaded and parsed successfully.", "hash": file_hash, "cached": True}
 
         # Prompt Gemini
         prompt = f"""
@@ -103,20 +235,38 @@ def upload_resume():
         {resume_text}
         """
 
-        response = model.generate_content(prompt)
-        json_output = clean_gemini_output(response.text)
+        # Invalid fragments are re-requested; OutputError if the output is unusable
+        with job.stage("model"):
+            parsed = output.generate_json(prompt, output.RESUME_SCHEMA)
 
-        # Save as resume_fixed.json
-        with open(RESUME_JSON_FILE, "w", encoding="utf-8") as f:
-            f.write(json_output)
+        # Save as the session's resume (resume_fixed.json for the default session)
+        with job.stage("save"):
+            sessions.set(sid, "resume", parsed)
+            resume_parse_cache.set(parse_key, parsed)
+            resume_library.add(file_hash, filename, parsed)
 
-        return {"message": "✅ Resume uploaded and parsed successfully."}
-    except Exception as e:
-        return {"error": str(e)}, 500
+        return {"message": "✅ Resume uploaded and parsed successfully.", "hash": file_hash, "cached": False}
     finally:
         os.remove(temp_path)
 
 
+# ---------- Resume library ----------
+@app.route("/resumes", methods=["GET"])
+def list_resumes():
+    return jsonify({"resumes": resume_library.list()})
+
+
+@app.route("/resumes/<file_hash>/activate", methods=["POST"])
+def activate_resume(file_hash):
+    """Make a previously parsed resume the active one, without re-parsing."""
+    parsed = resume_library.get(file_hash)
+    if parsed is None:
+        return {"error": "Unknown resume hash"}, 404
+    sessions.set(session_id(), "resume", parsed)
+    resume_library.touch(file_hash)
+    return jsonify({"message": "✅ Resume activated.", "hash": file_hash})
+
+
 # ---------- STEP 1: Tailor Resume ----------
 @app.route("/tailor", methods=["POST"])
 def tailor():
@@ -128,71 +278,390 @@ def tailor():
     company = data.get("company", "").strip().replace(" ", "_")
     role = data.get("role", "").strip().replace(" ", "_")
 
-    if not RESUME_JSON_FILE.exists():
+    sid = session_id()
+    resume_data = sessions.get(sid, "resume")
+    if resume_data is None:
         return {"error": "resume_fixed.json not found. Upload resume first."}, 400
-    resume_data = json.loads(RESUME_JSON_FILE.read_text(encoding="utf-8"))
+
+    # Already applied to this company + role? Warn, or stop before the model call if asked to
+    blocked, duplicate = duplicate_check(company, role, data)
+    if blocked:
+        return blocked
+
+    # "no_cache": true forces a fresh Gemini call for this request
+    use_cache = not data.get("no_cache", False)
+    # "mode": "sections" tailors each section in parallel instead of one big call
+    mode = data.get("mode", "full")
+    if mode not in ("full", "sections"):
+        return {"error": 'mode must be "full" or "sections"'}, 400
+
+    if wants_async():
+        return submit_job("tailor", run_tailor, resume_data, jd_text, company, role, use_cache, sid, mode, duplicate)
 
     try:
-        tailored = tailor_resume(resume_data, jd_text)
+        return run_tailor(Job(), resume_data, jd_text, company, role, use_cache, sid, mode, duplicate)
     except Exception as e:
         return {"error": str(e)}, 500
 
-    TAILORED_JSON_FILE.write_text(
-        json.dumps(tailored, indent=2, ensure_ascii=False),
-        encoding="utf-8"
-    )
+
+def run_tailor(job, resume_data, jd_text, company, role, use_cache=True, sid=DEFAULT_SESSION, mode="full",
+               duplicate=None):
+    report, reuse = {}, {}
+    with job.stage("model"):
+        tailored = tailor_resume(resume_data, jd_text, use_cache=use_cache, prompt_report=report,
+                                 mode=mode, reuse_report=reuse, company=company, role=role)
+
+    with job.stage("save"):
+        sessions.set(sid, "tailored", tailored)
 
     return {
         "message": "✅ Resume tailored successfully. Now call /generate_docx or /generate_pdf.",
         "company": company,
-        "role": role
+        "role": role,
+        "prompt_tokens": report or None,   # None when served from cache
+        "near_duplicate": reuse or None,   # {"similarity", "reused": "result"|"seed"}
+        "duplicate": duplicate,            # {"warning", "application"} if already tracked
     }
 
 
+def duplicate_check(company, role, data):
+    """
+    (409 response or None, duplicate info or None) for an already tracked
+    company + role. Tailoring goes ahead with a warning unless the caller
+    sent "block_duplicates": true.
+    """
+    application = ledger.find_duplicate(company, role)
+    if application is None:
+        return None, None
+    warning = (f"Already applied to {application['company']} - {application['role']} "
+               f"on {application['date']} ({application['status']}).")
+    if data.get("block_duplicates"):
+        return ({"error": warning, "application": application}, 409), None
+    return None, {"warning": warning, "application": application}
+
+
+# ---------- ONE SHOT: Match + Tailor + Render ----------
+@app.route("/analyze", methods=["POST"])
+def analyze():
+    """
+    Scraped job in, files out, in one request: match scoring runs while the
+    resume is tailored, and rendering starts as soon as the tailored JSON is
+    ready. JSON: {company, role, jd_text (or jd), formats: ["docx", "pdf"],
+    match_mode: "llm" | "local", mode, no_cache, block_duplicates}.
+    "stream": true sends match / tailored / file events as they finish (SSE).
+    """
+    data = request.get_json(silent=True) or {}
+    jd_text = data.get("jd_text") or data.get("jd")
+    if not jd_text:
+        return {"error": "Send JSON with keys: company, role, jd_text"}, 400
+    company = str(data.get("company") or "Company").strip().replace(" ", "_")
+    role = str(data.get("role") or "Role").strip().replace(" ", "_")
+    formats = tuple(f for f in data.get("formats", ["docx"]) if f in ("docx", "pdf"))
+    if not formats:
+        return {"error": "formats must include 'docx' and/or 'pdf'"}, 400
+    match_mode = data.get("match_mode", "llm")
+    mode = data.get("mode", "full")
+    if match_mode not in ("llm", "local") or mode not in ("full", "sections"):
+        return {"error": 'match_mode must be "llm" or "local", mode "full" or "sections"'}, 400
+
+    sid = session_id()
+    resume_data = sessions.get(sid, "resume")
+    if resume_data is None:
+        return {"error": "resume_fixed.json not found. Upload resume first."}, 400
+    blocked, duplicate = duplicate_check(company, role, data)
+    if blocked:
+        return blocked
+
+    args = (resume_data, jd_text, company, role, formats, match_mode, not data.get("no_cache", False), sid, mode,
+            duplicate)
+    if data.get("stream"):
+        return sse_response(sse(body, event=event) for event, body in analyze_events(Job(), *args))
+    if wants_async():
+        return submit_job("analyze", run_analyze, *args)
+    try:
+        return jsonify(run_analyze(Job(), *args))
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+def run_analyze(job, *args):
+    for event, body in analyze_events(job, *args):
+        if event == "error":
+            raise RuntimeError(body["error"])
+    return body
+
+
+def _local_match(resume_data, jd_text):
+    result = scoring.score(resume_data, jd_text)
+    result["reason"] = scoring.local_reason(result)
+    return result
+
+
+def analyze_events(job, resume_data, jd_text, company, role, formats=("docx",), match_mode="llm",
+                   use_cache=True, sid=DEFAULT_SESSION, mode="full", duplicate=None):
+    """
+    Yields (event, data): "match", "tailored", one "file" per format, then
+    "done" with everything plus per-stage seconds (or "error" if tailoring
+    fails; a failed match score is reported in "done" instead).
+    """
+    start = time.perf_counter()
+    result = {"company": company, "role": role, "match": None, "files": {}, "cached": {}, "duplicate": duplicate}
+    report, reuse = {}, {}
+
+    def staged(name, fn, *fn_args, **fn_kwargs):
+        with job.stage(name):
+            return fn(*fn_args, **fn_kwargs)
+
+    def submit(pool, *fn_args, **fn_kwargs):
+        # copy the context so pool threads keep the request's stage timings and scheduler priority
+        return pool.submit(contextvars.copy_context().run, staged, *fn_args, **fn_kwargs)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        match_fn = _local_match if match_mode == "local" else llm_match_score
+        match_future = submit(pool, "match", match_fn, resume_data, jd_text)
+        tailor_future = submit(pool, "tailor", tailor_resume, resume_data, jd_text, use_cache=use_cache,
+                               prompt_report=report, mode=mode, reuse_report=reuse, company=company, role=role)
+        pending = {match_future, tailor_future}
+        tailored = None
+        while tailored is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if match_future in done:
+                try:
+                    result["match"] = match_future.result()
+                    yield "match", result["match"]
+                except Exception as e:
+                    result["match_error"] = str(e)
+            if tailor_future in done:
+                try:
+                    tailored = tailor_future.result()
+                except Exception as e:
+                    yield "error", {"error": f"Tailoring failed: {e}", "stages": dict(job.stages)}
+                    return
+        result["prompt_tokens"] = report or None
+        result["near_duplicate"] = reuse or None
+        sessions.set(sid, "tailored", tailored)
+        yield "tailored", {"tailored": tailored, "prompt_tokens": result["prompt_tokens"],
+                           "near_duplicate": result["near_duplicate"]}
+
+        # Rendering overlaps with a match score that is still running
+        for fmt in formats:
+            path = RESUMES_DIR / f"{company}_{role}.{fmt}"
+            with job.stage(f"render_{fmt}"):
+                result["cached"][fmt] = artifact_store.materialize(tailored, path)
+            result["files"][fmt] = path.name
+            yield "file", {"format": fmt, "file": path.name, "cached": result["cached"][fmt]}
+        with job.stage("update_excel"):
+            update_excel(company, role)
+
+        if result["match"] is None and "match_error" not in result:
+            try:
+                result["match"] = match_future.result()
+                yield "match", result["match"]
+            except Exception as e:
+                result["match_error"] = str(e)
+
+    total = time.perf_counter() - start
+    result["stages"] = dict(job.stages)
+    result["total_seconds"] = round(total, 4)
+    # What the same steps cost as separate sequential calls
+    result["sequential_seconds"] = round(sum(job.stages.values()), 4)
+    result["message"] = f"✅ Analyzed and saved {', '.join(result['files'].values())} in Resumes folder"
+    yield "done", result
+
+
+# ---------- STEP 1B: Batch Tailor ----------
+@app.route("/tailor_batch", methods=["POST"])
+def tailor_batch_endpoint():
+    """
+    Tailor against many JDs at once. Streams one JSON line per item
+    (application/x-ndjson) as soon as that item finishes.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get("items"), list) or not data["items"]:
+        return {"error": "Send JSON with key: items (list of {jd_text, company, role})"}, 400
+    if any(not isinstance(it, dict) or "jd_text" not in it for it in data["items"]):
+        return {"error": "Every item needs a jd_text"}, 400
+
+    resume_data = sessions.get(session_id(), "resume")
+    if resume_data is None:
+        return {"error": "resume_fixed.json not found. Upload resume first."}, 400
+
+    try:
+        concurrency = int(data.get("concurrency", BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        return {"error": "concurrency must be an integer"}, 400
+    concurrency = max(1, min(concurrency, MAX_BATCH_CONCURRENCY))
+    formats = ("docx", "pdf") if data.get("pdf") else ("docx",)
+
+    def generate():
+        for result in tailor_batch(resume_data, data["items"], concurrency,
+                                   out_dir=RESUMES_DIR, formats=formats):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# ---------- Background jobs ----------
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return {"error": "Unknown job id"}, 404
+    return jsonify(job)
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    if job_queue.get(job_id) is None:
+        return {"error": "Unknown job id"}, 404
+    if not job_queue.cancel(job_id):
+        return {"error": "Job already finished"}, 409
+    return jsonify({"message": "Cancellation requested", "job_id": job_id})
+
+
+# ---------- Cache stats ----------
+@app.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    return jsonify({
+        "tailor": tailor_cache.stats(),
+        "jd_index": jd_index.stats(),
+        "resume_text": resume_text_cache.stats(),
+        "resume_parse": resume_parse_cache.stats(),
+        "chat_answers": chat_answer_cache.stats(),
+        "artifacts": artifact_store.stats(),
+    })
+
+
+# ---------- Model quota scheduler ----------
+@app.route("/scheduler_stats", methods=["GET"])
+def scheduler_stats():
+    """Queue depth, wait times per priority, retries and remaining quota."""
+    return jsonify(get_model().stats())
+
+
+# ---------- Prompt token stats ----------
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape target."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/prompt_stats", methods=["GET"])
+def prompt_stats():
+    return jsonify(prompts.stats())
+
+
+@app.route("/output_stats", methods=["GET"])
+def output_stats():
+    """JSON repair and retry rates for model output."""
+    return jsonify(output.stats())
+
+
+@app.route("/session_stats", methods=["GET"])
+def session_stats():
+    return jsonify(sessions.stats())
+
+
 # ---------- STEP 2A: Generate DOCX ----------
 @app.route("/generate_docx", methods=["GET"])
 def generate_docx():
-    if not TAILORED_JSON_FILE.exists():
+    data = sessions.get(session_id(), "tailored")
+    if data is None:
         return {"error": "No tailored_resume.json found. Run /tailor first."}, 400
 
     company = request.args.get("company", "Company").replace(" ", "_")
     role = request.args.get("role", "Role").replace(" ", "_")
     output_path = RESUMES_DIR / f"{company}_{role}.docx"
 
-    data = json.loads(TAILORED_JSON_FILE.read_text(encoding="utf-8"))
-    build_doc(data, output_path)
+    cached = artifact_store.materialize(data, output_path)
 
     update_excel(company, role)
 
-    return jsonify({"message": f"✅ DOCX saved as {output_path.name} in Resumes folder"})
+    return jsonify({"message": f"✅ DOCX saved as {output_path.name} in Resumes folder", "cached": cached})
 
 
 # ---------- STEP 2B: Generate PDF ----------
 @app.route("/generate_pdf", methods=["GET"])
 def generate_pdf():
-    if not TAILORED_JSON_FILE.exists():
+    data = sessions.get(session_id(), "tailored")
+    if data is None:
         return {"error": "No tailored_resume.json found. Run /tailor first."}, 400
 
     company = request.args.get("company", "Company").replace(" ", "_")
     role = request.args.get("role", "Role").replace(" ", "_")
 
+    if wants_async():
+        return submit_job("generate_pdf", run_generate_pdf, data, company, role)
+
+    try:
+        return jsonify(run_generate_pdf(Job(), data, company, role))
+    except Exception as e:
+        return {"error": f"PDF conversion failed: {e}"}, 500
+
+
+def run_generate_pdf(job, data, company, role):
     docx_path = RESUMES_DIR / f"{company}_{role}.docx"
     pdf_path = RESUMES_DIR / f"{company}_{role}.pdf"
 
-    data = json.loads(TAILORED_JSON_FILE.read_text(encoding="utf-8"))
-    build_doc(data, docx_path)
+    # Unchanged tailored JSON -> both files come straight from the artifact store
+    with job.stage("build_doc"):
+        artifact_store.materialize(data, docx_path)
+
+    with job.stage("render_pdf"):
+        cached = artifact_store.materialize(data, pdf_path)
+
+    with job.stage("update_excel"):
+        update_excel(company, role)
 
+    return {"message": f"✅ PDF saved as {pdf_path.name} in Resumes folder", "pdf": str(pdf_path), "cached": cached}
+
+# ---------- Bulk export ----------
+@app.route("/export_bulk", methods=["POST"])
+def export_bulk():
+    """
+    Render many company/role variants and stream them back as one ZIP.
+
+    JSON: {"variants": [{"company", "role", "tailored"?}], "formats": ["docx", "pdf"]}.
+    A variant without "tailored" uses the session's tailored resume.
+    """
+    data = request.get_json(silent=True) or {}
+    variants = data.get("variants")
+    if not isinstance(variants, list) or not variants:
+        return {"error": "Send JSON with a non-empty 'variants' list"}, 400
+    if len(variants) > export.MAX_EXPORT_VARIANTS:
+        return {"error": f"At most {export.MAX_EXPORT_VARIANTS} variants per export"}, 400
+    formats = tuple(f for f in data.get("formats", ["docx", "pdf"]) if f in ("docx", "pdf"))
+    if not formats:
+        return {"error": "formats must include 'docx' and/or 'pdf'"}, 400
+
+    default_tailored = None
+    jobs, seen = [], set()
+    for i, v in enumerate(variants):
+        tailored = v.get("tailored") if isinstance(v, dict) else None
+        if tailored is None:
+            if default_tailored is None:
+                default_tailored = sessions.get(session_id(), "tailored")
+            if default_tailored is None:
+                return {"error": "No tailored_resume.json found. Run /tailor first."}, 400
+            tailored = default_tailored
+        company = str(v.get("company") or "Company").strip().replace(" ", "_")
+        role = str(v.get("role") or "Role").strip().replace(" ", "_")
+        stem = f"{company}_{role}"
+        if stem in seen:
+            stem = f"{stem}_{i + 1}"
+        seen.add(stem)
+        jobs.append((stem, tailored))
+
+    out_dir = Path(tempfile.mkdtemp(prefix="export_"))
     try:
-        subprocess.run([
-            "soffice", "--headless", "--convert-to", "pdf", "--outdir",
-            str(RESUMES_DIR), str(docx_path)
-        ], check=True)
+        paths = export.render_variants(jobs, out_dir, formats)
     except Exception as e:
-        return {"error": f"PDF conversion failed: {e}"}, 500
-
-    update_excel(company, role)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return {"error": f"Export failed: {e}"}, 500
+    return Response(stream_with_context(export.zip_stream(paths, cleanup_dir=out_dir)),
+                    mimetype="application/zip",
+                    headers={"Content-Disposition": "attachment; filename=resumes.zip"})
 
-    return jsonify({"message": f"✅ PDF saved as {pdf_path.name} in Resumes folder"})
 # ---------- STEP 3: Mark as Applied ----------
 @app.route("/applied", methods=["POST"])
 def applied():
@@ -203,30 +672,134 @@ def applied():
     company = data["company"].strip().replace(" ", "_")
     role = data["role"].strip().replace(" ", "_")
 
-    update_excel(company, role)
+    application, created = ledger.record(company, role)
+    if not created:
+        return jsonify({"message": f"ℹ️ Already tracked: {company} - {role} ({application['status']})",
+                        "application": application})
+
+    return jsonify({"message": f"✅ Application recorded for {company} - {role}", "application": application})
+
+# ---------- Application history ----------
+@app.route("/applications", methods=["GET"])
+def list_applications():
+    """
+    Newest first. Filters: company, role, status, date_from, date_to (YYYY-MM-DD).
+    Paging: limit (default 50) and cursor (next_cursor from the previous page).
+    """
+    args = request.args
+    try:
+        cursor = int(args["cursor"]) if args.get("cursor") else None
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+        page = ledger.query(company=args.get("company"), role=args.get("role"), status=args.get("status"),
+                            date_from=args.get("date_from"), date_to=args.get("date_to"),
+                            limit=limit, cursor=cursor)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return jsonify(page)
+
+
+@app.route("/applications/duplicate", methods=["GET"])
+def duplicate_application():
+    """The existing application for ?company=&role=, if any (checked before tailoring)."""
+    return jsonify({"application": ledger.find_duplicate(request.args.get("company", ""),
+                                                         request.args.get("role", ""))})
+
+
+@app.route("/applications/<int:app_id>", methods=["GET"])
+def get_application(app_id):
+    application = ledger.get(app_id)
+    if application is None:
+        return {"error": "Unknown application id"}, 404
+    return jsonify(application)
+
+
+@app.route("/applications/<int:app_id>", methods=["PATCH"])
+def update_application(app_id):
+    """JSON: {"status": "Interview" | "Offer" | "Rejected"}; updates the row in place."""
+    data = request.get_json(silent=True) or {}
+    if "status" not in data:
+        return {"error": f"Send JSON with key: status ({', '.join(STATUSES)})"}, 400
+    try:
+        return jsonify(ledger.update_status(app_id, data["status"]))
+    except KeyError:
+        return {"error": "Unknown application id"}, 404
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
-    return jsonify({"message": f"✅ Application saved for {company} - {role} in Excel"})
+
+# ---------- Export Excel tracker ----------
+@app.route("/export_excel", methods=["GET"])
+def export_excel():
+    """Rebuild the .xlsx tracker if new applications were logged, then download it."""
+    ledger.export_excel(EXCEL_FILE)
+    return send_file(EXCEL_FILE.resolve(), as_attachment=True, download_name=EXCEL_FILE.name)
 
 # ---------- BONUS: Match Score ----------
 @app.route("/match_score", methods=["POST"])
 def match_score():
-    data = request.get_json()
-    if not data or "jd_text" not in data:
+    """
+    mode "llm" (default): Gemini score + reason ("stream": true for SSE).
+    mode "local": keyword score with matched/missing terms in a few ms; add
+    "explain": true for a Gemini reason, or send "jd_texts" to score many JDs.
+    """
+    data = request.get_json() or {}
+    mode = data.get("mode", "llm")
+    if mode not in ("llm", "local"):
+        return {"error": 'mode must be "llm" or "local"'}, 400
+    batch = mode == "local" and "jd_texts" in data
+    if "jd_text" not in data and not batch:
         return {"error": "Send JSON with key: jd_text"}, 400
+    if batch and not (isinstance(data["jd_texts"], list) and all(isinstance(t, str) for t in data["jd_texts"])):
+        return {"error": "jd_texts must be a list of strings"}, 400
 
-    jd_text = data["jd_text"]
-
-    if not RESUME_JSON_FILE.exists():
+    resume_data = sessions.get(session_id(), "resume")
+    if resume_data is None:
         return {"error": "resume_fixed.json not found. Upload resume first."}, 400
 
-    resume_data = json.loads(RESUME_JSON_FILE.read_text(encoding="utf-8"))
+    if mode == "local":
+        if batch:
+            return jsonify({"results": scoring.score_many(resume_data, data["jd_texts"])})
+        result = scoring.score(resume_data, data["jd_text"])
+        result["reason"] = scoring.local_reason(result)
+        if data.get("explain"):
+            try:
+                result["reason"] = llm_match_score(resume_data, data["jd_text"]).get("reason", result["reason"])
+            except Exception as e:
+                result["explain_error"] = str(e)
+        return jsonify(result)
 
-    prompt = f"""
+    if data.get("stream"):
+        prompt, report = match_score_prompt(resume_data, data["jd_text"])
+
+        def finish(text):
+            result = output.parse_output(text, prompt, output.MATCH_SCHEMA)
+            result["prompt_tokens"] = report
+            return result
+
+        return sse_response(stream_model(get_model(), prompt, finish=finish))
+
+    try:
+        return jsonify(llm_match_score(resume_data, data["jd_text"]))
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+def llm_match_score(resume_data, jd_text):
+    prompt, report = match_score_prompt(resume_data, jd_text)
+    result = output.generate_json(prompt, output.MATCH_SCHEMA)
+    result["prompt_tokens"] = report
+    return result
+
+
+def match_score_prompt(resume_data, jd_text):
+    """Returns (prompt, token report)."""
+    resume_text, report = prompts.resume_context(resume_data, jd_text, prompts.MATCH_TOKEN_BUDGET)
+    return f"""
     You are an expert career coach and ATS system.
     Compare the resume and job description carefully and give a match score.
 
     Resume JSON:
-    {json.dumps(resume_data, indent=2)}
+    {resume_text}
 
     Job Description:
     {jd_text}
@@ -240,75 +813,60 @@ def match_score():
       "score": 78,
       "reason": "Strong in Python, SQL, ML. Missing AWS and CI/CD."
     }}
-    """
+    """, report
 
-    try:
-        response = model.generate_content(prompt)
-        resp_text = response.text.strip()
-
-        # clean Gemini’s JSON (in case it wraps in code fences)
-        if resp_text.startswith("```"):
-            parts = resp_text.split("```")
-            if len(parts) >= 2:
-                resp_text = parts[1]
-            if resp_text.lower().startswith("json"):
-                resp_text = resp_text[4:]
-            resp_text = resp_text.strip()
-
-        result = json.loads(resp_text)
-        return jsonify(result)
 
-    except Exception as e:
-        return {"error": str(e)}, 500
 @app.route("/chat", methods=["POST"])
 def chat():
     data = request.get_json()
     question = data.get("question", "")
 
-    if not RESUME_JSON_FILE.exists():
+    resume_data = sessions.get(session_id(), "resume")
+    if resume_data is None:
         return {"error": "Resume not uploaded"}, 400
 
-    resume_data = json.loads(RESUME_JSON_FILE.read_text(encoding="utf-8"))
+    # Repeat questions against the same resume version are answered from cache;
+    # a changed resume gets a new key, so its old answers are never served
+    cache_key = make_key(resume_data, normalize_question(question), CHAT_PROMPT_VERSION, model_id())
+    use_cache = not data.get("no_cache", False)
+    cached = chat_answer_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        result = {"answer": cached, "prompt_tokens": None, "cached": True}
+        if data.get("stream"):
+            return sse_response(iter([sse(result, event="done")]))
+        return jsonify(result)
+
+    # Only the resume sections relevant to the question go into the prompt
+    resume_text, report = retrieval.retrieve_context(resume_data, question)
 
     prompt = f"""
     You are a helpful career assistant answering job application questions.
-    Use ONLY this resume when answering:
+    Use ONLY these resume excerpts when answering:
 
-    Resume JSON:
-    {json.dumps(resume_data, indent=2)}
+    {resume_text}
 
     Question: {question}
 
     Answer clearly and concisely as if filling out a job application form.
     """
 
+    def finish(text):
+        chat_answer_cache.set(cache_key, text.strip())
+        return {"answer": text.strip(), "prompt_tokens": report, "cached": False}
+
+    if data.get("stream"):
+        return sse_response(stream_model(get_model(), prompt, finish=finish))
+
     try:
-        response = model.generate_content(prompt)
-        return jsonify({"answer": response.text.strip()})
+        response = get_model().generate_content(prompt)
+        return jsonify(finish(response.text))
     except Exception as e:
         return {"error": str(e)}, 500
 
 # ---------- HELPER: Update Excel ----------
 def update_excel(company, role):
-    today = datetime.datetime.now().strftime("%d %b %Y")
-    status = "Applied"
-
-    if not EXCEL_FILE.exists():
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Applications"
-        ws.append(["Date", "Company", "Role", "Status"])
-    else:
-        wb = openpyxl.load_workbook(EXCEL_FILE)
-        ws = wb.active
-
-    ws.append([today, company, role, status])
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-        temp_filename = tmp.name
-    wb.save(temp_filename)
-    wb.close()
-    shutil.move(temp_filename, EXCEL_FILE)
+    """Record an application once per company + role; the .xlsx is exported on demand."""
+    ledger.record(company, role)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,173 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import metrics
+from cache import make_key
+
+# ---------------- CONFIG ----------------
+ARTIFACTS_DIR = Path("Resumes") / ".artifacts"
+MAX_ARTIFACTS = 200                     # rendered variants kept, least recently used go first
+MAX_AGE = 30 * 24 * 60 * 60             # unused this long (seconds) -> evicted
+KEY_LOCK_STRIPES = 64                   # per-key render locks, shared by hash(key) % N
+
+
+class ArtifactStore:
+    """
+    Rendered DOCX/PDF files keyed by a hash of the tailored JSON plus the
+    renderer version and PDF backend, so unchanged resumes are never
+    rebuilt or reconverted. Artifacts are copied out to the usual
+    Resumes/<company>_<role>.docx|pdf names.
+
+    manifest.json maps each key to the variant names that use it and each
+    name to its current key. When a name moves to a new key and the old
+    key has no names left, the old files are stale and evicted right away;
+    on top of that the store is capped at max_artifacts (LRU) and max_age.
+    A key is pinned while a request copies its files out, and eviction
+    leaves pinned keys for a later pass.
+
+    Single-process only: the manifest and render locks are in-memory, so
+    two server processes sharing one directory can lose manifest updates.
+    Give each process its own root.
+    """
+
+    def __init__(self, root: Path = ARTIFACTS_DIR, max_artifacts: int = MAX_ARTIFACTS,
+                 max_age: float = MAX_AGE):
+        self.dir = Path(root)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_artifacts = max_artifacts
+        self.max_age = max_age
+        self._manifest_path = self.dir / "manifest.json"
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+        self._pinned = Counter()       # key -> requests between render and copy-out
+        self.hits = 0
+        self.misses = 0
+
+    # ----- manifest -----
+    def _read_manifest(self) -> dict:
+        if not self._manifest_path.exists():
+            return {"artifacts": {}, "names": {}}
+        return json.loads(self._manifest_path.read_text(encoding="utf-8"))
+
+    def _write_manifest(self, manifest: dict):
+        tmp = self._manifest_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._manifest_path)
+
+    def _remove(self, manifest: dict, key: str):
+        manifest["artifacts"].pop(key, None)
+        for path in self.dir.glob(f"{key}.*"):
+            path.unlink(missing_ok=True)
+
+    def _evict(self, manifest: dict):
+        # Pinned keys are being copied out right now; they go on a later pass
+        now = time.time()
+        artifacts = manifest["artifacts"]
+        for key, entry in list(artifacts.items()):
+            if key in self._pinned:
+                continue
+            if not entry["names"] or now - entry["last_used"] > self.max_age:
+                self._remove(manifest, key)
+        by_age = sorted(artifacts, key=lambda k: artifacts[k]["last_used"])
+        for key in by_age[:max(0, len(by_age) - self.max_artifacts)]:
+            if key not in self._pinned:
+                self._remove(manifest, key)
+        live = set(artifacts)
+        manifest["names"] = {name: key for name, key in manifest["names"].items() if key in live}
+
+    def _record(self, key: str, name: str, fmt: str):
+        with self._lock:
+            manifest = self._read_manifest()
+            now = time.time()
+            entry = manifest["artifacts"].setdefault(key, {"created": now, "names": [], "formats": []})
+            entry["last_used"] = now
+            if fmt not in entry["formats"]:
+                entry["formats"].append(fmt)
+            if name not in entry["names"]:
+                entry["names"].append(name)
+
+            old_key = manifest["names"].get(name)
+            manifest["names"][name] = key
+            if old_key and old_key != key and old_key in manifest["artifacts"]:
+                old = manifest["artifacts"][old_key]
+                old["names"] = [n for n in old["names"] if n != name]   # no names left: stale, evicted
+            self._evict(manifest)
+            self._write_manifest(manifest)
+
+    # ----- rendering -----
+    def key(self, data: dict) -> str:
+        import writer
+        return make_key(data, writer.RENDERER_VERSION, writer.PDF_BACKEND)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        # Fixed stripes instead of one lock per key, which would grow forever;
+        # two keys sharing a stripe only means they render one after the other
+        return self._key_locks[hash(key) % KEY_LOCK_STRIPES]
+
+    def _ensure(self, data: dict, key: str, fmt: str) -> tuple:
+        """(artifact path, was cached) for one format, rendering it if needed."""
+        import writer
+        path = self.dir / f"{key}.{fmt}"
+        with self._key_lock(key):
+            if path.exists():
+                with self._lock:
+                    self.hits += 1
+                metrics.CACHE_LOOKUPS.inc(cache="artifacts", result="hit")
+                return path, True
+            with self._lock:
+                self.misses += 1
+            metrics.CACHE_LOOKUPS.inc(cache="artifacts", result="miss")
+            docx_path = self.dir / f"{key}.docx"
+            if fmt == "docx":
+                tmp = self.dir / f"{key}.{threading.get_ident()}.tmp.docx"
+                writer.build_doc(data, tmp)
+                os.replace(tmp, path)
+            else:
+                # A DOCX built moments earlier by /generate_docx is reused here
+                if writer.PDF_BACKEND != "native" and not docx_path.exists():
+                    writer.build_doc(data, docx_path)
+                writer.render_pdf(data, docx_path, self.dir)
+            return path, False
+
+    def materialize(self, data: dict, dest: Path, fmt: str = None) -> bool:
+        """
+        Put the rendered file for `data` at dest (format from its suffix).
+        Returns True if it was served from the store without rendering.
+        """
+        dest = Path(dest)
+        fmt = fmt or dest.suffix.lstrip(".")
+        key = self.key(data)
+        with self._lock:
+            self._pinned[key] += 1
+        try:
+            path, cached = self._ensure(data, key, fmt)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{dest.name}.{threading.get_ident()}.tmp")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, dest)
+        finally:
+            with self._lock:
+                self._pinned[key] -= 1
+                if not self._pinned[key]:
+                    del self._pinned[key]
+        self._record(key, dest.stem, fmt)
+        return cached
+
+    def stats(self) -> dict:
+        with self._lock:
+            manifest = self._read_manifest()
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "artifacts": len(manifest["artifacts"]),
+            "variants": len(manifest["names"]),
+            "bytes": sum(p.stat().st_size for p in self.dir.glob("*.*") if p.name != "manifest.json"),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
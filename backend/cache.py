@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import metrics
+
+# ---------------- CONFIG ----------------
+CACHE_DIR = Path(".cache")
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024      # 50 MB per cache
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60        # one week, in seconds
+DEFAULT_MAX_ENTRIES = 10_000
+EVICT_TO = 0.9                            # trim to 90% of the limits so the next writes don't evict again
+
+
+# ---------------- KEYS ----------------
+def canonical_json(data) -> str:
+    """Serialize JSON data so equal objects always give the same string."""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-scraped copies of the same text match."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase and drop punctuation so rephrased copies of a form question match."""
+    return re.sub(r"[^a-z0-9+#]+", " ", (text or "").lower()).strip()
+
+
+def make_key(*parts) -> str:
+    """SHA-256 over the given parts (dicts/lists are canonicalized first)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = canonical_json(part)
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def file_key(path) -> str:
+    """SHA-256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------------- CACHE ----------------
+class ResultCache:
+    """
+    Content-addressed JSON cache on disk.
+
+    Each entry is one file named after its key, holding the value and the
+    time it was stored; max_age counts from that creation time. Reads bump
+    the file mtime, which is only used for LRU order. Entry count and size
+    are tracked as entries are written, and the directory is only scanned
+    and trimmed (least recently used first, down to EVICT_TO of the limits)
+    once max_entries or max_bytes is crossed.
+    """
+
+    def __init__(self, name: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE, root: Path = CACHE_DIR,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.name = name
+        self.dir = Path(root) / name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = None        # count / size of the directory, scanned on first write
+        self._bytes = 0
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def get(self, key: str):
+        """Return the cached value or None."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+                if not isinstance(entry, dict) or "created" not in entry:
+                    raise ValueError("entry without a creation time")
+                if time.time() - entry["created"] > self.max_age:
+                    self._unlink(path)
+                    raise FileNotFoundError
+                now = time.time()
+                os.utime(path, (now, now))  # mark as recently used
+            except (FileNotFoundError, ValueError):
+                self.misses += 1
+                metrics.CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+                return None
+            self.hits += 1
+            metrics.CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+            return entry["value"]
+
+    def set(self, key: str, value) -> None:
+        """Store a value atomically, then evict if over budget."""
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        now = time.time()
+        tmp.write_text(json.dumps({"created": now, "value": value}, ensure_ascii=False), encoding="utf-8")
+        os.utime(tmp, (now, now))
+        size = tmp.stat().st_size
+        with self._lock:
+            if self._entries is None:
+                self._scan()
+            old = self._size(path)
+            os.replace(tmp, path)
+            if old is None:
+                self._entries += 1
+            self._bytes += size - (old or 0)
+            if self._entries > self.max_entries or self._bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._unlink(self._path(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self.dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+            self._entries, self._bytes = 0, 0
+
+    def _size(self, path: Path):
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def _unlink(self, path: Path) -> None:
+        size = self._size(path)
+        path.unlink(missing_ok=True)
+        if size is not None and self._entries is not None:
+            self._entries -= 1
+            self._bytes -= size
+
+    def _scan(self) -> list:
+        """(mtime, size, path) of every entry; also resets the running totals."""
+        entries = []
+        for path in self.dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        self._entries = len(entries)
+        self._bytes = sum(size for _, size, _ in entries)
+        return entries
+
+    def _evict(self) -> None:
+        # Not used for max_age means created longer ago than that too, so those go first
+        now = time.time()
+        max_entries = int(self.max_entries * EVICT_TO)
+        max_bytes = self.max_bytes * EVICT_TO
+        entries = sorted(self._scan())
+        count, total = self._entries, self._bytes
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age and count <= max_entries and total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            count -= 1
+            total -= size
+        self._entries, self._bytes = count, total
+
+    def stats(self) -> dict:
+        files = list(self.dir.glob("*.json"))
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "entries": len(files),
+            "bytes": sum(f.stat().st_size for f in files if f.exists()),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,288 @@
+import argparse
+import atexit
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from metrics import timed
+
+# UNO ships with LibreOffice (python3-uno), not on PyPI. Without it we fall
+# back to one cold `soffice --convert-to` process per conversion.
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+# ---------------- CONFIG ----------------
+SOFFICE = "soffice"
+POOL_SIZE = 2                 # long-lived LibreOffice listeners
+START_TIMEOUT = 30            # seconds to wait for a listener to accept connections
+CONVERT_TIMEOUT = 60          # seconds per conversion before the instance is killed
+
+
+# ---------------- COLD START ----------------
+def _cold_run(docx_paths, out_dir: Path, timeout: float):
+    # A private profile per call: soffice processes sharing the default profile
+    # hand their work to the first one (or fail) when run concurrently.
+    with tempfile.TemporaryDirectory(prefix="soffice_profile_") as profile_dir:
+        subprocess.run([
+            SOFFICE, "--headless", f"-env:UserInstallation={Path(profile_dir).as_uri()}",
+            "--convert-to", "pdf", "--outdir", str(out_dir),
+            *[str(p) for p in docx_paths]
+        ], check=True, timeout=timeout)
+
+
+def cold_convert(docx_path: Path, out_dir: Path, timeout: float = CONVERT_TIMEOUT) -> Path:
+    """Convert with a fresh `soffice --headless --convert-to pdf` process."""
+    _cold_run([docx_path], out_dir, timeout)
+    return Path(out_dir) / (Path(docx_path).stem + ".pdf")
+
+
+def cold_convert_many(docx_paths, out_dir: Path, timeout: float = CONVERT_TIMEOUT) -> list:
+    """Convert a whole batch with one soffice process, so startup is paid once."""
+    docx_paths = [Path(p) for p in docx_paths]
+    _cold_run(docx_paths, out_dir, timeout * len(docx_paths))
+    return [Path(out_dir) / (p.stem + ".pdf") for p in docx_paths]
+
+
+# ---------------- POOLED ----------------
+def _prop(name, value):
+    p = PropertyValue()
+    p.Name = name
+    p.Value = value
+    return p
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class SofficeInstance:
+    """One headless LibreOffice listener with its own profile directory."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.profile_dir = Path(tempfile.mkdtemp(prefix=f"soffice_profile_{index}_"))
+        self.proc = None
+        self.desktop = None
+        self.start()
+
+    def start(self):
+        self.port = _free_port()
+        self.proc = subprocess.Popen([
+            SOFFICE, "--headless", "--invisible", "--nologo", "--norestore",
+            "--nodefault", "--nolockcheck",
+            f"-env:UserInstallation={self.profile_dir.as_uri()}",
+            f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local)
+        url = f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+        deadline = time.monotonic() + START_TIMEOUT
+        while True:
+            try:
+                ctx = resolver.resolve(url)
+                break
+            except Exception:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"LibreOffice listener {self.index} failed to start")
+                time.sleep(0.2)
+        self.desktop = ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", ctx)
+
+    def stop(self):
+        self.desktop = None
+        if self.proc and self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def healthy(self) -> bool:
+        if self.proc is None or self.proc.poll() is not None or self.desktop is None:
+            return False
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def _convert(self, docx_path: Path, pdf_path: Path):
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(docx_path.resolve())), "_blank", 0,
+            (_prop("Hidden", True),))
+        try:
+            doc.storeToURL(uno.systemPathToFileUrl(str(pdf_path.resolve())),
+                           (_prop("FilterName", "writer_pdf_Export"),))
+        finally:
+            doc.close(True)
+
+    def convert(self, docx_path: Path, pdf_path: Path, timeout: float):
+        """Run one conversion; on timeout the process is killed and restarted."""
+        error = []
+
+        def work():
+            try:
+                self._convert(docx_path, pdf_path)
+            except Exception as e:
+                error.append(e)
+
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        worker.join(timeout)
+        if worker.is_alive():
+            self.restart()
+            raise TimeoutError(f"PDF conversion timed out after {timeout}s")
+        if error:
+            raise error[0]
+
+    def close(self):
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class ConverterPool:
+    """
+    Pool of warm LibreOffice listeners. Each conversion checks out a free
+    instance, health-checks it (restarting if it crashed) and returns it.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self._free = queue.Queue()
+        self._all = []
+        try:
+            for i in range(size):
+                inst = SofficeInstance(i)
+                self._all.append(inst)
+                self._free.put(inst)
+        except Exception:
+            self.close()       # don't leave the listeners that did start running
+            raise
+        atexit.register(self.close)
+
+    def _checkout(self, timeout: float) -> SofficeInstance:
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No PDF converter available after {timeout}s "
+                               f"(all {len(self._all)} busy)") from None
+
+    def convert(self, docx_path: Path, out_dir: Path, timeout: float = CONVERT_TIMEOUT) -> Path:
+        docx_path = Path(docx_path)
+        pdf_path = Path(out_dir) / (docx_path.stem + ".pdf")
+        inst = self._checkout(timeout)
+        try:
+            if not inst.healthy():
+                inst.restart()
+            inst.convert(docx_path, pdf_path, timeout)
+        finally:
+            self._free.put(inst)
+        return pdf_path
+
+    def convert_many(self, docx_paths, out_dir: Path, timeout: float = CONVERT_TIMEOUT) -> list:
+        """Convert a batch on one checked-out instance (one health check for all)."""
+        pdf_paths = []
+        inst = self._checkout(timeout)
+        try:
+            if not inst.healthy():
+                inst.restart()
+            for docx_path in docx_paths:
+                docx_path = Path(docx_path)
+                pdf_path = Path(out_dir) / (docx_path.stem + ".pdf")
+                inst.convert(docx_path, pdf_path, timeout)
+                pdf_paths.append(pdf_path)
+        finally:
+            self._free.put(inst)
+        return pdf_paths
+
+    def close(self):
+        for inst in self._all:
+            inst.close()
+        self._all = []
+
+
+# ---------------- ENTRY POINT ----------------
+_pool = None
+_pool_failed = False
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The shared pool, started on first use; None if UNO/soffice are unavailable."""
+    global _pool, _pool_failed
+    if uno is None or _pool_failed or shutil.which(SOFFICE) is None:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = ConverterPool()
+            except RuntimeError as e:
+                print(f"⚠️ Warning: {e}. Falling back to cold soffice per conversion.")
+                _pool_failed = True
+                return None
+        return _pool
+
+
+@timed("pdf_conversion")
+def convert(docx_path: Path, out_dir: Path, timeout: float = CONVERT_TIMEOUT) -> Path:
+    """Convert DOCX to PDF through the pool, or a cold soffice if there is none."""
+    pool = get_pool()
+    if pool is None:
+        return cold_convert(docx_path, out_dir, timeout)
+    return pool.convert(docx_path, out_dir, timeout)
+
+
+@timed("pdf_conversion_batch")
+def convert_many(docx_paths, out_dir: Path, timeout: float = CONVERT_TIMEOUT) -> list:
+    """Convert several DOCX files in one converter invocation; returns the PDF paths."""
+    docx_paths = list(docx_paths)
+    if not docx_paths:
+        return []
+    pool = get_pool()
+    if pool is None:
+        return cold_convert_many(docx_paths, out_dir, timeout)
+    return pool.convert_many(docx_paths, out_dir, timeout)
+
+
+# ---------------- BENCHMARK ----------------
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Compare pooled vs cold-start DOCX -> PDF latency.")
+    cli.add_argument("docx", help="sample DOCX to convert")
+    cli.add_argument("-n", type=int, default=10, help="conversions per mode")
+    args = cli.parse_args()
+
+    out_dir = Path(tempfile.mkdtemp(prefix="convert_bench_"))
+
+    def run(label, fn):
+        times = []
+        for _ in range(args.n):
+            start = time.perf_counter()
+            fn(Path(args.docx), out_dir)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        print(f"{label:>6}: median {times[len(times) // 2] * 1000:.0f} ms, "
+              f"max {times[-1] * 1000:.0f} ms over {args.n} runs")
+
+    run("cold", cold_convert)
+    start = time.perf_counter()
+    pool = get_pool()
+    if pool is None:
+        print("pooled: skipped (python3-uno or soffice not available)")
+    else:
+        pool.convert(Path(args.docx), out_dir)   # warm-up, not part of the timed runs
+        print(f"  pool: startup + first conversion {time.perf_counter() - start:.1f}s")
+        run("pooled", pool.convert)
+    shutil.rmtree(out_dir, ignore_errors=True)
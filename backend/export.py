@@ -0,0 +1,99 @@
+import io
+import shutil
+import zipfile
+from pathlib import Path
+
+import converter
+import workers
+from metrics import timed
+
+# ---------------- CONFIG ----------------
+MIN_PROCESS_BATCH = 3         # smaller batches render in-process (pool IPC costs more)
+MAX_EXPORT_VARIANTS = 50
+ZIP_CHUNK = 64 * 1024
+
+
+def _native_pdf() -> bool:
+    import pdf_writer
+    import writer
+    return writer.PDF_BACKEND == "native" and pdf_writer.available()
+
+
+def _render_one(data: dict, stem: str, out_dir: str, formats: tuple) -> list:
+    """Worker: DOCX (and a native PDF, when that backend is active) for one variant."""
+    import pdf_writer
+    import writer
+    paths = []
+    docx_path = Path(out_dir) / f"{stem}.docx"
+    if "docx" in formats or ("pdf" in formats and not _native_pdf()):
+        writer.build_doc(data, docx_path)
+        paths.append(str(docx_path))
+    if "pdf" in formats and _native_pdf():
+        pdf_path = Path(out_dir) / f"{stem}.pdf"
+        pdf_writer.build_pdf(data, pdf_path)
+        paths.append(str(pdf_path))
+    return paths
+
+
+@timed("bulk_render")
+def render_variants(variants, out_dir: Path, formats=("docx", "pdf")) -> list:
+    """
+    Render [(stem, tailored_json), ...] into out_dir; returns the file paths.
+
+    DOCX files are built across a process pool. If PDFs have to go through
+    LibreOffice they are converted afterwards in a single converter call,
+    so the conversion overhead is paid once per batch.
+    """
+    formats = tuple(formats)
+    out_dir = Path(out_dir)
+    if len(variants) >= MIN_PROCESS_BATCH:
+        pool = workers.get_pool()
+        futures = [pool.submit(_render_one, data, stem, str(out_dir), formats) for stem, data in variants]
+        results = [f.result() for f in futures]
+    else:
+        results = [_render_one(data, stem, str(out_dir), formats) for stem, data in variants]
+    paths = [Path(p) for result in results for p in result]
+
+    if "pdf" in formats and not _native_pdf():
+        docx_paths = [p for p in paths if p.suffix == ".docx"]
+        paths += converter.convert_many(docx_paths, out_dir)
+        if "docx" not in formats:
+            paths = [p for p in paths if p.suffix != ".docx"]
+    return sorted(paths)
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Unseekable sink that collects what ZipFile writes so it can be yielded."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def zip_stream(paths, cleanup_dir: Path = None):
+    """Yield a ZIP of `paths` chunk by chunk; cleanup_dir is removed afterwards."""
+    sink = _ChunkWriter()
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path in paths:
+                with open(path, "rb") as src, zf.open(Path(path).name, "w") as dest:
+                    while True:
+                        block = src.read(ZIP_CHUNK)
+                        if not block:
+                            break
+                        dest.write(block)
+                        yield from sink.drain()
+        yield from sink.drain()
+    finally:
+        if cleanup_dir is not None:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
@@ -0,0 +1,244 @@
+"""
+Near-duplicate job description index (MinHash + LSH).
+
+Reposted jobs differ by a few words, so exact-hash caching misses them.
+Every tailored JD is stored here with the cache key of its tailored
+resume; a new JD whose estimated Jaccard similarity is above the
+threshold finds it in a few milliseconds.
+
+    python jd_index.py --bench --n 100000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import metrics
+
+# ---------------- CONFIG ----------------
+INDEX_DIR = Path(".cache") / "jd_index"
+NUM_PERM = 128                 # MinHash signature length
+BANDS = 16                     # LSH bands x rows = NUM_PERM; candidates from ~0.7 similarity up
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+SEED = 1                       # changing it invalidates the stored signatures
+
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def _permutations():
+    import numpy as np
+    rng = np.random.RandomState(SEED)
+    # multiply-shift hashing: high 32 bits of (a * x + b) mod 2^64, a odd
+    a = rng.randint(0, 1 << 62, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.randint(0, 1 << 62, size=NUM_PERM, dtype=np.uint64)
+    return a, b
+
+
+def shingles(text: str):
+    """Hashes of the word 3-grams in the lowercased text (numpy uint64 array)."""
+    import numpy as np
+    words = _WORD_RE.findall(text.lower())
+    hashes = np.fromiter((zlib.crc32(w.encode()) for w in words), dtype=np.uint64, count=len(words))
+    if len(words) < SHINGLE_WORDS:
+        return np.unique(hashes)
+    # combine per-word hashes instead of hashing every joined 3-gram string
+    combined = hashes[:1 - SHINGLE_WORDS].copy()
+    for k in range(1, SHINGLE_WORDS):
+        combined *= np.uint64(0x9E3779B97F4A7C15)
+        combined ^= hashes[k:len(hashes) - SHINGLE_WORDS + 1 + k]
+    return np.unique(combined)
+
+
+class JDIndex:
+    """
+    Persistent MinHash/LSH index. Entries are appended to two files
+    (signatures.u32 and entries.jsonl), so inserts are incremental and
+    survive restarts; the LSH buckets are rebuilt in memory on first use.
+    Each entry has a scope (e.g. resume + rules version), and lookups only
+    match entries in the same scope. An entry may also name the job it was
+    tailored for (company + role); a lookup given a job only matches those.
+    """
+
+    def __init__(self, root: Path = INDEX_DIR, threshold: float = 0.8):
+        self.dir = Path(root)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    # ----- signatures -----
+    def signature(self, text: str):
+        import numpy as np
+        if not hasattr(self, "_a"):
+            self._a, self._b = _permutations()
+        values = shingles(text)
+        if values.size == 0:
+            return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint32)
+        hashed = np.multiply.outer(values, self._a)
+        hashed += self._b
+        # min then shift == shift then min, and touches 128 values instead of all
+        return (hashed.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+    def _bucket_keys(self, scope: str, sig):
+        return [(scope, band, sig[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+    # ----- storage -----
+    def _load(self):
+        import numpy as np
+        if self._loaded:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._sig_path = self.dir / "signatures.u32"
+        self._entries_path = self.dir / "entries.jsonl"
+        entries = []
+        if self._entries_path.exists():
+            with open(self._entries_path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        sigs = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        if self._sig_path.exists():
+            raw = np.fromfile(self._sig_path, dtype=np.uint32)
+            sigs = raw[:raw.size - raw.size % NUM_PERM].reshape(-1, NUM_PERM)
+        n = min(len(entries), len(sigs))      # a crash between the two writes leaves one extra
+        self.entries = entries[:n]
+        self.signatures = [sigs[i] for i in range(n)]
+        self.buckets = {}
+        for i, entry in enumerate(self.entries):
+            for key in self._bucket_keys(entry["scope"], self.signatures[i]):
+                self.buckets.setdefault(key, []).append(i)
+        self._loaded = True
+
+    def add(self, scope: str, text: str, value: str, job: str = None):
+        """Insert one JD; value is what lookups return (e.g. a tailor cache key)."""
+        self.add_many([(scope, text, value)], job=job)
+
+    def add_many(self, items, job: str = None):
+        """Insert [(scope, text, value), ...] with one append per file."""
+        sigs = [self.signature(text) for _, text, _ in items]
+        now = time.time()
+        entries = [{"scope": scope, "value": value, "added": now} for scope, _, value in items]
+        if job is not None:
+            for entry in entries:
+                entry["job"] = job
+        with self._lock:
+            self._load()
+            with open(self._sig_path, "ab") as f:
+                f.write(b"".join(sig.tobytes() for sig in sigs))
+            with open(self._entries_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            for entry, sig in zip(entries, sigs):
+                i = len(self.entries)
+                self.entries.append(entry)
+                self.signatures.append(sig)
+                for key in self._bucket_keys(entry["scope"], sig):
+                    self.buckets.setdefault(key, []).append(i)
+
+    def lookup(self, scope: str, text: str, threshold: float = None, job: str = None):
+        """
+        (value, similarity) of the most similar JD in scope above the threshold,
+        or None. With a job, entries added for other (or no) jobs are skipped.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        sig = self.signature(text)
+        with self._lock:
+            self._load()
+            candidates = set()
+            for key in self._bucket_keys(scope, sig):
+                candidates.update(self.buckets.get(key, ()))
+            best = None
+            for i in candidates:
+                if job is not None and self.entries[i].get("job") != job:
+                    continue
+                similarity = float((self.signatures[i] == sig).mean())
+                if similarity >= threshold and (best is None or similarity > best[1]):
+                    best = (self.entries[i]["value"], similarity)
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.CACHE_LOOKUPS.inc(cache="jd_index", result="miss" if best is None else "hit")
+        return best
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self.entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# ---------------- BENCHMARK ----------------
+def _synthetic_jd(rng: random.Random, vocab: list, words: int = 250) -> str:
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def _perturb(rng: random.Random, text: str, vocab: list, edits: int = 5) -> str:
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(vocab)
+    return " ".join(words)
+
+
+def benchmark(n: int, queries: int = 1000):
+    import shutil
+    import tempfile
+    rng = random.Random(0)
+    vocab = [f"w{i}" for i in range(5000)]
+    root = Path(tempfile.mkdtemp(prefix="jd_index_bench_"))
+    try:
+        index = JDIndex(root)
+        texts = [_synthetic_jd(rng, vocab) for _ in range(n)]
+        docs = texts[:queries]
+        start = time.perf_counter()
+        for i in range(0, n, 1000):
+            index.add_many([("bench", text, str(i + j)) for j, text in enumerate(texts[i:i + 1000])])
+        insert = time.perf_counter() - start
+        del texts
+        print(f"insert: {n} JDs in {insert:.1f}s ({insert / n * 1e6:.0f} µs each), "
+              f"{os.path.getsize(root / 'signatures.u32') / 1e6:.1f} MB of signatures")
+
+        start = time.perf_counter()
+        JDIndex(root).lookup("bench", docs[0])
+        print(f"reload: {time.perf_counter() - start:.2f}s")
+
+        for label, make in (("near-duplicate", lambda i: _perturb(rng, docs[i], vocab)),
+                            ("unrelated", lambda i: _synthetic_jd(rng, vocab))):
+            times, hits = [], 0
+            for i in range(queries):
+                text = make(i)
+                t = time.perf_counter()
+                result = index.lookup("bench", text)
+                times.append(time.perf_counter() - t)
+                hits += result is not None and (label == "unrelated" or result[0] == str(i))
+            times.sort()
+            print(f"{label:>15}: p50 {times[len(times) // 2] * 1000:.2f} ms, "
+                  f"p95 {times[int(len(times) * 0.95)] * 1000:.2f} ms, "
+                  f"{'recall' if label == 'near-duplicate' else 'false positives'} {hits / queries:.1%}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--bench", action="store_true")
+    cli.add_argument("--n", type=int, default=100_000)
+    cli.add_argument("--queries", type=int, default=1000)
+    args = cli.parse_args()
+    if args.bench:
+        benchmark(args.n, args.queries)
+    else:
+        cli.print_help()
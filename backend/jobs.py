@@ -0,0 +1,235 @@
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+# ---------------- CONFIG ----------------
+JOBS_DB = Path("jobs.sqlite3")
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 20
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner_dead(owner: str, host: str) -> bool:
+    """
+    True if the process that owns a job is known to be gone. Owners are
+    "host:pid:instance"; jobs owned on other hosts are left alone. A live
+    pid equal to ours means a previous instance that happened to get the
+    same pid (common in containers), so its jobs are dead too.
+    """
+    if not owner:
+        return True                      # rows from before the owner column
+    try:
+        owner_host, pid, _ = owner.rsplit(":", 2)
+        pid = int(pid)
+    except ValueError:
+        return True
+    if owner_host != host:
+        return False
+    return pid == os.getpid() or not _pid_alive(pid)
+
+
+class QueueFull(Exception):
+    """Raised when submit() would exceed the pending-job limit."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancel() has been requested."""
+
+
+# ---------------- JOB CONTEXT ----------------
+class Job:
+    """
+    Handed to every job function. Use `with job.stage("name"):` around each
+    step so per-stage timings are recorded and cancellation is honoured
+    between steps.
+    """
+
+    def __init__(self, job_id=None, on_update=None):
+        self.id = job_id
+        self.stages = {}
+        self._cancel = threading.Event()
+        self._on_update = on_update
+        self.on_discard = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.id)
+
+    @contextmanager
+    def stage(self, name: str):
+        self.check_cancelled()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - start, 4)
+            if self._on_update:
+                self._on_update(self)
+
+
+# ---------------- QUEUE ----------------
+class JobQueue:
+    """
+    Bounded background job queue with a small worker pool.
+
+    Job state lives in SQLite so results survive a restart. Each job row
+    records the process that owns it; on startup, queued or running jobs
+    whose owner process is gone are marked failed, since their callables
+    cannot be restored. Jobs of other live processes sharing the database
+    are left alone.
+    """
+
+    def __init__(self, db_path: Path = JOBS_DB, workers: int = DEFAULT_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.db_path = Path(db_path)
+        self.max_pending = max_pending
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue = queue.Queue()
+        self._active = {}           # job_id -> Job, for queued/running jobs
+        self._lock = threading.Lock()
+        self._init_db()
+        for _ in range(workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    # ----- storage -----
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL,
+                    stages TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT
+                )
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall()
+            dead = [(FAILED, "Interrupted by server restart", time.time(), row["id"])
+                    for row in rows if _owner_dead(row["owner"], self.host)]
+            conn.executemany("UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?", dead)
+
+    def _update(self, job_id, **fields):
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def _save_stages(self, job: Job):
+        self._update(job.id, stages=json.dumps(job.stages))
+
+    # ----- public API -----
+    def submit(self, kind: str, fn, *args, on_discard=None, **kwargs) -> str:
+        """
+        Queue fn(job, *args, **kwargs) and return its job ID. on_discard() is
+        called if the job is cancelled before it starts, so resources handed
+        to fn (e.g. temp files) are released even though fn never runs.
+        """
+        with self._lock:
+            if len(self._active) >= self.max_pending:
+                raise QueueFull(f"Job queue is full ({self.max_pending} pending)")
+            job = Job(uuid.uuid4().hex, on_update=self._save_stages)
+            self._active[job.id] = job
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, created, owner) VALUES (?, ?, ?, ?, ?)",
+                (job.id, kind, QUEUED, time.time(), self.owner),
+            )
+        job.on_discard = on_discard
+        self._queue.put((job, fn, args, kwargs))
+        return job.id
+
+    def get(self, job_id: str):
+        """Return the job record as a dict, or None if unknown."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["stages"] = json.loads(job["stages"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation. Returns False if the job already finished."""
+        with self._lock:
+            job = self._active.get(job_id)
+        if job is None:
+            return False
+        job._cancel.set()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+        return True
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    # ----- workers -----
+    def _worker(self):
+        while True:
+            job, fn, args, kwargs = self._queue.get()
+            try:
+                self._run(job, fn, args, kwargs)
+            finally:
+                with self._lock:
+                    self._active.pop(job.id, None)
+                self._queue.task_done()
+
+    def _run(self, job: Job, fn, args, kwargs):
+        if job.cancelled:
+            # cancelled while still queued; row already updated
+            if job.on_discard:
+                job.on_discard()
+            return
+        self._update(job.id, status=RUNNING, started=time.time())
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            self._update(job.id, status=CANCELLED, finished=time.time(),
+                         stages=json.dumps(job.stages))
+        except Exception as e:
+            self._update(job.id, status=FAILED, error=str(e), finished=time.time(),
+                         stages=json.dumps(job.stages))
+        else:
+            self._update(job.id, status=DONE, finished=time.time(),
+                         stages=json.dumps(job.stages),
+                         result=json.dumps(result, ensure_ascii=False))
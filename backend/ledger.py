@@ -0,0 +1,333 @@
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from metrics import timed
+
+# ---------------- CONFIG ----------------
+LEDGER_DB = Path("applications.sqlite3")
+EXCEL_HEADER = ["Date", "Company", "Role", "Status"]
+DATE_FORMAT = "%d %b %Y"
+QUERY_DATE_FORMAT = "%Y-%m-%d"          # date_from / date_to filters
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Allowed status changes; "Applied" is the starting status
+TRANSITIONS = {
+    "Applied": ("Interview", "Rejected"),
+    "Interview": ("Offer", "Rejected"),
+    "Offer": (),
+    "Rejected": (),
+}
+STATUSES = tuple(TRANSITIONS)
+COLUMNS = "id, date, company, role, status, created, updated"
+
+
+def name_key(text: str) -> str:
+    """Match key for company/role: case, underscores and extra spaces ignored."""
+    return re.sub(r"\s+", " ", str(text or "").replace("_", " ")).strip().lower()
+
+
+def parse_date(text: str, fmt: str = DATE_FORMAT) -> float:
+    """Epoch seconds at the start of the given day, or 0 if it does not parse."""
+    try:
+        return datetime.datetime.strptime(str(text).strip(), fmt).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class ApplicationLedger:
+    """
+    Record of job applications in SQLite, one row per company + role.
+
+    This is the source of truth; the Excel tracker is a materialized export
+    rebuilt from it (write-only mode) only when rows changed since the
+    last export. Status changes update the row in place. Queries go through
+    indexes on the normalized company/role keys, status and creation time,
+    and page by id (keyset), so they cost the same at any history size.
+    """
+
+    def __init__(self, db_path: Path = LEDGER_DB):
+        self.db_path = Path(db_path)
+        self._export_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS applications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    status TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('revision', '0')")
+            self._migrate(conn)
+
+    def _migrate(self, conn):
+        """Add the query columns and indexes to ledgers created before them."""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(applications)")}
+        for name, decl in (("company_key", "TEXT"), ("role_key", "TEXT"),
+                           ("created", "REAL"), ("updated", "REAL")):
+            if name not in columns:
+                conn.execute(f"ALTER TABLE applications ADD COLUMN {name} {decl}")
+        rows = conn.execute("SELECT id, date, company, role FROM applications WHERE company_key IS NULL").fetchall()
+        conn.executemany(
+            "UPDATE applications SET company_key = ?, role_key = ?, created = ?, updated = ? WHERE id = ?",
+            [(name_key(r["company"]), name_key(r["role"]), parse_date(r["date"]), parse_date(r["date"]), r["id"])
+             for r in rows],
+        )
+        # Secondary indexes carry the rowid, so "key = ? ORDER BY id" pages off the index
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_company ON applications (company_key, role_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_role ON applications (role_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_status ON applications (status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_created ON applications (created)")
+
+    @contextmanager
+    def _connect(self):
+        """Connection for one transaction: commits (or rolls back), then closes."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _meta(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def _bump_revision(self, conn):
+        # Every write bumps the revision so export_excel() knows the file is stale.
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'")
+
+    def _insert(self, conn, company: str, role: str, status: str, date: str = None) -> int:
+        now = time.time()
+        date = date or datetime.datetime.now().strftime(DATE_FORMAT)
+        cur = conn.execute(
+            "INSERT INTO applications (date, company, role, status, company_key, role_key, created, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (date, company, role, status, name_key(company), name_key(role), now, now),
+        )
+        self._bump_revision(conn)
+        return cur.lastrowid
+
+    @timed("tracker_write")
+    def append(self, company: str, role: str, status: str = "Applied", date: str = None) -> int:
+        """Record one application; returns its row id."""
+        with self._connect() as conn:
+            return self._insert(conn, company, role, status, date)
+
+    @timed("tracker_write")
+    def record(self, company: str, role: str) -> tuple:
+        """
+        Log an application unless this company + role is already tracked.
+        Returns (row, created); an existing row keeps its status.
+        """
+        with self._connect() as conn:
+            # Take the write lock before the lookup so concurrent calls (threads
+            # or processes) cannot both miss and insert the same application
+            conn.execute("BEGIN IMMEDIATE")
+            row = self._find(conn, company, role)
+            if row is not None:
+                return dict(row), False
+            app_id = self._insert(conn, company, role, "Applied")
+        return self.get(app_id), True
+
+    def _find(self, conn, company: str, role: str):
+        return conn.execute(
+            f"SELECT {COLUMNS} FROM applications WHERE company_key = ? AND role_key = ? ORDER BY id DESC LIMIT 1",
+            (name_key(company), name_key(role)),
+        ).fetchone()
+
+    def find_duplicate(self, company: str, role: str):
+        """The latest application to the same company and role, or None."""
+        if not name_key(company) or not name_key(role):
+            return None
+        with self._connect() as conn:
+            row = self._find(conn, company, role)
+        return dict(row) if row else None
+
+    def get(self, app_id: int):
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {COLUMNS} FROM applications WHERE id = ?", (app_id,)).fetchone()
+        return dict(row) if row else None
+
+    @timed("tracker_write")
+    def update_status(self, app_id: int, status: str) -> dict:
+        """
+        Move an application to a new status in place. Raises KeyError for an
+        unknown id and ValueError for a transition TRANSITIONS does not allow.
+        """
+        if status not in TRANSITIONS:
+            raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+        with self._connect() as conn:
+            row = conn.execute("SELECT status FROM applications WHERE id = ?", (app_id,)).fetchone()
+            if row is None:
+                raise KeyError(app_id)
+            current = row["status"]
+            if status != current:
+                if status not in TRANSITIONS.get(current, STATUSES):
+                    raise ValueError(f"cannot move from {current} to {status}")
+                conn.execute("UPDATE applications SET status = ?, updated = ? WHERE id = ?",
+                             (status, time.time(), app_id))
+                self._bump_revision(conn)
+        return self.get(app_id)
+
+    def query(self, company: str = None, role: str = None, status: str = None,
+              date_from: str = None, date_to: str = None, limit: int = DEFAULT_PAGE_SIZE,
+              cursor: int = None) -> dict:
+        """
+        Newest-first page of applications matching the filters. company/role
+        match on the normalized name, dates are YYYY-MM-DD (inclusive).
+        Pass the returned next_cursor to get the following page.
+        """
+        where, params = [], []
+        if company:
+            where.append("company_key = ?")
+            params.append(name_key(company))
+        if role:
+            where.append("role_key = ?")
+            params.append(name_key(role))
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        for value, op, shift in ((date_from, ">=", 0), (date_to, "<", 86400)):
+            if value:
+                day = parse_date(value, QUERY_DATE_FORMAT)
+                if not day:
+                    raise ValueError("date_from / date_to must be YYYY-MM-DD")
+                where.append(f"created {op} ?")
+                params.append(day + shift)
+        if cursor is not None:
+            where.append("id < ?")
+            params.append(cursor)
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql = f"SELECT {COLUMNS} FROM applications"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = [dict(r) for r in conn.execute(sql, params + [limit + 1])]
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {"applications": rows, "next_cursor": rows[-1]["id"] if more else None}
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+
+    def import_excel(self, excel_path: Path) -> int:
+        """One-time migration of an existing tracker into an empty ledger."""
+        excel_path = Path(excel_path)
+        if not excel_path.exists() or self.count():
+            return 0
+        import openpyxl
+        wb = openpyxl.load_workbook(excel_path, read_only=True)
+        rows = [
+            tuple("" if v is None else str(v) for v in row[:4])
+            for row in wb.active.iter_rows(min_row=2, values_only=True)
+            if row and any(row)
+        ]
+        wb.close()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO applications (date, company, role, status, company_key, role_key, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*row, name_key(row[1]), name_key(row[2]), parse_date(row[0]), parse_date(row[0])) for row in rows],
+            )
+            self._bump_revision(conn)
+            # The tracker already holds these rows; no need to rewrite it.
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('exported_revision', ?)",
+                         (self._meta(conn, "revision"),))
+        return len(rows)
+
+    @timed("tracker_export")
+    def export_excel(self, excel_path: Path, force: bool = False) -> bool:
+        """
+        Regenerate the .xlsx tracker if the ledger changed since the last
+        export. Returns True if the file was rewritten.
+        """
+        excel_path = Path(excel_path)
+        with self._export_lock, self._connect() as conn:
+            revision = self._meta(conn, "revision")
+            if not force and excel_path.exists() and self._meta(conn, "exported_revision") == revision:
+                return False
+
+            import openpyxl
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("Applications")
+            ws.append(EXCEL_HEADER)
+            for row in conn.execute("SELECT date, company, role, status FROM applications ORDER BY id"):
+                ws.append(list(row))
+
+            fd, temp_filename = tempfile.mkstemp(suffix=".xlsx", dir=excel_path.parent)
+            os.close(fd)
+            wb.save(temp_filename)
+            os.replace(temp_filename, excel_path)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('exported_revision', ?)", (revision,))
+        return True
+
+
+# ---------------- BENCHMARK ----------------
+def benchmark(n: int, runs: int = 200):
+    """Median query latency over a synthetic ledger of n applications."""
+    import random
+    import shutil
+    rng = random.Random(0)
+    tmp = Path(tempfile.mkdtemp(prefix="ledger_bench_"))
+    try:
+        ledger = ApplicationLedger(tmp / "bench.sqlite3")
+        start_day = time.time() - 3 * 365 * 86400
+        rows = []
+        for i in range(n):
+            created = start_day + i * (3 * 365 * 86400 / n)
+            company, role = f"Company_{rng.randrange(n // 5 + 1)}", f"Role_{rng.randrange(200)}"
+            rows.append((datetime.datetime.fromtimestamp(created).strftime(DATE_FORMAT), company, role,
+                         rng.choice(STATUSES), name_key(company), name_key(role), created, created))
+        with ledger._connect() as conn:
+            conn.executemany(
+                "INSERT INTO applications (date, company, role, status, company_key, role_key, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        last_month = datetime.datetime.fromtimestamp(time.time() - 30 * 86400).strftime(QUERY_DATE_FORMAT)
+        page = ledger.query(limit=50)
+        cases = {
+            "latest page": lambda: ledger.query(),
+            "next page": lambda: ledger.query(cursor=page["next_cursor"]),
+            "by company": lambda: ledger.query(company="company 7"),
+            "by status": lambda: ledger.query(status="Interview"),
+            "last 30 days": lambda: ledger.query(date_from=last_month),
+            "duplicate check": lambda: ledger.find_duplicate("Company_7", "Role_3"),
+        }
+        print(f"{n} applications:")
+        for label, fn in cases.items():
+            times = []
+            for _ in range(runs):
+                t = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - t)
+            times.sort()
+            print(f"  {label:>16}: {times[len(times) // 2] * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Application ledger tools.")
+    cli.add_argument("--bench", action="store_true", help="time /applications queries")
+    cli.add_argument("--n", type=int, nargs="+", default=[1_000, 100_000])
+    args = cli.parse_args()
+    if args.bench:
+        for n in args.n:
+            benchmark(n)
+    else:
+        cli.print_help()
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# ---------------- CONFIG ----------------
+LIBRARY_DIR = Path("resume_library")
+
+
+class ResumeLibrary:
+    """
+    Parsed resumes kept by the SHA-256 of the uploaded file, so a known
+    resume can be re-activated without extracting or parsing it again.
+    Unlike the caches, nothing here is evicted automatically.
+    """
+
+    def __init__(self, root: Path = LIBRARY_DIR):
+        self.dir = Path(root)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.dir / "index.json"
+        self._lock = threading.Lock()
+
+    def _read_index(self) -> dict:
+        if not self._index_path.exists():
+            return {}
+        return json.loads(self._index_path.read_text(encoding="utf-8"))
+
+    def _write_index(self, index: dict):
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._index_path)
+
+    def add(self, file_hash: str, filename: str, parsed: dict):
+        (self.dir / f"{file_hash}.json").write_text(
+            json.dumps(parsed, indent=2, ensure_ascii=False), encoding="utf-8")
+        with self._lock:
+            index = self._read_index()
+            index[file_hash] = {
+                "hash": file_hash,
+                "filename": filename,
+                "name": parsed.get("Details", {}).get("Name", ""),
+                "added": index.get(file_hash, {}).get("added", time.time()),
+                "last_used": time.time(),
+            }
+            self._write_index(index)
+
+    def get(self, file_hash: str):
+        """Parsed resume JSON for a hash, or None."""
+        path = self.dir / f"{file_hash}.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def touch(self, file_hash: str):
+        with self._lock:
+            index = self._read_index()
+            if file_hash in index:
+                index[file_hash]["last_used"] = time.time()
+                self._write_index(index)
+
+    def list(self) -> list:
+        entries = self._read_index().values()
+        return sorted(entries, key=lambda e: e["last_used"], reverse=True)
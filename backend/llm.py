@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+import metrics
+from scheduler import Scheduler
+
+# ---------------- CONFIG ----------------
+MODEL_NAME = "gemini-1.5-flash"   # use flash (higher free quota)
+API_KEY = os.environ.get("GEMINI_API_KEY", "Gemini_API_KEY")   # replace with your key
+# gemini | record | replay  (record = call Gemini and save every response)
+BACKEND = os.environ.get("LLM_BACKEND", "gemini")
+RECORDINGS_FILE = Path(os.environ.get("LLM_RECORDINGS", "llm_recordings.jsonl"))
+STREAM_CHUNK_CHARS = 40           # replay/fake streaming chunk size
+
+
+class SimulatedError(Exception):
+    """Raised by ReplayProvider to mimic quota/transport failures."""
+
+
+class TextResponse:
+    """Minimal stand-in for a Gemini response: just `.text`."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+# ---------------- PROVIDERS ----------------
+# Every provider exposes generate_content(prompt, stream=False, json_mode=False)
+# like genai.GenerativeModel: a response with .text, or an iterator of chunks
+# with .text when stream=True. json_mode asks for structured JSON output where
+# the backend supports it; the others ignore it.
+
+class GeminiProvider:
+    def __init__(self, model_name: str = MODEL_NAME, api_key: str = API_KEY):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, prompt, stream: bool = False, json_mode: bool = False):
+        config = {"response_mime_type": "application/json"} if json_mode else None
+        return self._model.generate_content(prompt, stream=stream, generation_config=config)
+
+
+class RecordingProvider:
+    """Wraps another provider and appends every prompt/response to a JSONL file."""
+
+    def __init__(self, inner, path: Path = RECORDINGS_FILE):
+        self.inner = inner
+        self.name = inner.name
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _record(self, prompt, text, latency):
+        line = json.dumps({"key": prompt_key(prompt), "prompt_chars": len(prompt),
+                           "latency": round(latency, 4), "text": text}, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def generate_content(self, prompt, stream: bool = False, json_mode: bool = False):
+        start = time.perf_counter()
+        if not stream:
+            response = self.inner.generate_content(prompt, json_mode=json_mode)
+            self._record(prompt, response.text, time.perf_counter() - start)
+            return response
+        return self._stream(prompt, start)
+
+    def _stream(self, prompt, start):
+        parts = []
+        for chunk in self.inner.generate_content(prompt, stream=True):
+            parts.append(getattr(chunk, "text", ""))
+            yield chunk
+        self._record(prompt, "".join(parts), time.perf_counter() - start)
+
+
+class ReplayProvider:
+    """
+    Offline stand-in that replays recorded responses.
+
+    Lookup is by exact prompt hash. With strict=False an unknown prompt gets
+    a recording picked deterministically from the prompt hash, so load tests
+    still run when prompts drift slightly. Latency is the recorded latency
+    unless `latency` is given; `jitter` adds up to that many seconds, and
+    `error_rate` makes that fraction of calls raise SimulatedError. All
+    randomness comes from a seeded RNG, so runs are reproducible.
+    """
+
+    def __init__(self, path: Path = RECORDINGS_FILE, latency: float = None, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0, strict: bool = False):
+        self.name = f"replay:{MODEL_NAME}"
+        self.recordings = {}
+        path = Path(path)
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    rec = json.loads(line)
+                    self.recordings[rec["key"]] = rec
+        self._keys = sorted(self.recordings)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _lookup(self, prompt):
+        key = prompt_key(prompt)
+        rec = self.recordings.get(key)
+        if rec is None:
+            if self.strict or not self._keys:
+                raise KeyError(f"No recorded response for prompt {key[:12]}")
+            rec = self.recordings[self._keys[int(key, 16) % len(self._keys)]]
+        return rec
+
+    def _delay_and_fail(self, rec):
+        with self._lock:
+            self.calls += 1
+            delay = (rec.get("latency", 0.0) if self.latency is None else self.latency)
+            delay += self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+        return delay, fail
+
+    def generate_content(self, prompt, stream: bool = False, json_mode: bool = False):
+        rec = self._lookup(prompt)
+        delay, fail = self._delay_and_fail(rec)
+        if not stream:
+            time.sleep(delay)
+            if fail:
+                raise SimulatedError("429 Resource has been exhausted (simulated)")
+            return TextResponse(rec["text"])
+        return self._stream(rec["text"], delay, fail)
+
+    def _stream(self, text, delay, fail):
+        chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+        per_chunk = delay / len(chunks)
+        for i, chunk in enumerate(chunks):
+            time.sleep(per_chunk)
+            if fail and i == len(chunks) // 2:
+                raise SimulatedError("stream interrupted (simulated)")
+            yield TextResponse(chunk)
+
+
+class FakeStreamingModel:
+    """
+    Test double that always returns one canned reply.
+
+    generate_content(prompt) returns the whole reply; with stream=True it
+    yields the reply in `chunk_size`-character chunks, sleeping `interval`
+    seconds before each one. `cancelled` is set if the consumer stops early.
+    """
+
+    def __init__(self, reply: str = "This is a streamed answer.", chunk_size: int = 8,
+                 interval: float = 0.05, first_token_delay: float = None):
+        self.name = "fake"
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.first_token_delay = interval if first_token_delay is None else first_token_delay
+        self.prompts = []
+        self.cancelled = False
+
+    def generate_content(self, prompt, stream: bool = False, json_mode: bool = False):
+        self.prompts.append(prompt)
+        if not stream:
+            time.sleep(self.first_token_delay + self.interval * (len(self._chunks()) - 1))
+            return TextResponse(self.reply)
+        return self._stream()
+
+    def _chunks(self):
+        return [self.reply[i:i + self.chunk_size]
+                for i in range(0, len(self.reply), self.chunk_size)] or [""]
+
+    def _stream(self):
+        try:
+            for i, chunk in enumerate(self._chunks()):
+                time.sleep(self.first_token_delay if i == 0 else self.interval)
+                yield TextResponse(chunk)
+        except GeneratorExit:
+            self.cancelled = True
+            raise
+
+
+class ThrottlingModel:
+    """
+    Test double with its own quota, like the Gemini free tier: more than
+    `rpm` calls in any `period`-second window raise a 429 SimulatedError.
+    """
+
+    def __init__(self, rpm: int = 15, period: float = 60.0, latency: float = 0.0,
+                 reply: str = '{"ok": true}'):
+        self.name = "throttling-fake"
+        self.rpm = rpm
+        self.period = period
+        self.latency = latency
+        self.reply = reply
+        self._calls = []
+        self._lock = threading.Lock()
+        self.served = 0
+        self.rejected = 0
+
+    def generate_content(self, prompt, stream: bool = False, json_mode: bool = False):
+        with self._lock:
+            now = time.monotonic()
+            self._calls = [t for t in self._calls if now - t < self.period]
+            if len(self._calls) >= self.rpm:
+                self.rejected += 1
+                raise SimulatedError("429 Resource has been exhausted (simulated quota)")
+            self._calls.append(now)
+            self.served += 1
+        time.sleep(self.latency)
+        return iter([TextResponse(self.reply)]) if stream else TextResponse(self.reply)
+
+
+def cancel_stream(stream):
+    """Best effort: stop the model from generating further tokens."""
+    for target in (stream, getattr(stream, "_iterator", None)):
+        for name in ("cancel", "close"):
+            fn = getattr(target, name, None)
+            if callable(fn):
+                try:
+                    fn()
+                except Exception:
+                    pass
+                return
+
+
+class InstrumentedProvider:
+    """
+    Wraps the shared provider and records model latency, prompt/response
+    sizes and call outcomes in metrics. Other attributes pass through.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def _done(self, prompt, text, start, status):
+        metrics.observe_stage("model", time.perf_counter() - start)
+        metrics.MODEL_CALLS.inc(status=status)
+        metrics.PROMPT_CHARS.observe(len(prompt))
+        if text is not None:
+            metrics.RESPONSE_CHARS.observe(len(text))
+
+    def generate_content(self, prompt, stream: bool = False, json_mode: bool = False):
+        start = time.perf_counter()
+        if stream:
+            return self._stream(prompt, start)
+        try:
+            response = self.inner.generate_content(prompt, json_mode=json_mode)
+        except Exception:
+            self._done(prompt, None, start, "error")
+            raise
+        self._done(prompt, getattr(response, "text", ""), start, "ok")
+        return response
+
+    def _stream(self, prompt, start):
+        parts = []
+        status = "cancelled"
+        stream = None
+        try:
+            stream = self.inner.generate_content(prompt, stream=True)
+            for chunk in stream:
+                parts.append(getattr(chunk, "text", ""))
+                yield chunk
+            status = "ok"
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            if status == "cancelled" and stream is not None:
+                cancel_stream(stream)
+            self._done(prompt, "".join(parts), start, status)
+
+
+# ---------------- SHARED CLIENT ----------------
+_model = None
+_model_lock = threading.Lock()
+
+
+def _build_default():
+    if BACKEND == "replay":
+        return ReplayProvider()
+    if BACKEND == "record":
+        return RecordingProvider(GeminiProvider())
+    return GeminiProvider()
+
+
+def get_model():
+    """
+    The shared model client used by every call site (created on first use).
+    Calls go through the quota scheduler, then metrics, then the provider.
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            # Replayed responses cost no quota
+            limits = {"rpm": 0, "tpm": 0} if BACKEND == "replay" else {}
+            _model = Scheduler(InstrumentedProvider(_build_default()), **limits)
+        return _model
+
+
+def set_model(provider, **limits):
+    """Swap the shared client, e.g. for a ReplayProvider in benchmarks. limits go to Scheduler."""
+    global _model
+    with _model_lock:
+        _model = Scheduler(InstrumentedProvider(provider), **limits)
+
+
+def model_id() -> str:
+    """Identifies the backend in cache keys, so replayed output never hits real entries."""
+    return getattr(get_model(), "name", MODEL_NAME)
@@ -0,0 +1,73 @@
+"""
+Offline load test of the Flask pipeline against recorded model responses.
+
+Record once with the real model:
+    LLM_BACKEND=record python app.py      # then use the extension as usual
+Replay deterministically (no network):
+    python loadtest.py --endpoint tailor --requests 200 --concurrency 8 --latency 0.8 --error-rate 0.05
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import llm
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--endpoint", choices=["tailor", "match_score", "chat"], default="tailor")
+    cli.add_argument("--requests", type=int, default=100)
+    cli.add_argument("--concurrency", type=int, default=4)
+    cli.add_argument("--recordings", default=str(llm.RECORDINGS_FILE))
+    cli.add_argument("--latency", type=float, default=None, help="fixed model latency (default: recorded)")
+    cli.add_argument("--jitter", type=float, default=0.0)
+    cli.add_argument("--error-rate", type=float, default=0.0)
+    cli.add_argument("--seed", type=int, default=0)
+    cli.add_argument("--jd", default="jd.txt", help="job description used in requests")
+    args = cli.parse_args()
+
+    if not Path(args.recordings).exists():
+        raise SystemExit(f"❌ {args.recordings} not found. Record responses first with LLM_BACKEND=record.")
+    replay = llm.ReplayProvider(args.recordings, latency=args.latency, jitter=args.jitter,
+                                error_rate=args.error_rate, seed=args.seed)
+    # No quota limits or retries: measure the server, not the scheduler
+    llm.set_model(replay, rpm=0, tpm=0, max_retries=0)
+
+    import app   # after set_model so nothing touches the real API
+    client = app.app.test_client()
+    jd_text = Path(args.jd).read_text(encoding="utf-8") if Path(args.jd).exists() else "Python developer"
+
+    def one(i):
+        payload = {
+            "tailor": {"jd_text": jd_text, "no_cache": True},
+            "match_score": {"jd_text": jd_text},
+            "chat": {"question": "How many years of Python experience do you have?"},
+        }[args.endpoint]
+        start = time.perf_counter()
+        resp = client.post(f"/{args.endpoint}", json=payload)
+        return time.perf_counter() - start, resp.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [t for t, _ in results]
+    errors = sum(1 for _, status in results if status >= 400)
+    print(f"{args.endpoint}: {args.requests} requests, concurrency {args.concurrency}, "
+          f"{len(replay.recordings)} recordings")
+    print(f"  throughput {args.requests / elapsed:.1f} req/s, errors {errors}")
+    print(f"  latency p50 {percentile(latencies, 50) * 1000:.0f} ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import ContextDecorator
+
+# ---------------- CONFIG ----------------
+# Histogram buckets in seconds: fast local work up to slow LLM / soffice calls
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+
+_lock = threading.Lock()
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+def _label_str(labels: dict) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_label_str(dict(key))} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}     # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            series = self.series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, series in sorted(self.series.items()):
+            labels = dict(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_label_str({**labels, 'le': bound})} {cumulative}"
+            yield f"{self.name}_bucket{_label_str({**labels, 'le': '+Inf'})} {series[-1]}"
+            yield f"{self.name}_sum{_label_str(labels)} {series[-2]}"
+            yield f"{self.name}_count{_label_str(labels)} {series[-1]}"
+
+
+# ---------------- METRICS ----------------
+STAGE_SECONDS = Histogram("resume_tailor_stage_seconds",
+                          "Time spent per pipeline stage (text_extraction, prompt_build, model, ...)")
+REQUEST_SECONDS = Histogram("resume_tailor_request_seconds", "HTTP request latency by endpoint")
+PROMPT_CHARS = Histogram("resume_tailor_prompt_chars", "Prompt size sent to the model", SIZE_BUCKETS)
+RESPONSE_CHARS = Histogram("resume_tailor_response_chars", "Model response size", SIZE_BUCKETS)
+MODEL_CALLS = Counter("resume_tailor_model_calls_total", "Model calls by outcome")
+CACHE_LOOKUPS = Counter("resume_tailor_cache_lookups_total", "Cache lookups by cache and result")
+SLOW_REQUESTS = Counter("resume_tailor_slow_requests_total", "Requests slower than the slow-request threshold")
+LLM_OUTPUT = Counter("resume_tailor_llm_output_total", "Model JSON outputs: clean, repaired, fragment_request, full_retry, failed")
+JSON_REPAIRS = Counter("resume_tailor_json_repairs_total", "Local JSON repairs by kind")
+SCHEDULER_WAIT = Histogram("resume_tailor_scheduler_wait_seconds", "Time model calls waited for quota, by priority")
+MODEL_RETRIES = Counter("resume_tailor_model_retries_total", "Model calls retried after a quota error, by priority")
+
+ALL = (STAGE_SECONDS, REQUEST_SECONDS, PROMPT_CHARS, RESPONSE_CHARS, MODEL_CALLS, CACHE_LOOKUPS, SLOW_REQUESTS,
+       LLM_OUTPUT, JSON_REPAIRS, SCHEDULER_WAIT, MODEL_RETRIES)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage duration globally and on the current request, if any."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((stage, seconds))
+
+
+class timed(ContextDecorator):
+    """Context manager / decorator: `with timed("docx_render"):` or `@timed("docx_render")`."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe_stage(self.stage, time.perf_counter() - self._start)
+        return False
+
+
+# ---------------- PER-REQUEST ----------------
+def start_request():
+    """Begin collecting stages for the current request; returns a reset token."""
+    return _request_stages.set([])
+
+
+def finish_request(token):
+    """Stop collecting and return [(stage, seconds), ...] for this request."""
+    stages = _request_stages.get() or []
+    _request_stages.reset(token)
+    return stages
+
+
+def server_timing(stages, total: float) -> str:
+    """Server-Timing header value (shown in browser devtools)."""
+    merged = {}
+    for stage, seconds in stages:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        lines = [line for metric in ALL for line in metric.render()]
+    return "\n".join(lines) + "\n"
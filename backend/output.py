@@ -0,0 +1,407 @@
+import json
+import re
+import threading
+
+import metrics
+from metrics import timed
+from llm import get_model
+from prompts import CHARS_PER_TOKEN
+
+# ---------------- CONFIG ----------------
+FRAGMENT_RETRIES = 2      # re-requests per invalid fragment before giving up
+MAX_FRAGMENTS = 4         # more broken fragments than this -> one full retry instead
+MAX_CUTS = 50             # truncated output: how many commas back we try cutting at
+
+# Type schemas: str / int leaves, [item] lists, {key: schema} objects.
+# Extra keys (e.g. Education "GPA") are allowed and left alone.
+RESUME_SCHEMA = {
+    "Details": {"Name": str, "Email": str, "Phone": str, "Location": str, "LinkedIn": str, "GitHub": str},
+    "Summary": str,
+    "Skills": [str],
+    "Work Experience": [{"Company Name": str, "Role": str, "Bullet Points": [str], "Date": str}],
+    "Project Experience": [{"Title": str, "Bullet Points": [str], "Tech Stack": str}],
+    "Education": [{"Institution": str, "Degree": str, "Date": str}],
+    "Achievements and Certifications": [str],
+}
+MATCH_SCHEMA = {"score": int, "reason": str}
+
+# "• text", "- text", "* text", "1. text" at the start of a bullet; only stripped
+# from these lists, since in others ("- " in a skill, "1. " in a title) it is content
+BULLET_FIELDS = ("Bullet Points", "Achievements and Certifications")
+_BULLET_RE = re.compile(r"^\s*(?:[•●▪◦‣∙·]\s*|[-–—*]\s+|\d{1,2}[.)]\s+)")
+
+_totals = {"responses": 0, "clean": 0, "repaired": 0, "fragment_requests": 0, "fragments_fixed": 0,
+           "full_retries": 0, "failed": 0, "response_chars": 0, "retry_chars": 0, "saved_chars": 0}
+_repairs = {}
+_totals_lock = threading.Lock()
+
+
+class OutputError(ValueError):
+    """Model output could not be turned into valid JSON, even after repair and retries."""
+
+
+def _count(key, amount=1):
+    with _totals_lock:
+        _totals[key] += amount
+
+
+# ---------------- LOCAL REPAIR ----------------
+def _strip_fences(text: str) -> str:
+    # Only a fence opening/closing the whole response: ``` inside a string value
+    # is content, and a fence after leading text is handled as leading/trailing text.
+    if text.startswith("```"):
+        text = text[3:]
+        if text[:4].lower() == "json":
+            text = text[4:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text
+
+
+def _scan(text: str):
+    """
+    Walk the JSON text once, outside strings tracking the bracket stack.
+    Returns (body, rest, stack, in_string, commas, fixed_commas): body is
+    the first complete value (or everything, if it never closes), rest is
+    whatever follows it, and commas are (offset, stack) cut points.
+    """
+    out, stack, commas = [], [], []
+    in_str = esc = False
+    fixed_commas = 0
+    for i, ch in enumerate(text):
+        if in_str:
+            out.append(ch)
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch in "}]":
+            j = len(out) - 1
+            while j >= 0 and out[j].isspace():
+                j -= 1
+            if j >= 0 and out[j] == ",":     # {"a": 1,} -> {"a": 1}
+                del out[j]
+                if commas and commas[-1][0] == j:
+                    commas.pop()
+                fixed_commas += 1
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                return "".join(out), text[i + 1:], [], False, commas, fixed_commas
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch == ",":
+            commas.append((len(out), tuple(stack)))
+        out.append(ch)
+    return "".join(out), "", stack, in_str, commas, fixed_commas
+
+
+def _terminate(head: str, stack) -> str:
+    head = head.rstrip()
+    if head.endswith(","):
+        head = head[:-1]
+    elif head.endswith(":"):
+        head += " null"
+    return head + "".join("}" if b == "{" else "]" for b in reversed(stack))
+
+
+@timed("json_cleanup")
+def repair_json(text: str):
+    """
+    Parse model output, fixing what can be fixed locally: code fences,
+    text before/after the JSON, trailing commas and output cut off
+    mid-way (closed at the last complete value).
+
+    Returns (data, repairs, truncated). Raises OutputError if nothing
+    JSON-like can be recovered.
+    """
+    repairs = []
+    cleaned = text.strip()
+    unfenced = _strip_fences(cleaned)
+    if unfenced is not cleaned:
+        cleaned = unfenced.strip()
+    try:
+        return json.loads(cleaned), repairs, False
+    except json.JSONDecodeError:
+        pass
+
+    starts = [i for i in (cleaned.find("{"), cleaned.find("[")) if i != -1]
+    if not starts:
+        raise OutputError("Model response contained no JSON:\n" + text[:500])
+    if min(starts) > 0:
+        repairs.append("leading_text")
+    body, rest, stack, in_str, commas, fixed_commas = _scan(cleaned[min(starts):])
+    if rest.strip():
+        repairs.append("trailing_text")
+    if fixed_commas:
+        repairs.append("trailing_comma")
+
+    if not stack:
+        try:
+            return json.loads(body), repairs, False
+        except json.JSONDecodeError as e:
+            raise OutputError(f"Model response is not valid JSON ({e}):\n" + text[:500])
+
+    # Cut off mid-way: close what is open, else back up to an earlier comma
+    candidates = [_terminate(body + ('"' if in_str else ""), stack)]
+    candidates += [_terminate(body[:pos], snap) for pos, snap in reversed(commas[-MAX_CUTS:])]
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        return data, repairs + ["truncated"], True
+    raise OutputError("Model response was truncated and could not be closed:\n" + text[-500:])
+
+
+# ---------------- VALIDATION ----------------
+def _default(schema):
+    if isinstance(schema, list):
+        return []
+    if isinstance(schema, dict):
+        return {k: _default(v) for k, v in schema.items()}
+    return "" if schema is str else None
+
+
+def _check(value, schema, path, problems, repairs, required=True):
+    """Validate value against schema; returns the (possibly repaired) value."""
+    if schema is str:
+        if isinstance(value, str):
+            return value
+        if value is None:
+            return ""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            repairs.append("coerced_type")
+            return str(value)
+        problems.append((path, "expected a string"))
+        return value
+
+    if schema is int:
+        if isinstance(value, bool):
+            problems.append((path, "expected an integer"))
+        elif isinstance(value, int):
+            return value
+        elif isinstance(value, float):
+            repairs.append("coerced_type")
+            return round(value)
+        elif isinstance(value, str) and re.fullmatch(r"\s*\d{1,3}(\.\d+)?\s*%?\s*", value):
+            repairs.append("coerced_type")
+            return round(float(value.strip().rstrip("%")))
+        else:
+            problems.append((path, "expected an integer"))
+        return value
+
+    if isinstance(schema, list):
+        item_schema = schema[0]
+        if value is None:
+            return []
+        if isinstance(value, str) and item_schema is str:
+            repairs.append("split_list")
+            value = [v for v in value.split("\n" if "\n" in value else ",") if v.strip()]
+        if not isinstance(value, list):
+            problems.append((path, "expected a list"))
+            return value
+        result = []
+        bullets = item_schema is str and bool(path) and path[-1] in BULLET_FIELDS
+        for i, item in enumerate(value):
+            if item_schema is str and isinstance(item, str):
+                if bullets:
+                    stripped = _BULLET_RE.sub("", item, count=1)
+                    if stripped != item:
+                        repairs.append("bullet_symbol")
+                    item = stripped
+                item = item.strip()
+            result.append(_check(item, item_schema, path + (i,), problems, repairs))
+        return result
+
+    if not isinstance(value, dict):
+        problems.append((path, "expected an object"))
+        return value
+    for key, sub in schema.items():
+        if key in value:
+            value[key] = _check(value[key], sub, path + (key,), problems, repairs)
+        elif sub is int or (not required and path == ()):
+            problems.append((path + (key,), "missing"))
+        else:
+            repairs.append("missing_key")
+            value[key] = _default(sub)
+    return value
+
+
+def _last_path(data) -> tuple:
+    """
+    Top-level section the model was writing when it got cut off. A list is
+    re-requested whole: entries after the cut never arrived, so fixing only
+    the last one would silently drop them.
+    """
+    if not isinstance(data, dict) or not data:
+        return ()
+    return (list(data)[-1],)
+
+
+def validate(data, schema, truncated: bool = False):
+    """
+    Check data against schema, repairing small defects in place.
+    Returns (data, problems, repairs); problems are (path, message) pairs
+    of fragments that need the model again. For a truncated response the
+    section being written when it was cut off is always re-requested whole,
+    and missing top-level sections are treated as lost, not empty.
+    """
+    problems, repairs = [], []
+    data = _check(data, schema, (), problems, repairs, required=not truncated)
+    if truncated and isinstance(data, dict):
+        last = _last_path(data)
+        if last:
+            problems[:] = [(p, m) for p, m in problems if p[:len(last)] != last]
+            problems.append((last, "cut off"))
+    return data, problems, repairs
+
+
+def _schema_at(schema, path):
+    for part in path:
+        schema = schema[0] if isinstance(part, int) else schema[part]
+    return schema
+
+
+def _set(data, path, value):
+    if not path:
+        return value
+    target = data
+    for part in path[:-1]:
+        target = target[part]
+    if isinstance(path[-1], int) and path[-1] == len(target):
+        target.append(value)
+    else:
+        target[path[-1]] = value
+    return data
+
+
+def _path_str(path) -> str:
+    return "".join(f"[{p}]" if isinstance(p, int) else f'["{p}"]' for p in path) or "the whole response"
+
+
+def _shape(schema) -> str:
+    if schema is str:
+        return '""'
+    if schema is int:
+        return "0"
+    return json.dumps(_default(schema) if isinstance(schema, dict) else [_default(schema[0])])
+
+
+# ---------------- RETRIES ----------------
+def _request_fragment(prompt, schema, path, message, model):
+    sub_schema = _schema_at(schema, path)
+    fragment_prompt = f"""{prompt}
+
+    Your previous answer was invalid at {_path_str(path)} ({message}).
+    Return ONLY the JSON value for {_path_str(path)}, shaped like {_shape(sub_schema)}, and nothing else.
+    """
+    for _ in range(FRAGMENT_RETRIES):
+        _count("fragment_requests")
+        metrics.LLM_OUTPUT.inc(result="fragment_request")
+        text = model.generate_content(fragment_prompt, json_mode=True).text
+        _count("retry_chars", len(text))
+        try:
+            value, repairs, truncated = repair_json(text)
+        except OutputError:
+            continue
+        value, problems, more = validate(value, sub_schema, truncated)
+        _record_repairs(repairs + more)
+        if not problems:
+            _count("fragments_fixed")
+            return value, len(text)
+    raise OutputError(f"Model could not produce a valid {_path_str(path)} ({message})")
+
+
+def _record_repairs(repairs):
+    if not repairs:
+        return
+    with _totals_lock:
+        for kind in repairs:
+            _repairs[kind] = _repairs.get(kind, 0) + 1
+    for kind in set(repairs):
+        metrics.JSON_REPAIRS.inc(repairs.count(kind), kind=kind)
+
+
+def parse_output(text: str, prompt: str = None, schema=None, model=None):
+    """
+    Turn model output into validated JSON: repair locally first, then
+    re-request only the fragments that are still invalid (needs `prompt`),
+    falling back to one full retry when the whole response is unusable.
+    Raises OutputError when it cannot.
+    """
+    model = model or get_model()
+    _count("responses")
+    _count("response_chars", len(text))
+    try:
+        try:
+            data, repairs, truncated = repair_json(text)
+            problems = []
+            if schema is not None:
+                data, problems, more = validate(data, schema, truncated)
+                repairs += more
+        except OutputError as e:
+            data, repairs, problems = None, [], [((), str(e).splitlines()[0])]
+
+        _record_repairs(repairs)
+        fragments = list(dict.fromkeys(path[:2] for path, _ in problems))
+        if problems and prompt is None:
+            raise OutputError(f"Model response is invalid at {_path_str(problems[0][0])} ({problems[0][1]})")
+        if () in fragments or len(fragments) > MAX_FRAGMENTS:
+            _count("full_retries")
+            metrics.LLM_OUTPUT.inc(result="full_retry")
+            text = model.generate_content(prompt, json_mode=True).text
+            _count("retry_chars", len(text))
+            data, repairs, truncated = repair_json(text)
+            problems = []
+            if schema is not None:
+                data, problems, more = validate(data, schema, truncated)
+                repairs += more
+            _record_repairs(repairs)
+            if problems:
+                raise OutputError(f"Model response is invalid at {_path_str(problems[0][0])} ({problems[0][1]})")
+        else:
+            for path in fragments:
+                message = next(m for p, m in problems if p[:2] == path)
+                value, fragment_chars = _request_fragment(prompt, schema, path, message, model)
+                data = _set(data, path, value)
+                _count("saved_chars", max(0, len(text) - fragment_chars))
+    except OutputError:
+        _count("failed")
+        metrics.LLM_OUTPUT.inc(result="failed")
+        raise
+
+    if repairs or problems:
+        _count("repaired")
+        metrics.LLM_OUTPUT.inc(result="repaired")
+    else:
+        _count("clean")
+        metrics.LLM_OUTPUT.inc(result="clean")
+    return data
+
+
+def generate_json(prompt: str, schema=None, model=None):
+    """Ask the model for JSON (structured output where supported) and parse it with parse_output."""
+    model = model or get_model()
+    response = model.generate_content(prompt, json_mode=True)
+    return parse_output(response.text, prompt, schema, model)
+
+
+def stats() -> dict:
+    with _totals_lock:
+        totals = dict(_totals)
+        totals["repairs"] = dict(_repairs)
+    responses = totals["responses"] or 1
+    totals["repair_rate"] = round(totals["repaired"] / responses, 3)
+    totals["retry_rate"] = round((totals["fragment_requests"] + totals["full_retries"]) / responses, 3)
+    totals["retry_tokens"] = totals["retry_chars"] // CHARS_PER_TOKEN
+    # Tokens a full regeneration would have cost on top of the fragment retries
+    totals["tokens_saved"] = totals["saved_chars"] // CHARS_PER_TOKEN
+    return totals
@@ -1,66 +1,206 @@
-import google.generativeai as genai
+import argparse
 import json
 import os
-from docx import Document
-import PyPDF2
+import shutil
+import time
+
+from metrics import timed
+from output import RESUME_SCHEMA, generate_json, parse_output
+from workers import PROCESS_WORKERS, get_pool
 
 # ======================
 # CONFIG
 # ======================
-API_KEY = "Gemini_API_KEY"  # replace with your key
 RESUME_FILE = "SAI RAM BIKKI.docx"   # change to your resume file name
 OUTPUT_FILE = "resume_fixed.json"
 
-# ======================
-# GEMINI SETUP
-# ======================
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
+PARALLEL_MIN_PAGES = 8               # PDFs with at least this many pages use the process pool
+PAGES_PER_TASK = 4                   # pages extracted per worker task
 
 # ======================
 # FUNCTIONS
 # ======================
-def read_resume(file_path):
-    """Extracts text from DOCX or PDF resume."""
+def _pdf_pages(file_path, start, stop):
+    """Worker: text of pages [start, stop), each page extracted once."""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(file_path)
+    return [page.extract_text() or "" for page in reader.pages[start:stop]]
+
+
+def iter_pdf_text(file_path, parallel=None):
+    """
+    Yield the text of each non-empty PDF page in order. Large PDFs are
+    split into page ranges across a process pool (parallel=None decides by
+    page count); pages are yielded as soon as their range is done.
+    """
+    import PyPDF2
+    reader = PyPDF2.PdfReader(file_path)
+    count = len(reader.pages)
+    if parallel is None:
+        parallel = count >= PARALLEL_MIN_PAGES and PROCESS_WORKERS > 1
+    if not parallel:
+        for page in reader.pages:
+            text = page.extract_text()
+            if text:
+                yield text
+        return
+
+    pool = get_pool()
+    futures = [pool.submit(_pdf_pages, file_path, start, min(start + PAGES_PER_TASK, count))
+               for start in range(0, count, PAGES_PER_TASK)]
+    try:
+        for future in futures:
+            for text in future.result():
+                if text:
+                    yield text
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _cell_texts(table):
+    """Rows of a table as 'cell | cell' lines; merged cells are only counted once."""
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            text = cell.text.strip()
+            if text and (not cells or cells[-1] != text):
+                cells.append(text)
+        if cells:
+            yield " | ".join(cells)
+        for cell in row.cells:
+            for nested in cell.tables:
+                yield from _cell_texts(nested)
+
+
+def _block_texts(container):
+    """Paragraphs and tables of a body/header/footer in document order."""
+    from docx.table import Table
+    for block in container.iter_inner_content():
+        if isinstance(block, Table):
+            yield from _cell_texts(block)
+        elif block.text.strip():
+            yield block.text
+
+
+def iter_docx_text(file_path):
+    """
+    Yield DOCX text: headers, body paragraphs and tables in order, text
+    boxes, then footers. Headers/footers shared between sections are
+    only emitted once.
+    """
+    from docx import Document
+    from docx.oxml.ns import qn
+    doc = Document(file_path)
+    seen_parts = set()
+
+    def header_footer(kind):
+        for section in doc.sections:
+            for attr in (f"first_page_{kind}", kind, f"even_page_{kind}"):
+                part = getattr(section, attr)
+                if part.is_linked_to_previous or id(part.part) in seen_parts:
+                    continue
+                seen_parts.add(id(part.part))
+                yield from _block_texts(part)
+
+    yield from header_footer("header")
+    yield from _block_texts(doc)
+
+    # Text boxes (w:txbxContent) are invisible to paragraph.text; Word stores
+    # each one twice (DrawingML + VML fallback), so de-duplicate.
+    seen = set()
+    for p in doc.element.body.iter(qn("w:txbxContent")):
+        text = "\n".join("".join(t.text or "" for t in para.iter(qn("w:t")))
+                         for para in p.iter(qn("w:p"))).strip()
+        if text and text not in seen:
+            seen.add(text)
+            yield text
+
+    yield from header_footer("footer")
+
+
+def iter_resume_text(file_path):
+    """Stream resume text block by block (paragraphs, table rows, PDF pages)."""
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
-
-    text = ""
     if file_path.endswith(".docx"):
-        doc = Document(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
-    elif file_path.endswith(".pdf"):
-        with open(file_path, "rb") as pdf_file:
-            reader = PyPDF2.PdfReader(pdf_file)
-            text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-    else:
-        raise ValueError("Unsupported file format. Use .docx or .pdf")
-    return text
+        return iter_docx_text(file_path)
+    if file_path.endswith(".pdf"):
+        return iter_pdf_text(file_path)
+    raise ValueError("Unsupported file format. Use .docx or .pdf")
+
+
+@timed("text_extraction")
+def read_resume(file_path):
+    """Extracts text from DOCX or PDF resume."""
+    return "\n".join(iter_resume_text(file_path))
 
 
 def clean_gemini_output(output_text: str) -> str:
-    """Remove ```json fences and validate JSON."""
-    cleaned = output_text.strip()
+    """Repair and validate resume JSON from Gemini; raises OutputError instead of returning raw text."""
+    return json.dumps(parse_output(output_text, schema=RESUME_SCHEMA), indent=2)
 
-    # Remove triple backticks and "json"
-    if cleaned.startswith("```"):
-        cleaned = cleaned.strip("`")
-        if cleaned.lower().startswith("json"):
-            cleaned = cleaned[4:].strip()
 
-    # Validate JSON
-    try:
-        parsed = json.loads(cleaned)
-        return json.dumps(parsed, indent=2)
-    except json.JSONDecodeError:
-        print("⚠️ Warning: Gemini output was not valid JSON. Saving raw text.")
-        return cleaned
+def _sample_pdf(pages: int) -> str:
+    """Multi-page resume PDF for the benchmark, drawn with pdf_writer."""
+    import tempfile
+    import pdf_writer
+    entry = {"Company Name": "Company", "Role": "Engineer", "Date": "2020 - 2024",
+             "Bullet Points": ["Built and operated data pipelines in Python and SQL serving millions of "
+                               "requests per day while reducing infrastructure cost by thirty percent"] * 4}
+    data = {"Details": {"Name": "Benchmark Resume"}, "Summary": "Engineer.", "Work Experience": [entry] * (pages * 6)}
+    path = os.path.join(tempfile.mkdtemp(prefix="parser_bench_"), "sample.pdf")
+    pdf_writer.build_pdf(data, path)
+    return path
+
+
+def benchmark(pdf_path: str, runs: int = 5):
+    """Old double-extract loop vs single-pass sequential vs the process pool."""
+    import PyPDF2
+    def old(path):
+        with open(path, "rb") as pdf_file:
+            reader = PyPDF2.PdfReader(pdf_file)
+            return "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
+
+    modes = [
+        ("old (2x extract)", old),
+        ("single pass", lambda path: "\n".join(iter_pdf_text(path, parallel=False))),
+        ("process pool", lambda path: "\n".join(iter_pdf_text(path, parallel=True))),
+    ]
+    get_pool().submit(int).result()          # start the workers outside the timings
+    pages = len(PyPDF2.PdfReader(pdf_path).pages)
+    print(f"{pdf_path}: {pages} pages, {PROCESS_WORKERS} workers")
+    results = {}
+    for label, fn in modes:
+        start = time.perf_counter()
+        for _ in range(runs):
+            results[label] = fn(pdf_path)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"  {label:>16}: {elapsed * 1000:.0f} ms ({elapsed * 1000 / pages:.1f} ms/page)")
+    if len(set(results.values())) != 1:
+        raise SystemExit("❌ Extraction modes returned different text")
+    print("✅ All modes returned identical text")
 
 
 # ======================
 # MAIN
 # ======================
 if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Convert a resume to JSON, or benchmark text extraction.")
+    cli.add_argument("--bench", action="store_true", help="benchmark PDF extraction instead")
+    cli.add_argument("--pdf", help="PDF to benchmark (default: a generated one)")
+    cli.add_argument("--pages", type=int, default=20, help="pages in the generated PDF")
+    cli.add_argument("--runs", type=int, default=5)
+    args = cli.parse_args()
+    if args.bench:
+        pdf_path = args.pdf or _sample_pdf(args.pages)
+        try:
+            benchmark(pdf_path, args.runs)
+        finally:
+            if not args.pdf:
+                shutil.rmtree(os.path.dirname(pdf_path), ignore_errors=True)
+        raise SystemExit(0)
+
     resume_text = read_resume(RESUME_FILE)
 
     # Prompt Gemini with fixed schema
@@ -114,10 +254,8 @@ if __name__ == "__main__":
     {resume_text}
     """
 
-    response = model.generate_content(prompt)
-
-    # Clean output
-    json_output = clean_gemini_output(response.text)
+    # Structured output, repaired/validated against the resume schema
+    json_output = json.dumps(generate_json(prompt, RESUME_SCHEMA), indent=2)
 
     # Save file
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
@@ -0,0 +1,262 @@
+"""
+Native JSON -> PDF renderer with the same layout as writer.py, so a PDF
+does not need a DOCX round trip through LibreOffice.
+
+    python pdf_writer.py                 # tailored_resume.json -> Tailored_Resume.pdf
+    python pdf_writer.py --bench         # native vs DOCX + soffice timings
+"""
+import argparse
+import io
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from metrics import timed
+
+# reportlab is optional: without it PDFs go through writer.docx_to_pdf.
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+# ---------------- CONFIG ----------------
+INPUT_FILE = "tailored_resume.json"
+OUTPUT_PDF = "Tailored_Resume.pdf"
+
+MARGIN = 0.5 * 72                 # 0.5in, as writer.set_margins
+LINE_SPACING = 1.2                # Normal style line_spacing
+FONT_LINE_HEIGHT = 1.22           # Calibri's single-line height relative to its size
+DESCENT = 0.25                    # baseline offset above the bottom of a line, in ems
+NAME_SIZE, SECTION_SIZE, SUB_SIZE, NORMAL_SIZE = 16, 12, 11, 10
+RULE_WIDTH = 0.75                 # w:sz=6 eighths of a point
+RULE_GAP = 1                      # w:space=1pt between heading text and rule
+DATE_GAP = 12                     # minimum space between tabbed left text and its date
+
+# Calibri if installed, else Carlito (metric-compatible); Helvetica as a last resort
+FONT_CANDIDATES = [
+    ("C:/Windows/Fonts/calibri.ttf", "C:/Windows/Fonts/calibrib.ttf"),
+    ("/Library/Fonts/Calibri.ttf", "/Library/Fonts/Calibri Bold.ttf"),
+    ("/usr/share/fonts/truetype/crosextra/Carlito-Regular.ttf", "/usr/share/fonts/truetype/crosextra/Carlito-Bold.ttf"),
+    ("/usr/share/fonts/google-carlito-fonts/Carlito-Regular.ttf", "/usr/share/fonts/google-carlito-fonts/Carlito-Bold.ttf"),
+]
+
+_fonts = None
+_fonts_lock = threading.Lock()
+
+
+def available() -> bool:
+    return canvas is not None
+
+
+def get_fonts():
+    """(regular, bold) font names, registering the TrueType pair once."""
+    global _fonts
+    with _fonts_lock:
+        if _fonts is None:
+            _fonts = ("Helvetica", "Helvetica-Bold")
+            for regular, bold in FONT_CANDIDATES:
+                if Path(regular).exists() and Path(bold).exists():
+                    pdfmetrics.registerFont(TTFont("ResumeFont", regular))
+                    pdfmetrics.registerFont(TTFont("ResumeFont-Bold", bold))
+                    _fonts = ("ResumeFont", "ResumeFont-Bold")
+                    break
+            else:
+                print("⚠️ Warning: Calibri/Carlito not found; PDFs use Helvetica, "
+                      "so line breaks and page count may differ from the DOCX.")
+        return _fonts
+
+
+class _Page:
+    """Cursor over a reportlab canvas; adds pages as the text runs down."""
+
+    def __init__(self, out):
+        self.regular, self.bold = get_fonts()
+        self.width, self.height = letter
+        self.usable_width = self.width - 2 * MARGIN
+        self.c = canvas.Canvas(out, pagesize=letter, pageCompression=0)
+        self.y = self.height - MARGIN
+        self.pages = 1
+
+    def _advance(self, size):
+        """Move down one line of `size` text, breaking the page if needed; returns the baseline."""
+        leading = size * FONT_LINE_HEIGHT * LINE_SPACING
+        if self.y - leading < MARGIN:
+            self.c.showPage()
+            self.pages += 1
+            self.y = self.height - MARGIN
+        self.y -= leading
+        return self.y + size * DESCENT
+
+    def wrap(self, text, font, size, width=None):
+        """
+        Lines of text that fit in width, breaking at spaces and at explicit
+        newlines. A word wider than the line (a long URL or email) is broken
+        between characters, as Word does.
+        """
+        width = width or self.usable_width
+        lines = []
+        for paragraph in text.splitlines() or [""]:
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = f"{line} {word}" if line else word
+                if pdfmetrics.stringWidth(candidate, font, size) <= width:
+                    line = candidate
+                    continue
+                if line:
+                    lines.append(line)
+                line = word
+                while len(line) > 1 and pdfmetrics.stringWidth(line, font, size) > width:
+                    cut = self._fit(line, font, size, width)
+                    lines.append(line[:cut])
+                    line = line[cut:]
+            lines.append(line)
+        return lines
+
+    @staticmethod
+    def _fit(word, font, size, width):
+        """How many leading characters of word fit in width (at least one)."""
+        lo, hi = 1, len(word)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if pdfmetrics.stringWidth(word[:mid], font, size) <= width:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def paragraph(self, text, bold=False, size=NORMAL_SIZE):
+        font = self.bold if bold else self.regular
+        for line in self.wrap(text, font, size):
+            baseline = self._advance(size)
+            self.c.setFont(font, size)
+            self.c.drawString(MARGIN, baseline, line)
+
+    def tabbed(self, left, right):
+        """
+        Bold left text and a right-aligned date at the usable width, like the
+        DOCX tab stop. Left text too long to fit beside the date wraps below it.
+        """
+        width = self.usable_width
+        if right:
+            width -= pdfmetrics.stringWidth(right, self.regular, NORMAL_SIZE) + DATE_GAP
+        for i, line in enumerate(self.wrap(left, self.bold, SUB_SIZE, width)):
+            baseline = self._advance(SUB_SIZE)
+            self.c.setFont(self.bold, SUB_SIZE)
+            self.c.drawString(MARGIN, baseline, line)
+            if right and i == 0:
+                self.c.setFont(self.regular, NORMAL_SIZE)
+                self.c.drawRightString(self.width - MARGIN, baseline, right)
+
+    def section(self, text):
+        self.paragraph(text.upper(), bold=True, size=SECTION_SIZE)
+        rule_y = self.y - RULE_GAP
+        self.c.setLineWidth(RULE_WIDTH)
+        self.c.line(MARGIN, rule_y, self.width - MARGIN, rule_y)
+        self.y = rule_y - RULE_WIDTH
+
+    def save(self):
+        self.c.save()
+
+
+def _write(page: _Page, data: dict):
+    # Same sections, order and emptiness checks as writer.build_doc
+    details = data.get("Details", {})
+    page.paragraph(details.get("Name", "NAME SURNAME").strip(), bold=True, size=NAME_SIZE)
+    parts = [details.get(k, "").strip() for k in ("Email", "Phone", "Location", "LinkedIn", "GitHub")]
+    parts = [p for p in parts if p]
+    if parts:
+        page.paragraph(" | ".join(parts))
+
+    if data.get("Summary", "").strip():
+        page.section("Summary")
+        page.paragraph(data["Summary"].strip())
+
+    if data.get("Skills", []):
+        page.section("Skills")
+        page.paragraph(", ".join(data["Skills"]))
+
+    if data.get("Work Experience", []):
+        page.section("Experience")
+        for job in data["Work Experience"]:
+            company, role = job.get("Company Name", "").strip(), job.get("Role", "").strip()
+            header = f"{company} | {role}" if company or role else ""
+            if header:
+                page.tabbed(header, job.get("Date", "").strip())
+            for b in job.get("Bullet Points", []):
+                page.paragraph(f"• {b}")
+
+    if data.get("Project Experience", []):
+        page.section("Projects")
+        for p in data["Project Experience"]:
+            title, tech = p.get("Title", "").strip(), p.get("Tech Stack", "").strip()
+            page.paragraph(f"{title} | {tech}" if tech else title, bold=True, size=SUB_SIZE)
+            for b in p.get("Bullet Points", []):
+                page.paragraph(f"• {b}")
+
+    if data.get("Education", []):
+        page.section("Education")
+        for e in data["Education"]:
+            inst, gpa = e.get("Institution", "").strip(), e.get("GPA", "").strip()
+            page.tabbed(e.get("Degree", "").strip(), e.get("Date", "").strip())
+            if inst or gpa:
+                page.paragraph(inst + (f" | GPA: {gpa}" if gpa else ""))
+
+    if data.get("Achievements and Certifications", []):
+        page.section("Achievements & Certifications")
+        for c in data["Achievements and Certifications"]:
+            page.paragraph(f"• {c}")
+
+
+@timed("pdf_render")
+def build_pdf(data: dict, out_path) -> int:
+    """Render resume JSON straight to PDF; returns the page count. out_path may be file-like."""
+    if canvas is None:
+        raise RuntimeError("reportlab is not installed; use writer.docx_to_pdf instead")
+    page = _Page(out_path if hasattr(out_path, "write") else str(out_path))
+    _write(page, data)
+    page.save()
+    return page.pages
+
+
+def benchmark(data: dict, runs: int = 50, soffice_runs: int = 3):
+    """ms per PDF for the native renderer vs build_doc + LibreOffice."""
+    from writer import build_doc, docx_to_pdf
+
+    build_pdf(data, io.BytesIO())      # font registration is a one-time cost
+    start = time.perf_counter()
+    for _ in range(runs):
+        pages = build_pdf(data, io.BytesIO())
+    native = (time.perf_counter() - start) / runs
+    print(f"  native: {native * 1000:.1f} ms per PDF ({native * 1000 / pages:.1f} ms/page, {pages} page(s))")
+
+    out_dir = Path(tempfile.mkdtemp(prefix="pdf_bench_"))
+    try:
+        start = time.perf_counter()
+        for i in range(soffice_runs):
+            docx_path = out_dir / f"bench_{i}.docx"
+            build_doc(data, docx_path)
+            docx_to_pdf(docx_path, out_dir)
+        soffice = (time.perf_counter() - start) / soffice_runs
+    except Exception as e:
+        print(f"  soffice: unavailable ({e})")
+        return
+    print(f"  soffice: {soffice * 1000:.1f} ms per PDF ({soffice / native:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--bench", action="store_true", help="compare against the DOCX + soffice path")
+    cli.add_argument("--runs", type=int, default=50)
+    args = cli.parse_args()
+
+    data = json.loads(Path(INPUT_FILE).read_text(encoding="utf-8"))
+    if args.bench:
+        benchmark(data, args.runs)
+    else:
+        build_pdf(data, Path(OUTPUT_PDF))
+        print(f"✅ PDF saved to {OUTPUT_PDF}")
@@ -0,0 +1,127 @@
+import copy
+import json
+import threading
+
+from metrics import timed
+from scoring import extract_terms
+
+# ---------------- CONFIG ----------------
+CHARS_PER_TOKEN = 4            # rough estimate for Gemini's tokenizer on English text
+MIN_BULLETS_PER_ENTRY = 1      # pruning never empties a job/project entry
+
+# Token budgets for the resume part of each prompt (None = no pruning).
+# Only read-only context is pruned: a prompt whose output replaces the resume
+# (full tailoring) must see every bullet, or the dropped ones are lost.
+TAILOR_TOKEN_BUDGET = None
+SECTION_CONTEXT_TOKEN_BUDGET = 3000   # context next to the one section being rewritten
+MATCH_TOKEN_BUDGET = 1200
+CHAT_TOKEN_BUDGET = 400       # retrieved sections only (see retrieval.py)
+
+_totals = {"requests": 0, "baseline_tokens": 0, "sent_tokens": 0, "pruned_items": 0}
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def compact_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _relevance(text: str, query_terms: set) -> float:
+    terms = set(extract_terms(text))
+    if not terms:
+        return 0.0
+    return len(terms & query_terms) / len(terms) ** 0.5
+
+
+def prune_resume(resume: dict, query: str, budget: int):
+    """
+    Drop the bullets/achievements least relevant to `query` until the compact
+    JSON fits in `budget` tokens. Details, Summary, Skills, Education and
+    entry headers are always kept. Returns (pruned_resume, items_dropped).
+    """
+    tokens = estimate_tokens(compact_json(resume))
+    if budget is None or tokens <= budget:
+        return resume, 0
+
+    resume = copy.deepcopy(resume)
+    query_terms = set(extract_terms(query))
+
+    # (relevance, section, entry index or None, item index, text)
+    units = []
+    for section in ("Work Experience", "Project Experience"):
+        for e, entry in enumerate(resume.get(section, [])):
+            for b, bullet in enumerate(entry.get("Bullet Points", [])):
+                units.append((_relevance(bullet, query_terms), section, e, b, bullet))
+    for a, item in enumerate(resume.get("Achievements and Certifications", [])):
+        units.append((_relevance(item, query_terms), "Achievements and Certifications", None, a, item))
+    # least relevant first; among equals drop later bullets before earlier ones
+    units.sort(key=lambda u: (u[0], -u[3]))
+
+    drop = set()
+    remaining = {}
+    for _, section, e, _, _ in units:
+        if e is not None:
+            remaining[(section, e)] = remaining.get((section, e), 0) + 1
+    for score, section, e, i, text in units:
+        if tokens <= budget:
+            break
+        if e is not None:
+            if remaining[(section, e)] <= MIN_BULLETS_PER_ENTRY:
+                continue
+            remaining[(section, e)] -= 1
+        drop.add((section, e, i))
+        tokens -= estimate_tokens(compact_json(text)) + 1
+
+    for section in ("Work Experience", "Project Experience"):
+        for e, entry in enumerate(resume.get(section, [])):
+            if "Bullet Points" in entry:
+                entry["Bullet Points"] = [b for i, b in enumerate(entry["Bullet Points"])
+                                          if (section, e, i) not in drop]
+    if "Achievements and Certifications" in resume:
+        resume["Achievements and Certifications"] = [
+            a for i, a in enumerate(resume["Achievements and Certifications"])
+            if ("Achievements and Certifications", None, i) not in drop
+        ]
+    return resume, len(drop)
+
+
+@timed("prompt_build")
+def resume_context(resume: dict, query: str, budget: int = None):
+    """
+    Serialize the resume for a prompt: compact JSON, pruned to `budget`
+    tokens by relevance to `query` (a JD or a question).
+
+    Returns (text, report) where report compares against the old
+    json.dumps(indent=2) serialization.
+    """
+    baseline = estimate_tokens(json.dumps(resume, indent=2))
+    pruned, dropped = prune_resume(resume, query, budget)
+    text = compact_json(pruned)
+    sent = estimate_tokens(text)
+    report = {
+        "baseline_tokens": baseline,
+        "sent_tokens": sent,
+        "tokens_saved": baseline - sent,
+        "pruned_items": dropped,
+    }
+    record_context(report)
+    return text, report
+
+
+def record_context(report: dict):
+    """Add one prompt's token report to the /prompt_stats totals."""
+    with _totals_lock:
+        _totals["requests"] += 1
+        _totals["baseline_tokens"] += report["baseline_tokens"]
+        _totals["sent_tokens"] += report["sent_tokens"]
+        _totals["pruned_items"] += report["pruned_items"]
+
+
+def stats() -> dict:
+    with _totals_lock:
+        totals = dict(_totals)
+    totals["tokens_saved"] = totals["baseline_tokens"] - totals["sent_tokens"]
+    return totals
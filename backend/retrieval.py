@@ -0,0 +1,120 @@
+import json
+import math
+import threading
+from collections import Counter, OrderedDict
+
+from cache import make_key
+from metrics import timed
+from prompts import CHAT_TOKEN_BUDGET, compact_json, estimate_tokens, record_context
+from scoring import extract_terms
+
+# ---------------- CONFIG ----------------
+TOP_K = 4                       # most relevant sections considered per question
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Sent when no section matches the question (e.g. "why this company?")
+FALLBACK_SECTIONS = ("Summary", "Skills")
+MAX_INDEXES = 16                # resume versions kept in memory
+
+
+def resume_chunks(resume: dict) -> list:
+    """(label, data) for every independently retrievable part of the resume."""
+    chunks = []
+    for section in ("Summary", "Skills", "Education", "Achievements and Certifications"):
+        if resume.get(section):
+            chunks.append((section, resume[section]))
+    for job in resume.get("Work Experience", []):
+        chunks.append((f"Work Experience: {job.get('Company Name', '')} | {job.get('Role', '')}", job))
+    for proj in resume.get("Project Experience", []):
+        chunks.append((f"Project: {proj.get('Title', '')}", proj))
+    return chunks
+
+
+class ResumeIndex:
+    """
+    BM25 over resume sections (one chunk per section or Work/Project entry),
+    using the same term extraction as match scoring, so skill aliases such as
+    "ML" and "machine learning" match each other.
+    """
+
+    def __init__(self, resume: dict):
+        self.details = resume.get("Details", {})
+        self.chunks = resume_chunks(resume)
+        self.terms = [Counter(extract_terms(f"{label} {json.dumps(data, ensure_ascii=False)}"))
+                      for label, data in self.chunks]
+        self.lengths = [sum(t.values()) for t in self.terms]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        df = Counter(term for t in self.terms for term in t)
+        n = len(self.chunks)
+        self.idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+    def search(self, question: str, k: int = TOP_K) -> list:
+        """[(score, chunk index), ...] best first, only chunks sharing a term with the question."""
+        query = set(extract_terms(question)) & set(self.idf)
+        scores = []
+        for i, terms in enumerate(self.terms):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / (self.avg_length or 1))
+            s = sum(self.idf[q] * terms[q] * (BM25_K1 + 1) / (terms[q] + norm) for q in query if q in terms)
+            if s > 0:
+                scores.append((s, i))
+        scores.sort(key=lambda x: (-x[0], x[1]))
+        return scores[:k]
+
+    def context(self, question: str, budget: int = CHAT_TOKEN_BUDGET) -> tuple:
+        """(prompt text, section labels used): Details plus the best matches that fit in budget."""
+        picked = [i for _, i in self.search(question)]
+        if not picked:
+            picked = [i for i, (label, _) in enumerate(self.chunks) if label in FALLBACK_SECTIONS]
+        lines = [f"Details: {compact_json(self.details)}"] if self.details else []
+        used = []
+        tokens = estimate_tokens("\n".join(lines))
+        for i in sorted(picked):              # resume order reads better than score order
+            label, data = self.chunks[i]
+            line = f"{label}: {compact_json(data)}"
+            cost = estimate_tokens(line) + 1
+            if used and tokens + cost > budget:
+                continue
+            lines.append(line)
+            used.append(label)
+            tokens += cost
+        return "\n".join(lines), used
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(resume: dict) -> ResumeIndex:
+    """The index for this resume version, built once and kept for the last MAX_INDEXES versions."""
+    key = make_key(resume)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = ResumeIndex(resume)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+@timed("prompt_build")
+def retrieve_context(resume: dict, question: str, budget: int = CHAT_TOKEN_BUDGET) -> tuple:
+    """
+    Resume excerpts relevant to `question`, for prompts that need a few
+    sections rather than the whole resume. Returns (text, report) like
+    prompts.resume_context, with the section labels under "sections".
+    """
+    text, used = get_index(resume).context(question, budget)
+    baseline = estimate_tokens(json.dumps(resume, indent=2))
+    sent = estimate_tokens(text)
+    report = {
+        "baseline_tokens": baseline,
+        "sent_tokens": sent,
+        "tokens_saved": baseline - sent,
+        "pruned_items": len(resume_chunks(resume)) - len(used),
+    }
+    record_context(report)
+    return text, {**report, "sections": used}
@@ -0,0 +1,339 @@
+"""
+Quota-aware scheduler in front of the shared model client.
+
+Every model call (upload parsing, tailoring, match scoring, chat) passes
+through one Scheduler, which:
+  - admits calls through token buckets for requests/min and tokens/min,
+  - serves waiting calls by priority class (interactive > background > bulk),
+  - on a quota error pauses admissions and retries with jittered backoff.
+
+Callers mark their work with `with priority("bulk"):`; unmarked calls are
+interactive. Thread pools do not inherit the mark, so wrap submitted
+functions with with_priority(current_priority(), fn).
+
+    python scheduler.py --simulate        # bulk + chat against a throttling fake
+"""
+import argparse
+import contextvars
+import functools
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+from prompts import estimate_tokens
+
+# ---------------- CONFIG ----------------
+# Gemini 1.5 Flash free tier: 15 requests and 1M tokens per minute (0 = no limit)
+REQUESTS_PER_MINUTE = int(os.environ.get("LLM_RPM", 15))
+TOKENS_PER_MINUTE = int(os.environ.get("LLM_TPM", 1_000_000))
+MAX_RETRIES = 4                 # quota errors retried per call
+BACKOFF_BASE = 2.0              # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 60.0
+BURST = 0.2                     # share of a period's quota that may go out at once
+WAIT_SAMPLES = 1000             # recent wait times kept per priority for stats
+
+PRIORITIES = ("interactive", "background", "bulk")      # served in this order
+
+_priority = contextvars.ContextVar("model_priority", default="interactive")
+_QUOTA_RE = re.compile(r"\b429\b|quota|rate limit|resource has been exhausted|too many requests", re.I)
+_RETRY_AFTER_RE = re.compile(r"retry[ _-]?(?:after|delay|in)\D{0,20}?(\d+(?:\.\d+)?)", re.I)
+
+
+# ---------------- PRIORITY ----------------
+@contextmanager
+def priority(name: str):
+    """Model calls made inside this block are queued with the given priority class."""
+    if name not in PRIORITIES:
+        raise ValueError(f"priority must be one of {PRIORITIES}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def with_priority(name: str, fn):
+    """fn wrapped to run under `priority(name)`, e.g. for a thread pool or job queue."""
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with priority(name):
+            return fn(*args, **kwargs)
+    return run
+
+
+def is_quota_error(e: Exception) -> bool:
+    return type(e).__name__ in ("ResourceExhausted", "TooManyRequests") or bool(_QUOTA_RE.search(str(e)))
+
+
+def _retry_after(e: Exception) -> float:
+    """Server-suggested delay in seconds from the error message, or 0."""
+    match = _RETRY_AFTER_RE.search(str(e))
+    return float(match.group(1)) if match else 0.0
+
+
+# ---------------- TOKEN BUCKET ----------------
+class TokenBucket:
+    """
+    At most `rate` units in any `period`-second window, as the API counts
+    them: a burst of `burst` * rate, refilled at the remaining rate. A plain
+    bucket of one period's worth would allow twice the quota in a window.
+    rate=0 disables it.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0, burst: float = BURST):
+        self.rate = rate
+        self.capacity = max(1.0, rate * burst) if rate else 0.0
+        self.per_second = (rate - self.capacity) / period if rate > self.capacity else rate / period
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if now)."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)      # a huge prompt only has to wait for a full bucket
+        return max(0.0, (amount - self.level) / self.per_second)
+
+    def take(self, amount: float):
+        """Take without waiting; the level may go negative (e.g. response tokens after the fact)."""
+        if self.rate:
+            self._refill()
+            self.level -= amount
+
+    def drain(self):
+        if self.rate:
+            self._refill()
+            self.level = min(self.level, 0.0)
+
+
+# ---------------- SCHEDULER ----------------
+class Scheduler:
+    """
+    Provider wrapper with the same generate_content() signature. Admission
+    is strictly by (priority, arrival): the head of the queue waits for the
+    buckets and anything behind it waits for the head, except that a newly
+    arrived higher-priority call goes in front. A quota error drains the
+    request bucket and pauses all admissions for the backoff delay, so
+    queued calls slow down together instead of each hitting the quota.
+    Other attributes (name, ...) pass through to the wrapped provider.
+    """
+
+    def __init__(self, inner, rpm: float = REQUESTS_PER_MINUTE, tpm: float = TOKENS_PER_MINUTE,
+                 max_retries: int = MAX_RETRIES, period: float = 60.0,
+                 backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX, seed: int = None):
+        self.inner = inner
+        self.requests = TokenBucket(rpm, period)
+        self.tokens = TokenBucket(tpm, period)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._rng = random.Random(seed)
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._waiting = {p: 0 for p in PRIORITIES}
+        self._waits = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITIES}
+        self.in_flight = 0
+        self.calls = {p: 0 for p in PRIORITIES}
+        self.retries = {p: 0 for p in PRIORITIES}
+        self.quota_errors = 0
+        self.failed = 0
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    # ----- admission -----
+    def _admit(self, prio: str, tokens: int):
+        entry = [PRIORITIES.index(prio), next(self._seq)]
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            self._waiting[prio] += 1
+            while True:
+                delay = None
+                if self._queue[0] is entry:
+                    delay = max(self._paused_until - time.monotonic(),
+                                self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                    if delay <= 0:
+                        break
+                self._cond.wait(delay)
+            heapq.heappop(self._queue)
+            self._waiting[prio] -= 1
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            self.calls[prio] += 1
+            waited = time.monotonic() - start
+            self._waits[prio].append(waited)
+            self._cond.notify_all()
+        metrics.SCHEDULER_WAIT.observe(waited, priority=prio)
+
+    def _release(self, response_tokens: int = 0):
+        with self._cond:
+            self.in_flight -= 1
+            self.tokens.take(response_tokens)
+
+    def _backoff(self, prio: str, attempt: int, e: Exception) -> bool:
+        """Pause admissions after a quota error; False when the call should give up."""
+        with self._cond:
+            self.quota_errors += 1
+            if attempt >= self.max_retries:
+                self.failed += 1
+                return False
+            self.retries[prio] += 1
+            # full jitter, but never sooner than the server asked for
+            delay = max(_retry_after(e), self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.requests.drain()
+            self._cond.notify_all()
+        metrics.MODEL_RETRIES.inc(priority=prio)
+        print(f"⚠️ Model quota hit ({prio}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return True
+
+    # ----- provider interface -----
+    def generate_content(self, prompt, stream: bool = False, json_mode: bool = False):
+        prio = current_priority()
+        tokens = estimate_tokens(prompt)
+        if stream:
+            return self._stream(prompt, prio, tokens)
+        for attempt in itertools.count():
+            self._admit(prio, tokens)
+            response = None
+            try:
+                response = self.inner.generate_content(prompt, json_mode=json_mode)
+            except Exception as e:
+                if is_quota_error(e) and self._backoff(prio, attempt, e):
+                    continue
+                raise
+            finally:
+                self._release(estimate_tokens(getattr(response, "text", "") or ""))
+            return response
+
+    def _stream(self, prompt, prio, tokens):
+        for attempt in itertools.count():
+            self._admit(prio, tokens)
+            parts = []
+            stream = None
+            try:
+                stream = self.inner.generate_content(prompt, stream=True)
+                for chunk in stream:
+                    parts.append(getattr(chunk, "text", ""))
+                    yield chunk
+                return
+            except Exception as e:
+                # Only retry before anything reached the caller
+                if not parts and is_quota_error(e) and self._backoff(prio, attempt, e):
+                    continue
+                raise
+            finally:
+                if hasattr(stream, "close"):
+                    stream.close()        # cancels the upstream call if the caller stopped early
+                self._release(estimate_tokens("".join(parts)))
+
+    # ----- stats -----
+    def stats(self) -> dict:
+        with self._cond:
+            waits = {p: sorted(self._waits[p]) for p in PRIORITIES}
+            return {
+                "queue_depth": dict(self._waiting),
+                "in_flight": self.in_flight,
+                "calls": dict(self.calls),
+                "wait_seconds": {
+                    p: {
+                        "p50": round(w[len(w) // 2], 3) if w else 0.0,
+                        "p95": round(w[int(len(w) * 0.95)], 3) if w else 0.0,
+                        "max": round(w[-1], 3) if w else 0.0,
+                    } for p, w in waits.items()
+                },
+                "retries": dict(self.retries),
+                "quota_errors": self.quota_errors,
+                "failed": self.failed,
+                "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+                "limits": {"rpm": self.requests.rate, "tpm": self.tokens.rate},
+                "available": {"requests": round(max(0.0, self.requests.level), 1),
+                              "tokens": round(max(0.0, self.tokens.level))},
+            }
+
+
+# ---------------- SIMULATION ----------------
+def simulate(bulk: int = 60, interactive: int = 10, quota: int = 20, period: float = 1.0,
+             latency: float = 0.05, workers: int = 8):
+    """
+    Bulk calls from `workers` threads plus interactive calls arriving later,
+    against a fake that allows `quota` calls per `period` seconds; with and
+    without the scheduler. Time is compressed: one period stands for a minute.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from llm import ThrottlingModel
+
+    def run(model, label):
+        done = {"bulk": [], "interactive": []}
+        failures = {"bulk": 0, "interactive": 0}
+
+        def call(prio):
+            start = time.monotonic()
+            try:
+                with priority(prio):
+                    model.generate_content("x" * 400)
+                done[prio].append(time.monotonic() - start)
+            except Exception:
+                failures[prio] += 1
+
+        with ThreadPoolExecutor(max_workers=workers) as bulk_pool, \
+                ThreadPoolExecutor(max_workers=interactive) as chat_pool:
+            for _ in range(bulk):
+                bulk_pool.submit(call, "bulk")
+            time.sleep(period / 2)            # chat arrives while the batch is queued
+            for _ in range(interactive):
+                chat_pool.submit(call, "interactive")
+                time.sleep(period / 10)
+        for prio in ("interactive", "bulk"):
+            latencies = sorted(done[prio])
+            p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+            print(f"  {label:>12} {prio:>11}: {len(latencies)} ok, {failures[prio]} failed, "
+                  f"p95 latency {p95:.2f}s")
+
+    fake = ThrottlingModel(rpm=quota, period=period, latency=latency)
+    run(fake, "direct")
+    print(f"  {'':>12} fake rejected {fake.rejected} calls")
+
+    time.sleep(period)
+    fake = ThrottlingModel(rpm=quota, period=period, latency=latency)
+    scheduler = Scheduler(fake, rpm=quota, tpm=0, period=period,
+                          backoff_base=period / 10, backoff_max=period, seed=0)
+    run(scheduler, "scheduled")
+    stats = scheduler.stats()
+    print(f"  {'':>12} fake rejected {fake.rejected} calls, retries {stats['retries']}, "
+          f"wait p95 {stats['wait_seconds']['interactive']['p95']:.2f}s interactive / "
+          f"{stats['wait_seconds']['bulk']['p95']:.2f}s bulk")
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--simulate", action="store_true")
+    cli.add_argument("--bulk", type=int, default=60)
+    cli.add_argument("--interactive", type=int, default=10)
+    cli.add_argument("--quota", type=int, default=20, help="calls allowed per period by the fake")
+    args = cli.parse_args()
+    if args.simulate:
+        simulate(args.bulk, args.interactive, args.quota)
+    else:
+        cli.print_help()
@@ -0,0 +1,219 @@
+import re
+
+# ---------------- CONFIG ----------------
+MAX_NGRAM = 3
+COVERAGE_WEIGHT = 0.6        # share of the score from JD keyword coverage
+COSINE_WEIGHT = 0.4          # share from term-frequency cosine similarity
+MIN_JD_TERM_FREQ = 2         # non-skill JD words must repeat to count as keywords
+SKILLS_BOOST = 2.0           # Skills / Tech Stack terms count double in the resume vector
+
+# canonical term -> aliases that should be treated as the same skill.
+# Only true spellings of one skill: related tools (git/github, docker/containers,
+# etl/elt) stay separate so one does not count as having the other.
+SKILL_SYNONYMS = {
+    "javascript": ["js", "ecmascript"],
+    "typescript": [],
+    "python": ["python3"],
+    "node.js": ["node", "nodejs"],
+    "react": ["react.js", "reactjs"],
+    "vue": ["vue.js", "vuejs"],
+    "angular": ["angularjs", "angular.js"],
+    "postgresql": ["postgres", "psql"],
+    "mongodb": ["mongo"],
+    "sql": ["t-sql", "tsql", "pl/sql"],
+    "kubernetes": ["k8s"],
+    "docker": [],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "ci/cd": ["cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "machine learning": ["ml"],
+    "deep learning": [],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "computer vision": [],
+    "large language models": ["llm", "llms", "large language model"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": [],
+    "pytorch": ["torch"],
+    "pandas": [],
+    "numpy": [],
+    "spark": ["pyspark", "apache spark"],
+    "hadoop": [],
+    "airflow": ["apache airflow"],
+    "kafka": ["apache kafka"],
+    "power bi": ["powerbi"],
+    "tableau": [],
+    "excel": ["ms excel", "microsoft excel"],
+    "etl": [],
+    "rest api": ["restful", "rest apis", "restful apis"],
+    "graphql": [],
+    "microservices": ["micro services", "microservice"],
+    "git": [],
+    "linux": ["unix"],
+    "java": [],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    "golang": [],
+    "flask": [],
+    "django": [],
+    "fastapi": [],
+    "spring boot": [],
+    "terraform": [],
+    "agile": ["scrum", "kanban"],
+    "data visualization": ["data viz"],
+    "statistics": ["statistical analysis"],
+    "object-oriented programming": ["oop", "object oriented programming"],
+}
+
+STOPWORDS = set("""
+a about above across after again against all also an and any are as at be because been
+before being below between both but by can could did do does doing down during each few
+for from further had has have having he her here hers him his how i if in into is it its
+itself just me more most must my no nor not now of off on once only or other our ours out
+over own same she should so some such than that the their theirs them then there these
+they this those through to too under until up very was we were what when where which while
+who whom why will with within without would you your yours able ability across etc e.g
+experience experiences year years work working team teams role roles job company including
+include includes strong excellent good great knowledge skills skill understanding using use
+used required requirements preferred plus well new within ensure help candidate candidates
+responsibilities responsible opportunity join looking based related relevant environment
+""".split())
+
+# alias -> canonical, longest aliases first so "google cloud platform" beats "google cloud"
+_ALIASES = {}
+for _canon, _aliases in SKILL_SYNONYMS.items():
+    _ALIASES[_canon] = _canon
+    for _alias in _aliases:
+        _ALIASES[_alias] = _canon
+# "/" may precede an alias ("ML/AI"); an alias containing "/" (ci/cd, pl/sql) is
+# longer, so it still wins at its own start position
+_ALIAS_RE = re.compile(
+    r"(?<![\w+#.-])(" + "|".join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True)) + r")(?![\w+#-]|\.\w)"
+)
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+
+# ---------------- TEXT ----------------
+def _canonicalize(text: str) -> str:
+    """Lowercase and rewrite known skill aliases to one underscore-joined token."""
+    text = text.lower()
+    return _ALIAS_RE.sub(lambda m: " " + _ALIASES[m.group(1)].replace(" ", "_") + " ", text)
+
+
+def extract_terms(text: str) -> list:
+    """
+    Tokens and n-gram phrases (up to MAX_NGRAM words) with stopwords removed.
+    Known skills come out as single canonical terms, e.g. "machine learning".
+    """
+    tokens = [t.strip("./-") for t in _TOKEN_RE.findall(_canonicalize(text or ""))]
+    tokens = [t for t in tokens if t]
+    terms = []
+    for n in range(1, MAX_NGRAM + 1):
+        for i in range(len(tokens) - n + 1):
+            gram = tokens[i:i + n]
+            if gram[0] in STOPWORDS or gram[-1] in STOPWORDS:
+                continue
+            if n == 1 and (len(gram[0]) < 2 or gram[0].isdigit()):
+                continue
+            terms.append(" ".join(gram).replace("_", " "))
+    return terms
+
+
+def is_skill(term: str) -> bool:
+    return term in SKILL_SYNONYMS
+
+
+def resume_text_parts(resume: dict):
+    """Split resume_fixed.json into (skills text, everything-else text)."""
+    skills = list(resume.get("Skills", []))
+    body = [resume.get("Summary", "")]
+    for job in resume.get("Work Experience", []):
+        body.append(job.get("Role", ""))
+        body.extend(job.get("Bullet Points", []))
+    for proj in resume.get("Project Experience", []):
+        skills.append(proj.get("Tech Stack", ""))
+        body.append(proj.get("Title", ""))
+        body.extend(proj.get("Bullet Points", []))
+    body.extend(resume.get("Achievements and Certifications", []))
+    return " , ".join(skills), " . ".join(body)
+
+
+# ---------------- SCORING ----------------
+def _count_matrix(term_lists, vocab_index):
+    import numpy as np
+    matrix = np.zeros((len(term_lists), len(vocab_index)), dtype=np.float32)
+    for row, terms in enumerate(term_lists):
+        for term in terms:
+            col = vocab_index.get(term)
+            if col is not None:
+                matrix[row, col] += 1
+    return matrix
+
+
+def score_many(resume: dict, jd_texts: list) -> list:
+    """
+    Score one resume against many JDs with a single term matrix.
+
+    Each result has "score" (0-100), "matched" and "missing" JD keywords.
+    A JD keyword is any known skill in the JD, or a non-stopword term that
+    appears at least MIN_JD_TERM_FREQ times. Terms are weighted by sublinear
+    TF (1 + log count), not IDF: a resume and one JD are too few documents
+    for IDF to mean anything, and each JD scores the same alone as in a batch.
+    """
+    import numpy as np   # only local scoring needs it; keeps startup fast
+    skills_text, body_text = resume_text_parts(resume)
+    skill_terms = extract_terms(skills_text)
+    resume_terms = skill_terms + extract_terms(body_text)
+    jd_terms = [extract_terms(jd) for jd in jd_texts]
+
+    vocab = sorted(set(resume_terms).union(*jd_terms)) if jd_terms else sorted(set(resume_terms))
+    vocab_index = {term: i for i, term in enumerate(vocab)}
+
+    J = _count_matrix(jd_terms, vocab_index)                       # (n_jds, V)
+    r = _count_matrix([resume_terms], vocab_index)[0]               # (V,)
+    r += (SKILLS_BOOST - 1) * _count_matrix([skill_terms], vocab_index)[0]
+
+    # Sublinear TF: a term repeated 10 times counts ~3.3x, not 10x
+    Jw = np.log(J, out=np.zeros_like(J), where=J > 0) + (J > 0)
+    rw = np.log(r, out=np.zeros_like(r), where=r > 0) + (r > 0)
+    norms = np.linalg.norm(Jw, axis=1) * (np.linalg.norm(rw) or 1.0)
+    cosine = np.divide(Jw @ rw, norms, out=np.zeros(len(jd_texts), dtype=np.float64), where=norms > 0)
+
+    # JD keyword mask: known skills, or repeated terms
+    skill_mask = np.array([is_skill(t) for t in vocab], dtype=bool)
+    keyword = (J > 0) & (skill_mask | (J >= MIN_JD_TERM_FREQ))
+    present = r > 0
+    weights = np.where(keyword, Jw, 0.0)     # keywords the JD repeats weigh more
+    total = weights.sum(axis=1)
+    covered = (weights * present).sum(axis=1)
+    coverage = np.divide(covered, total, out=np.zeros_like(total), where=total > 0)
+
+    scores = np.clip(np.rint(100 * (COVERAGE_WEIGHT * coverage + COSINE_WEIGHT * cosine)), 0, 100)
+
+    vocab_arr = np.array(vocab, dtype=object)
+    results = []
+    for i in range(len(jd_texts)):
+        order = np.argsort(-weights[i], kind="stable")
+        ranked = [vocab_arr[j] for j in order if keyword[i, j]]
+        results.append({
+            "score": int(scores[i]),
+            "matched": [t for t in ranked if present[vocab_index[t]]],
+            "missing": [t for t in ranked if not present[vocab_index[t]]],
+        })
+    return results
+
+
+def score(resume: dict, jd_text: str) -> dict:
+    """Score one resume against one JD; see score_many()."""
+    return score_many(resume, [jd_text])[0]
+
+
+def local_reason(result: dict, limit: int = 5) -> str:
+    """Short human-readable explanation in the same spirit as the LLM "reason"."""
+    parts = []
+    if result["matched"]:
+        parts.append("Strong in " + ", ".join(result["matched"][:limit]) + ".")
+    if result["missing"]:
+        parts.append("Missing " + ", ".join(result["missing"][:limit]) + ".")
+    return " ".join(parts) or "No clear keywords found in the job description."
@@ -0,0 +1,148 @@
+import atexit
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# ---------------- CONFIG ----------------
+DEFAULT_SESSION = "default"
+SESSIONS_DIR = Path("sessions")
+MAX_SESSIONS = 100             # in-memory sessions before LRU eviction
+FLUSH_INTERVAL = 2.0           # seconds between write-behind flushes
+# Write-through by default: every write hits disk before the request returns.
+# Write-behind (True) batches writes but loses up to FLUSH_INTERVAL of them on
+# a crash and is only safe with a single server process.
+WRITE_BEHIND = False
+
+FIELDS = ("resume", "tailored")
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class InvalidSession(ValueError):
+    pass
+
+
+class _Session:
+    def __init__(self, paths: dict):
+        self.paths = paths
+        self.data = {}          # field -> parsed JSON (missing key = not loaded yet)
+        self.mtimes = {}        # field -> mtime of the file we last read/wrote
+        self.dirty = set()
+
+
+class SessionStore:
+    """
+    Per-session resume state kept as parsed objects in memory.
+
+    Sessions are evicted LRU beyond max_sessions and persisted as JSON files;
+    the default session uses the legacy resume_fixed.json /
+    tailored_resume.json paths so the CLI scripts keep working. Before each
+    read the file mtime is checked, so writes from another process are
+    picked up. Returned objects are shared: treat them as read-only.
+    """
+
+    def __init__(self, legacy_paths: dict, root: Path = SESSIONS_DIR,
+                 max_sessions: int = MAX_SESSIONS, write_behind: bool = WRITE_BEHIND):
+        self.legacy_paths = {k: Path(v) for k, v in legacy_paths.items()}
+        self.root = Path(root)
+        self.max_sessions = max_sessions
+        self.write_behind = write_behind
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+        if write_behind:
+            threading.Thread(target=self._flush_loop, daemon=True).start()
+            atexit.register(self.flush)
+
+    # ----- paths / loading -----
+    def _paths(self, sid: str) -> dict:
+        if sid == DEFAULT_SESSION:
+            return self.legacy_paths
+        if not _SESSION_ID_RE.match(sid):
+            raise InvalidSession(f"Invalid session id: {sid!r}")
+        return {field: self.root / sid / f"{field}.json" for field in FIELDS}
+
+    def _session(self, sid: str) -> _Session:
+        sess = self._sessions.get(sid)
+        if sess is None:
+            sess = _Session(self._paths(sid))
+            self._sessions[sid] = sess
+            self._evict()
+        self._sessions.move_to_end(sid)
+        return sess
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            _, sess = self._sessions.popitem(last=False)
+            self._flush_session(sess)
+
+    def _refresh(self, sess: _Session, field: str):
+        if field in sess.dirty:
+            return
+        path = sess.paths[field]
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            sess.data[field] = None
+            sess.mtimes[field] = None
+            return
+        if field in sess.data and sess.mtimes.get(field) == mtime:
+            return
+        try:
+            sess.data[field] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            # Treat it as never set (the user re-uploads) rather than failing every request
+            print(f"⚠️ Warning: ignoring unreadable session file {path}: {e}")
+            sess.data[field] = None
+        sess.mtimes[field] = mtime
+
+    def _write(self, sess: _Session, field: str):
+        path = sess.paths[field]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(sess.data[field], indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        sess.mtimes[field] = path.stat().st_mtime_ns
+        sess.dirty.discard(field)
+
+    def _flush_session(self, sess: _Session):
+        for field in list(sess.dirty):
+            self._write(sess, field)
+
+    # ----- public API -----
+    def get(self, sid: str, field: str):
+        """Parsed JSON for a session field, or None if it was never set."""
+        with self._lock:
+            sess = self._session(sid)
+            self._refresh(sess, field)
+            return sess.data[field]
+
+    def set(self, sid: str, field: str, value):
+        with self._lock:
+            sess = self._session(sid)
+            sess.data[field] = value
+            sess.dirty.add(field)
+            if not self.write_behind:
+                self._write(sess, field)
+
+    def flush(self):
+        with self._lock:
+            for sess in self._sessions.values():
+                self._flush_session(sess)
+
+    def _flush_loop(self):
+        event = threading.Event()
+        while not event.wait(FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ Warning: session flush failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "dirty": sum(len(s.dirty) for s in self._sessions.values()),
+                "write_behind": self.write_behind,
+            }
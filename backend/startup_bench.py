@@ -0,0 +1,78 @@
+"""
+Cold-start check for the backend.
+
+Imports app.py in fresh interpreters with `python -X importtime`, prints the
+slowest modules and the median startup time, and exits non-zero if a heavy
+dependency is imported at startup or the budget is exceeded:
+
+    python startup_bench.py                  # 5 runs, report + checks
+    python startup_bench.py --top 30 --budget-ms 800
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ---------------- CONFIG ----------------
+# Must only be imported by the endpoints that use them
+LAZY_MODULES = ["docx", "openpyxl", "numpy", "PyPDF2", "reportlab", "google.generativeai", "docx2pdf"]
+STARTUP_BUDGET_MS = 1500
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def import_profile(module: str = "app") -> tuple:
+    """One cold import; returns (wall seconds, {module: (self_us, cumulative_us)})."""
+    # Run from an empty directory so app.py's SQLite/cache files stay out of the repo
+    with tempfile.TemporaryDirectory(prefix="startup_bench_") as cwd:
+        env = dict(os.environ, PYTHONPATH=str(BACKEND_DIR), LLM_BACKEND="replay")
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=cwd, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ import {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return elapsed, modules
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--runs", type=int, default=5)
+    cli.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    cli.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = cli.parse_args()
+
+    runs = [import_profile() for _ in range(args.runs)]
+    times = sorted(t for t, _ in runs)
+    median = times[len(times) // 2]
+    _, modules = runs[-1]
+
+    print(f"Slowest imports (cumulative, last run of {args.runs}):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda kv: -kv[1][1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}")
+    print(f"Startup: median {median * 1000:.0f} ms, min {times[0] * 1000:.0f} ms, max {times[-1] * 1000:.0f} ms")
+
+    failures = []
+    eager = [m for m in LAZY_MODULES if m in modules]
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if median * 1000 > args.budget_ms:
+        failures.append(f"median startup {median * 1000:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        raise SystemExit(1)
+    print("✅ No heavy imports at startup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import json
+import time
+
+from flask import Response
+
+from llm import cancel_stream
+
+# ---------------- CONFIG ----------------
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",   # keep proxies from buffering the stream
+}
+
+
+def sse(data, event: str = None) -> str:
+    """Format one Server-Sent Event."""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_model(model, prompt, finish=None):
+    """
+    Generator of SSE strings for a streaming model call.
+
+    Emits {"text": chunk} events as tokens arrive, then a "done" event whose
+    data is finish(full_text) (or {"text": full_text}). If the client goes
+    away, the generator is closed and the upstream request is cancelled.
+    """
+    start = time.perf_counter()
+    stream = None
+    parts = []
+    completed = False
+    try:
+        stream = model.generate_content(prompt, stream=True)
+        for chunk in stream:
+            text = getattr(chunk, "text", "")
+            if not text:
+                continue
+            if not parts:
+                yield sse({"ttft_ms": round((time.perf_counter() - start) * 1000)}, event="first_token")
+            parts.append(text)
+            yield sse({"text": text})
+        full_text = "".join(parts)
+        try:
+            result = finish(full_text) if finish else {"text": full_text.strip()}
+        except Exception as e:
+            yield sse({"error": str(e), "text": full_text}, event="error")
+        else:
+            yield sse(result, event="done")
+        completed = True
+    except Exception as e:
+        yield sse({"error": str(e)}, event="error")
+        completed = True
+    finally:
+        # Not completed means the client went away mid-stream (GeneratorExit)
+        if not completed and stream is not None:
+            cancel_stream(stream)
+
+
+def sse_response(events) -> Response:
+    return Response(events, mimetype="text/event-stream", headers=SSE_HEADERS)
@@ -1,16 +1,34 @@
+import argparse
 import json
-import google.generativeai as genai
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from cache import ResultCache, make_key, normalize_text
+from jd_index import JDIndex
+from ledger import name_key
+from llm import model_id
+from output import RESUME_SCHEMA, generate_json
+from prompts import SECTION_CONTEXT_TOKEN_BUDGET, TAILOR_TOKEN_BUDGET, resume_context
+from scheduler import current_priority, with_priority
 
 # ---------------- CONFIG ----------------
-genai.configure(api_key="Gemini_API")   # TODO: replace with your Gemini API key
-model = genai.GenerativeModel("gemini-1.5-flash")  # use flash (higher free quota)
+# Batch tailoring: parallel Gemini calls per batch (raise until quota errors appear)
+BATCH_CONCURRENCY = 4
+MAX_BATCH_CONCURRENCY = 16
 
-# ---------------- HELPER ----------------
-def tailor_resume(resume_json: dict, job_description: str) -> dict:
-    """
-    Tailor resume JSON based on JD using Gemini rules
-    """
-    rules = """
+# Section-parallel tailoring: parallel Gemini calls per resume, retries per section
+SECTION_CONCURRENCY = 6
+SECTION_RETRIES = 2
+
+# Near-duplicate JDs (reposts, re-scrapes), by estimated Jaccard similarity of word 3-grams
+REUSE_THRESHOLD = 0.9      # at or above, same company + role: serve the earlier tailored resume as-is
+SEED_THRESHOLD = 0.75      # at or above, any job: tailor starting from the earlier tailored resume
+PLACEHOLDER_JOB = ("Company", "Role")   # what requests without a company / role fall back to
+
+# Bump whenever RULES or SECTION_RULES change so old cached tailorings are not served.
+RULES_VERSION = "1"
+RULES = """
     You are a professional resume writer. Rewrite the provided resume JSON following these rules:
     1. Keep Details (Name, Email, Phone, Location, LinkedIn, GitHub) the SAME.
     Rules:  
@@ -36,11 +54,107 @@ rewrite the skills section to include all relevant keywords from the JD max 20 s
 - Do not repeat the same action verb across bullets within the same section.  
     """
 
+# Per-section rules for mode="sections"; each section is rewritten on its own.
+SECTION_RULES = {
+    "Summary": """
+    Rewrite the resume Summary for the job description:
+- Start with my professional identity (degree/role + years of experience).
+- Middle: Highlight my top technical skills and 1–2 achievements that best match the job description.
+- End: Mention my career goal and how I bring value to this specific role/company.
+- Keep it concise, ATS-friendly, and tailored to the given JD.
+    Return ONLY JSON: {"Summary": "..."}
+    """,
+    "Skills": """
+    Rewrite the Skills list to include all relevant keywords from the JD, max 20 skills.
+    Return ONLY JSON: {"Skills": ["...", "..."]}
+    """,
+    "Work Experience": """
+    Rewrite this ONE work experience entry for the job description:
+- Keep "Company Name", "Role" and "Date" exactly the same.
+- Exactly 4 bullet points, each 15 - 25 words, each starting with a distinct strong action verb.
+- Use STAR (Situation, Task, Action, Result); prioritize metrics and technologies that align with the JD.
+- Use past tense for past roles, present tense for current.
+    Return ONLY the entry as a JSON object with the same keys.
+    """,
+    "Project Experience": """
+    Rewrite this ONE project entry for the job description:
+- Keep "Title" and "Tech Stack" exactly the same.
+- Exactly 3 bullet points, each 15 - 25 words, each starting with a distinct strong action verb.
+- Use STAR (Situation, Task, Action, Result); make the wording ATS-friendly with keywords from the JD.
+    Return ONLY the entry as a JSON object with the same keys.
+    """,
+}
+
+tailor_cache = ResultCache("tailor")
+# Every tailored JD -> the tailor_cache key of its result
+jd_index = JDIndex(threshold=SEED_THRESHOLD)
+
+def job_key(company: str, role: str):
+    """Normalized "company | role" for the JD index, or None if either is missing."""
+    if not company or not role or company == PLACEHOLDER_JOB[0] or role == PLACEHOLDER_JOB[1]:
+        return None
+    return f"{name_key(company)} | {name_key(role)}"
+
+def tailor_resume(resume_json: dict, job_description: str, use_cache: bool = True,
+                  prompt_report: dict = None, mode: str = "full",
+                  reuse_report: dict = None, company: str = None, role: str = None) -> dict:
+    """
+    Tailor resume JSON based on JD using Gemini rules.
+    Results are cached on (resume, normalized JD, rules version, model);
+    pass use_cache=False to force a fresh generation. If prompt_report is a
+    dict it is filled with the prompt token estimates for this call.
+
+    On an exact cache miss the JD index is checked for a near-duplicate JD
+    tailored earlier with the same resume and rules. One for the same
+    company and role above REUSE_THRESHOLD is returned as-is; otherwise one
+    for any job above SEED_THRESHOLD is the starting point for the rewrite
+    (full mode only), since another company's resume should not be sent
+    out unchanged. reuse_report, if a dict, gets the similarity and what
+    was reused.
+
+    mode="sections" rewrites Summary, Skills and every experience/project
+    entry as separate concurrent calls (see tailor_sections).
+    """
+    key_parts = [resume_json, normalize_text(job_description), RULES_VERSION, model_id()]
+    if mode == "sections":
+        key_parts.append("sections")
+    key = make_key(*key_parts)
+    scope = make_key(resume_json, RULES_VERSION, model_id(), mode)
+    job = job_key(company, role)
+    seed = None
+    if use_cache:
+        cached = tailor_cache.get(key)
+        if cached is not None:
+            return cached
+        same_job = jd_index.lookup(scope, job_description, REUSE_THRESHOLD, job=job) if job else None
+        prior = tailor_cache.get(same_job[0]) if same_job else None
+        if prior is not None:
+            if reuse_report is not None:
+                reuse_report.update({"similarity": round(same_job[1], 3), "reused": "result"})
+            tailor_cache.set(key, prior)
+            return prior
+        near = jd_index.lookup(scope, job_description) if mode == "full" else None
+        seed = tailor_cache.get(near[0]) if near else None
+        if seed is not None and reuse_report is not None:
+            reuse_report.update({"similarity": round(near[1], 3), "reused": "seed"})
+
+    if mode == "sections":
+        tailored_json = tailor_sections(resume_json, job_description)
+        tailor_cache.set(key, tailored_json)
+        jd_index.add(scope, job_description, key, job=job)
+        return tailored_json
+
+    # The earlier tailoring already fits most of this JD; the rules keep Details unchanged.
+    # The model's output replaces the resume, so it gets the whole thing (compact, not pruned).
+    resume_text, report = resume_context(seed or resume_json, job_description, TAILOR_TOKEN_BUDGET)
+    if prompt_report is not None:
+        prompt_report.update(report)
+
     prompt = f"""
-    {rules}
+    {RULES}
 
     --- Resume JSON ---
-    {json.dumps(resume_json, indent=2)}
+    {resume_text}
 
     --- Job Description ---
     {job_description}
@@ -48,30 +162,176 @@ rewrite the skills section to include all relevant keywords from the JD max 20 s
     Now return ONLY the new tailored resume in JSON format.
     """
 
-    response = model.generate_content(prompt)
+    tailored_json = generate_json(prompt, RESUME_SCHEMA)
+
+    tailor_cache.set(key, tailored_json)
+    jd_index.add(scope, job_description, key, job=job)
+    return tailored_json
+
 
-    # Clean markdown code fences if Gemini wraps the JSON
-    resp_text = response.text.strip()
-    if resp_text.startswith("```"):
-        # split into blocks and take only JSON inside
-        parts = resp_text.split("```")
-        if len(parts) >= 2:
-            resp_text = parts[1]
-        # remove optional 'json\n' prefix
-        if resp_text.lower().startswith("json"):
-            resp_text = resp_text[4:]
-        resp_text = resp_text.strip()
+# ---------------- SECTION-PARALLEL ----------------
+def _section_tasks(resume_json: dict) -> list:
+    """(section, index or None, input JSON) for every independently tailored piece."""
+    tasks = []
+    if resume_json.get("Summary"):
+        tasks.append(("Summary", None, {"Summary": resume_json["Summary"]}))
+    if resume_json.get("Skills"):
+        tasks.append(("Skills", None, {"Skills": resume_json["Skills"]}))
+    for section in ("Work Experience", "Project Experience"):
+        for i, entry in enumerate(resume_json.get(section, [])):
+            tasks.append((section, i, entry))
+    return tasks
+
+
+def _check_section(section: str, original, result):
+    """Validate one section result; returns the value to merge or raises ValueError."""
+    if section == "Summary":
+        if not isinstance(result, dict) or not isinstance(result.get("Summary"), str):
+            raise ValueError('expected {"Summary": "..."}')
+        return result["Summary"]
+    if section == "Skills":
+        skills = result.get("Skills") if isinstance(result, dict) else None
+        if not isinstance(skills, list) or not all(isinstance(x, str) for x in skills):
+            raise ValueError('expected {"Skills": [...]}')
+        return skills
+    if not isinstance(result, dict) or not isinstance(result.get("Bullet Points"), list):
+        raise ValueError('expected an entry object with "Bullet Points"')
+    # Headers must not drift even if the model rewrote them
+    merged = dict(original)
+    merged["Bullet Points"] = [str(b) for b in result["Bullet Points"]]
+    return merged
+
+
+def _tailor_section(section: str, original, job_description: str, context: str):
+    prompt = f"""
+    You are a professional resume writer.
+    {SECTION_RULES[section]}
 
+    --- Candidate resume (context only) ---
+    {context}
+
+    --- {section} to rewrite ---
+    {json.dumps(original, ensure_ascii=False)}
+
+    --- Job Description ---
+    {job_description}
+    """
+    return _check_section(section, original, generate_json(prompt))
+
+
+def tailor_sections(resume_json: dict, job_description: str,
+                    concurrency: int = SECTION_CONCURRENCY) -> dict:
+    """
+    Tailor Summary, Skills and each Work/Project entry concurrently and merge
+    them back into the resume schema. Latency is bounded by the slowest
+    section; a section that fails is retried on its own, up to
+    SECTION_RETRIES times. Details, Education and Achievements are kept as-is.
+    Action verbs are only de-duplicated within an entry, not across entries.
+    """
+    tasks = _section_tasks(resume_json)
+    # Context only: each rewritten section is sent in full in its own prompt
+    context, _ = resume_context(resume_json, job_description, SECTION_CONTEXT_TOKEN_BUDGET)
+    results = {}
+    errors = {}
+
+    pending = list(range(len(tasks)))
+    # Section calls keep the caller's scheduler priority
+    tailor_section = with_priority(current_priority(), _tailor_section)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for attempt in range(SECTION_RETRIES + 1):
+            futures = {
+                pool.submit(tailor_section, tasks[t][0], tasks[t][2], job_description, context): t
+                for t in pending
+            }
+            pending = []
+            for future in as_completed(futures):
+                t = futures[future]
+                try:
+                    results[t] = future.result()
+                    errors.pop(t, None)
+                except Exception as e:
+                    errors[t] = str(e)
+                    pending.append(t)
+            if not pending:
+                break
+
+    if errors:
+        failed = ", ".join(
+            tasks[t][0] + (f" #{tasks[t][1] + 1}" if tasks[t][1] is not None else "") for t in sorted(errors)
+        )
+        raise ValueError(f"Tailoring failed for: {failed} ({next(iter(errors.values()))})")
+
+    tailored = json.loads(json.dumps(resume_json))
+    for t, (section, index, _) in enumerate(tasks):
+        if index is None:
+            tailored[section] = results[t]
+        else:
+            tailored[section][index] = results[t]
+    return tailored
+
+
+def _item_names(items: list) -> list:
+    """(company, role, file stem) per batch item; repeated company_role stems get _2, _3, ..."""
+    names, seen = [], {}
+    for item in items:
+        company = str(item.get("company") or PLACEHOLDER_JOB[0]).strip().replace(" ", "_")
+        role = str(item.get("role") or PLACEHOLDER_JOB[1]).strip().replace(" ", "_")
+        stem = f"{company}_{role}"
+        seen[stem] = seen.get(stem, 0) + 1
+        if seen[stem] > 1:
+            stem = f"{stem}_{seen[stem]}"
+        names.append((company, role, stem))
+    return names
+
+
+def _tailor_item(resume_json: dict, index: int, item: dict, name: tuple, out_dir: Path, formats) -> dict:
+    """Tailor + render one batch item. Never raises; errors go into the result."""
+    from writer import build_doc, render_pdf
+    company, role, stem = name
+    result = {"index": index, "company": company, "role": role}
+    start = time.perf_counter()
     try:
-        tailored_json = json.loads(resp_text)
-    except Exception:
-        raise ValueError("Gemini response could not be parsed as JSON:\n" + resp_text)
+        tailored = tailor_resume(resume_json, item["jd_text"], company=company, role=role)
+        docx_path = Path(out_dir) / f"{stem}.docx"
+        build_doc(tailored, docx_path)
+        result["docx"] = str(docx_path)
+        if "pdf" in formats:
+            result["pdf"] = str(render_pdf(tailored, docx_path, out_dir))
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
 
-    return tailored_json
+
+def tailor_batch(resume_json: dict, items: list, concurrency: int = BATCH_CONCURRENCY,
+                 out_dir: Path = Path("Resumes"), formats=("docx",)):
+    """
+    Tailor the resume against many {jd_text, company, role} items using at most
+    `concurrency` parallel Gemini calls. Yields one result dict per item in
+    completion order; a failed item yields status "error" and the batch goes on.
+    Items with the same company + role are written to <company>_<role>_2.docx
+    and so on, so they do not overwrite each other.
+    The calls are queued as "bulk", behind chat and single tailoring requests.
+    """
+    Path(out_dir).mkdir(exist_ok=True)
+    tailor_item = with_priority("bulk", _tailor_item)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(tailor_item, resume_json, i, item, name, out_dir, formats)
+                   for i, (item, name) in enumerate(zip(items, _item_names(items)))]
+        for future in as_completed(futures):
+            yield future.result()
 
 
 # ---------------- RUN EXAMPLE ----------------
 if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Tailor resume_fixed.json to jd.txt, or to a batch of JDs.")
+    cli.add_argument("--batch", help="JSON file with a list of {jd_text, company, role} items")
+    cli.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    cli.add_argument("--pdf", action="store_true", help="also convert each DOCX to PDF")
+    args = cli.parse_args()
+
     # Load resume.json
     with open("resume_fixed.json", "r", encoding="utf-8") as f:
         content = f.read().strip()
@@ -79,6 +339,20 @@ if __name__ == "__main__":
     content = content.replace("```json", "").replace("```", "").strip()
     resume_data = json.loads(content)
 
+    if args.batch:
+        items = json.loads(Path(args.batch).read_text(encoding="utf-8"))
+        formats = ("docx", "pdf") if args.pdf else ("docx",)
+        start = time.perf_counter()
+        failed = 0
+        for result in tailor_batch(resume_data, items, args.concurrency, formats=formats):
+            if result["status"] == "ok":
+                print(f"✅ [{result['index']}] {result['company']}_{result['role']} ({result['seconds']}s)")
+            else:
+                failed += 1
+                print(f"❌ [{result['index']}] {result['company']}_{result['role']}: {result['error']}")
+        print(f"Done: {len(items) - failed}/{len(items)} in {time.perf_counter() - start:.1f}s")
+        raise SystemExit(1 if failed else 0)
+
     # Load jd.txt
     try:
         with open("jd.txt", "r", encoding="utf-8") as f:
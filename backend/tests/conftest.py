@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend modules import each other as top-level modules (python app.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory: several modules write their stores relative to the cwd."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The Flask app, imported inside a scratch directory (it opens its stores on import)."""
+    import os
+    old = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        import app
+        yield app
+    finally:
+        os.chdir(old)
+
+
+@pytest.fixture
+def client(app_module, sample_resume):
+    app_module.sessions.set("default", "resume", sample_resume)
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def use_model(monkeypatch):
+    """use_model(provider, **limits) swaps the shared model client for this test only."""
+    import llm
+    monkeypatch.setattr(llm, "_model", llm._model)
+
+    def use(provider, **limits):
+        llm.set_model(provider, **{"rpm": 0, "tpm": 0, **limits})
+        return provider
+    return use
+
+
+@pytest.fixture
+def sample_resume():
+    """A resume_fixed.json-shaped resume touching every section the writers render."""
+    return {
+        "Details": {"Name": "Jane Doe", "Email": "jane@example.com", "Phone": "555-0100",
+                    "Location": "Austin, TX", "LinkedIn": "linkedin.com/in/jane", "GitHub": "github.com/jane"},
+        "Summary": "Backend engineer building data pipelines and ML services in Python.",
+        "Skills": ["Python", "SQL", "Docker", "Kubernetes", "ML/AI"],
+        "Work Experience": [
+            {"Company Name": "Acme Corp", "Role": "Software Engineer", "Date": "Jan 2021 – Present",
+             "Bullet Points": ["Built ETL pipelines in Python moving 2 TB a day",
+                               "Cut API latency 40% with Redis caching"]},
+            {"Company Name": "Initech", "Role": "Intern", "Date": "Summer 2020",
+             "Bullet Points": ["Wrote SQL reports for the finance team"]},
+        ],
+        "Project Experience": [
+            {"Title": "Resume Tailor", "Tech Stack": "Flask, Gemini",
+             "Bullet Points": ["Tailors resumes to job descriptions"]},
+        ],
+        "Education": [
+            {"Institution": "UT Austin", "Degree": "B.S. Computer Science", "Date": "2020", "GPA": "3.8"},
+        ],
+        "Achievements and Certifications": ["AWS Certified Developer"],
+    }
+
+
+def wait_for(predicate, timeout: float = 5.0, interval: float = 0.01):
+    """Poll until predicate() is truthy; returns its last value."""
+    import time
+    deadline = time.monotonic() + timeout
+    while True:
+        value = predicate()
+        if value or time.monotonic() > deadline:
+            return value
+        time.sleep(interval)
@@ -0,0 +1,71 @@
+import json
+
+from llm import FakeStreamingModel
+from test_streaming import parse
+
+JD = "Backend engineer: Python, SQL, Docker and Kubernetes. Build ETL pipelines and ML services."
+
+
+def analyze(client, **body):
+    return client.post("/analyze", json={"jd_text": JD, "role": "Backend Engineer", "no_cache": True, **body})
+
+
+def test_analyze_tailors_scores_and_renders(client, app_module, sample_resume, use_model):
+    model = use_model(FakeStreamingModel(reply=json.dumps(sample_resume), interval=0))
+    response = analyze(client, company="Analyze Co", match_mode="local")
+    assert response.status_code == 200
+    result = response.get_json()
+
+    assert result["company"] == "Analyze_Co" and result["role"] == "Backend_Engineer"
+    assert result["files"] == {"docx": "Analyze_Co_Backend_Engineer.docx"}
+    assert (app_module.RESUMES_DIR / result["files"]["docx"]).exists()
+    assert 0 <= result["match"]["score"] <= 100 and "python" in result["match"]["matched"]
+    assert {"match", "tailor", "render_docx", "update_excel"} <= set(result["stages"])
+    assert len(model.prompts) == 1                 # local scoring makes no model call
+    assert app_module.sessions.get("default", "tailored") == sample_resume
+    assert app_module.ledger.find_duplicate("Analyze Co", "Backend Engineer") is not None
+
+
+def test_analyze_stream_events(client, sample_resume, use_model):
+    use_model(FakeStreamingModel(reply=json.dumps(sample_resume), interval=0))
+    response = analyze(client, company="Stream Co", match_mode="local", formats=["docx", "pdf"], stream=True)
+    assert response.mimetype == "text/event-stream"
+    events = parse(chunk for chunk in response.get_data(as_text=True).split("\n\n") if chunk.strip())
+    names = [name for name, _ in events]
+
+    assert names.count("match") == 1 and names.count("tailored") == 1
+    assert [d["format"] for name, d in events if name == "file"] == ["docx", "pdf"]
+    assert names[-1] == "done"
+    assert names.index("tailored") < names.index("file")
+    assert events[-1][1]["files"] == {"docx": "Stream_Co_Backend_Engineer.docx",
+                                      "pdf": "Stream_Co_Backend_Engineer.pdf"}
+
+
+def test_failed_llm_match_is_reported_not_fatal(client, sample_resume, use_model):
+    # The reply is a resume, not {"score", "reason"}: tailoring works, match scoring does not
+    use_model(FakeStreamingModel(reply=json.dumps(sample_resume), interval=0))
+    result = analyze(client, company="Match Fail Co", match_mode="llm").get_json()
+    assert result["match"] is None
+    assert result["match_error"]
+    assert result["files"]["docx"] == "Match_Fail_Co_Backend_Engineer.docx"
+
+
+def test_failed_tailoring_is_an_error(client, use_model):
+    use_model(FakeStreamingModel(reply="Sorry, I can't help with that.", interval=0))
+    response = analyze(client, company="Tailor Fail Co", match_mode="local")
+    assert response.status_code == 500
+    assert response.get_json()["error"].startswith("Tailoring failed")
+
+    streamed = analyze(client, company="Tailor Fail Co", match_mode="local", stream=True)
+    events = parse(chunk for chunk in streamed.get_data(as_text=True).split("\n\n") if chunk.strip())
+    assert events[-1][0] == "error"
+    assert "file" not in [name for name, _ in events]
+
+
+def test_analyze_rejects_bad_requests(client, use_model):
+    model = use_model(FakeStreamingModel(interval=0))
+    assert client.post("/analyze", json={"company": "X"}).status_code == 400
+    assert analyze(client, formats=["rtf"]).status_code == 400
+    assert analyze(client, match_mode="vibes").status_code == 400
+    assert analyze(client, mode="paragraphs").status_code == 400
+    assert model.prompts == []
@@ -0,0 +1,54 @@
+import artifacts
+from artifacts import ArtifactStore
+
+
+def resume(name):
+    return {"Details": {"Name": name}, "Summary": f"{name} builds things."}
+
+
+def test_miss_then_hit(tmp_path):
+    store = ArtifactStore(tmp_path / "store")
+    assert store.materialize(resume("A"), tmp_path / "out" / "Acme_Eng.docx") is False
+    assert store.materialize(resume("A"), tmp_path / "out" / "Acme_Eng.docx") is True
+    assert (tmp_path / "out" / "Acme_Eng.docx").stat().st_size > 0
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["artifacts"]) == (1, 1, 1)
+
+
+def test_changed_resume_replaces_stale_variant(tmp_path):
+    store = ArtifactStore(tmp_path / "store")
+    store.materialize(resume("A"), tmp_path / "Acme_Eng.docx")
+    old_key = store.key(resume("A"))
+    store.materialize(resume("A2"), tmp_path / "Acme_Eng.docx")
+    assert not list((tmp_path / "store").glob(f"{old_key}.*"))
+    assert store.stats()["artifacts"] == 1
+
+
+def test_lru_cap(tmp_path):
+    store = ArtifactStore(tmp_path / "store", max_artifacts=2)
+    for name in "ABC":
+        store.materialize(resume(name), tmp_path / f"{name}.docx")
+    assert store.stats()["artifacts"] == 2
+    assert not list((tmp_path / "store").glob(f"{store.key(resume('A'))}.*"))
+
+
+def test_eviction_skips_artifacts_being_copied(tmp_path, monkeypatch):
+    store = ArtifactStore(tmp_path / "store", max_artifacts=1)
+    store.materialize(resume("A"), tmp_path / "A.docx")
+    copy = artifacts.shutil.copyfile
+    evicting = []
+
+    def copy_while_evicting(src, dst):
+        # Another request renders B and runs eviction between A's render and copy-out
+        if not evicting:
+            evicting.append(1)
+            store.materialize(resume("B"), tmp_path / "B.docx")
+        return copy(src, dst)
+
+    monkeypatch.setattr(artifacts.shutil, "copyfile", copy_while_evicting)
+    assert store.materialize(resume("A"), tmp_path / "A_again.docx") is True
+    assert (tmp_path / "A_again.docx").read_bytes() == (tmp_path / "A.docx").read_bytes()
+
+    monkeypatch.setattr(artifacts.shutil, "copyfile", copy)
+    store.materialize(resume("C"), tmp_path / "C.docx")      # the cap applies again once unpinned
+    assert store.stats()["artifacts"] == 1
@@ -0,0 +1,95 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+import cache
+from cache import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return clock
+
+
+def make(tmp_path, **limits):
+    return ResultCache("test", root=tmp_path, **limits)
+
+
+def test_hit_and_miss(tmp_path):
+    c = make(tmp_path)
+    assert c.get("missing") is None
+    c.set("k", {"answer": 42})
+    assert c.get("k") == {"answer": 42}
+    assert (c.hits, c.misses) == (1, 1)
+
+
+def test_reads_do_not_extend_max_age(tmp_path, clock):
+    c = make(tmp_path, max_age=100)
+    c.set("k", "value")
+    clock.now += 60
+    assert c.get("k") == "value"        # bumps the LRU mtime...
+    clock.now += 60
+    assert c.get("k") is None           # ...but age counts from when it was stored
+    assert not (c.dir / "k.json").exists()
+
+
+def test_entry_without_creation_time_is_a_miss(tmp_path):
+    c = make(tmp_path)
+    (c.dir / "old.json").write_text('"written before creation times"', encoding="utf-8")
+    assert c.get("old") is None
+
+
+def test_evicts_least_recently_used_past_max_entries(tmp_path, clock):
+    c = make(tmp_path, max_entries=10)
+    keys = [f"k{i}" for i in range(10)]
+    for key in keys:
+        c.set(key, key)
+        clock.now += 1
+    assert c.get("k0") == "k0"          # k0 is now the most recently used
+    clock.now += 1
+    c.set("new", "new")                 # 11 > 10: trimmed to 9, oldest first
+    assert c.get("k1") is None and c.get("k2") is None
+    assert [c.get(k) for k in keys[3:]] == keys[3:]
+    assert c.get("k0") == "k0" and c.get("new") == "new"
+
+
+def test_evicts_past_max_bytes(tmp_path, clock):
+    c = make(tmp_path, max_bytes=1000)
+    for i in range(10):
+        c.set(f"k{i}", "x" * 150)
+        clock.now += 1
+    assert c.stats()["bytes"] <= 1000
+    assert c.get("k9") is not None
+    assert c.get("k0") is None
+
+
+def test_writes_under_the_limits_do_not_scan_the_directory(tmp_path, monkeypatch):
+    c = make(tmp_path)
+    globs = []
+    glob = Path.glob
+    monkeypatch.setattr(Path, "glob", lambda self, pattern: globs.append(pattern) or glob(self, pattern))
+    for i in range(20):
+        c.set(f"k{i}", i)
+    assert len(globs) == 1              # the first write counts what is already there
+
+
+def test_totals_follow_overwrites_and_deletes(tmp_path):
+    c = make(tmp_path)
+    c.set("k", "short")
+    c.set("k", "a much longer value")
+    c.set("other", 1)
+    c.delete("other")
+    assert c._entries == 1
+    assert c._bytes == os.path.getsize(c.dir / "k.json")
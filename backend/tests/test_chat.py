@@ -0,0 +1,48 @@
+import copy
+
+from llm import FakeStreamingModel
+
+
+def ask(client, question, **extra):
+    response = client.post("/chat", json={"question": question, **extra})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_repeat_question_is_served_from_cache(client, use_model):
+    model = use_model(FakeStreamingModel(reply="  Four years of Python.  ", interval=0))
+    first = ask(client, "How many years of Python do you have?")
+    assert first == {"answer": "Four years of Python.", "prompt_tokens": first["prompt_tokens"], "cached": False}
+
+    # Case and punctuation do not change the question
+    again = ask(client, "how many years of python do you have")
+    assert again == {"answer": "Four years of Python.", "prompt_tokens": None, "cached": True}
+    assert len(model.prompts) == 1
+
+    assert ask(client, "How many years of Python do you have?", no_cache=True)["cached"] is False
+    assert len(model.prompts) == 2
+
+
+def test_changed_resume_invalidates_cached_answer(client, app_module, sample_resume, use_model):
+    model = use_model(FakeStreamingModel(reply="ETL pipelines.", interval=0))
+    question = "What pipelines did you build at Acme?"
+    assert ask(client, question)["cached"] is False
+    assert ask(client, question)["cached"] is True
+
+    updated = copy.deepcopy(sample_resume)
+    updated["Work Experience"][0]["Bullet Points"][0] = "Built ETL pipelines in Python moving 5 TB a day"
+    app_module.sessions.set("default", "resume", updated)
+    assert ask(client, question)["cached"] is False
+    assert len(model.prompts) == 2
+    assert "5 TB" in model.prompts[1]
+
+
+def test_prompt_is_built_from_retrieved_sections(client, use_model):
+    model = use_model(FakeStreamingModel(reply="Finance SQL reports.", interval=0))
+    result = ask(client, "What SQL reports did you write at Initech?")
+    prompt = model.prompts[0]
+
+    assert "Work Experience: Initech | Intern" in result["prompt_tokens"]["sections"]
+    assert "finance team" in prompt and "Jane Doe" in prompt       # best match + Details
+    assert "Redis caching" not in prompt                           # Acme entry did not match
+    assert "Resume Tailor" not in prompt
@@ -0,0 +1,105 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from cache import ResultCache
+from jd_index import JDIndex
+from llm import FakeStreamingModel
+
+_rng = random.Random(7)
+WORDS = [f"word{i}" for i in range(400)]
+JD = " ".join(_rng.choice(WORDS) for _ in range(300))
+REPOST = JD.replace(JD.split()[150], "changed", 1)          # one word edited
+UNRELATED = " ".join(_rng.choice(WORDS) for _ in range(300))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return JDIndex(tmp_path / "jd_index", threshold=0.75)
+
+
+def test_near_duplicate_is_found_in_scope_only(index):
+    index.add("resume-a", JD, "key-1")
+    value, similarity = index.lookup("resume-a", REPOST)
+    assert value == "key-1" and similarity >= 0.9
+    assert index.lookup("resume-b", REPOST) is None
+    assert index.lookup("resume-a", UNRELATED) is None
+
+
+def test_job_lookup_skips_other_jobs(index):
+    index.add("scope", JD, "acme", job="acme | engineer")
+    index.add("scope", JD, "untagged")
+    assert index.lookup("scope", REPOST, job="acme | engineer")[0] == "acme"
+    assert index.lookup("scope", REPOST, job="initech | engineer") is None
+    assert index.lookup("scope", REPOST)[0] in ("acme", "untagged")
+
+
+def test_entries_survive_a_reload(index, tmp_path):
+    index.add("scope", JD, "key-1", job="acme | engineer")
+    reloaded = JDIndex(tmp_path / "jd_index")
+    assert reloaded.lookup("scope", REPOST, job="acme | engineer")[0] == "key-1"
+
+
+# ---------------- reuse in tailor_resume ----------------
+@pytest.fixture
+def tailor(app_module, tmp_path, monkeypatch):
+    """tailor.py with a fresh cache + JD index (imported via the app so its stores open in the scratch dir)."""
+    import tailor
+    monkeypatch.setattr(tailor, "tailor_cache", ResultCache("tailor", root=tmp_path))
+    monkeypatch.setattr(tailor, "jd_index", JDIndex(tmp_path / "jd_index", threshold=tailor.SEED_THRESHOLD))
+    return tailor
+
+
+@pytest.fixture
+def tailoring(tailor, use_model, sample_resume):
+    """A model that returns the sample resume."""
+    return use_model(FakeStreamingModel(reply=json.dumps(sample_resume), interval=0))
+
+
+def test_repost_for_the_same_job_reuses_the_result(tailor, tailoring, sample_resume):
+    first = tailor.tailor_resume(sample_resume, JD, company="Acme_Corp", role="Backend Engineer")
+    report = {}
+    again = tailor.tailor_resume(sample_resume, REPOST, company="acme corp", role="backend_engineer",
+                                 reuse_report=report)
+    assert again == first
+    assert report["reused"] == "result"
+    assert len(tailoring.prompts) == 1
+
+
+def test_similar_jd_for_another_company_is_only_a_seed(tailor, tailoring, sample_resume):
+    tailor.tailor_resume(sample_resume, JD, company="Acme Corp", role="Backend Engineer")
+    report = {}
+    tailor.tailor_resume(sample_resume, REPOST, company="Initech", role="Backend Engineer", reuse_report=report)
+    assert report["reused"] == "seed"
+    assert len(tailoring.prompts) == 2
+
+
+def test_unknown_job_is_never_served_as_is(tailor, tailoring, sample_resume):
+    tailor.tailor_resume(sample_resume, JD, company="Acme Corp", role="Backend Engineer")
+    report = {}
+    tailor.tailor_resume(sample_resume, REPOST, company="Company", role="Role", reuse_report=report)
+    assert report["reused"] == "seed"
+    assert len(tailoring.prompts) == 2
+
+
+def test_unrelated_jd_is_not_reused(tailor, tailoring, sample_resume):
+    tailor.tailor_resume(sample_resume, JD, company="Acme Corp", role="Backend Engineer")
+    report = {}
+    tailor.tailor_resume(sample_resume, UNRELATED, company="Acme Corp", role="Backend Engineer",
+                         reuse_report=report)
+    assert report == {}
+    assert len(tailoring.prompts) == 2
+
+
+def test_batch_items_for_the_same_job_get_their_own_files(tailor, tailoring, sample_resume, tmp_path):
+    items = [{"jd_text": JD, "company": "Acme Corp", "role": "Engineer"},
+             {"jd_text": UNRELATED, "company": "Acme Corp", "role": "Engineer"},
+             {"jd_text": JD, "company": "Initech", "role": "Engineer"}]
+    results = sorted(tailor.tailor_batch(sample_resume, items, out_dir=tmp_path / "out"),
+                     key=lambda r: r["index"])
+    assert [r["status"] for r in results] == ["ok"] * 3
+    assert [Path(r["docx"]).name for r in results] == [
+        "Acme_Corp_Engineer.docx", "Acme_Corp_Engineer_2.docx", "Initech_Engineer.docx"]
+    assert all(Path(r["docx"]).exists() for r in results)
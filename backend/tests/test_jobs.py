@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from conftest import wait_for
+from jobs import CANCELLED, DONE, FAILED, QUEUED, JobQueue, QueueFull
+from llm import FakeStreamingModel
+
+
+def finished(queue, job_id):
+    job = queue.get(job_id)
+    return job if job["status"] not in (QUEUED, "running") else None
+
+
+def test_job_runs_model_and_stores_result(workdir):
+    queue = JobQueue(workdir / "jobs.sqlite3", workers=1)
+    model = FakeStreamingModel(reply="tailored", interval=0)
+
+    def tailor(job, prompt):
+        with job.stage("model"):
+            return {"text": model.generate_content(prompt).text}
+
+    job_id = queue.submit("tailor", tailor, "a prompt")
+    job = wait_for(lambda: finished(queue, job_id))
+    assert job["status"] == DONE
+    assert job["result"] == {"text": "tailored"}
+    assert "model" in job["stages"]
+    assert model.prompts == ["a prompt"]
+
+
+def test_failing_job_records_error(workdir):
+    queue = JobQueue(workdir / "jobs.sqlite3", workers=1)
+
+    def boom(job):
+        raise ValueError("bad resume")
+
+    job_id = queue.submit("upload", boom)
+    job = wait_for(lambda: finished(queue, job_id))
+    assert job["status"] == FAILED
+    assert job["error"] == "bad resume"
+
+
+def test_cancel_while_queued_discards_without_running(workdir):
+    queue = JobQueue(workdir / "jobs.sqlite3", workers=1)
+    release = threading.Event()
+    ran, discarded = [], []
+
+    blocker = queue.submit("tailor", lambda job: release.wait(5))
+    job_id = queue.submit("upload", lambda job: ran.append(1), on_discard=lambda: discarded.append(1))
+    assert queue.cancel(job_id)
+    release.set()
+
+    wait_for(lambda: finished(queue, blocker))
+    assert wait_for(lambda: discarded)
+    assert queue.get(job_id)["status"] == CANCELLED
+    assert ran == []
+
+
+def test_running_job_stops_at_next_stage_when_cancelled(workdir):
+    queue = JobQueue(workdir / "jobs.sqlite3", workers=1)
+    started = threading.Event()
+
+    def slow(job):
+        with job.stage("first"):
+            started.set()
+        while True:
+            with job.stage("poll"):
+                time.sleep(0.01)
+
+    job_id = queue.submit("tailor", slow)
+    assert started.wait(5)
+    queue.cancel(job_id)
+    assert wait_for(lambda: finished(queue, job_id))["status"] == CANCELLED
+
+
+def test_queue_full(workdir):
+    queue = JobQueue(workdir / "jobs.sqlite3", workers=1, max_pending=1)
+    release = threading.Event()
+    queue.submit("tailor", lambda job: release.wait(5))
+    with pytest.raises(QueueFull):
+        queue.submit("tailor", lambda job: None)
+    release.set()
+
+
+def test_restart_fails_only_jobs_of_dead_owners(workdir):
+    db = workdir / "jobs.sqlite3"
+    queue = JobQueue(db, workers=0)
+    host = queue.host
+    live_owner = f"{host}:{os.getppid()}:abcd1234"         # the test runner's parent is alive
+    dead_owner = f"{host}:{2 ** 22 + 1}:abcd1234"           # above the default pid_max
+    other_host = "some-other-host:1:abcd1234"
+    with sqlite3.connect(db) as conn:
+        for job_id, owner in (("live", live_owner), ("dead", dead_owner),
+                              ("legacy", None), ("remote", other_host)):
+            conn.execute("INSERT INTO jobs (id, kind, status, created, owner) VALUES (?, 'tailor', ?, 0, ?)",
+                         (job_id, QUEUED, owner))
+
+    JobQueue(db, workers=0)
+    status = {job_id: queue.get(job_id)["status"] for job_id in ("live", "dead", "legacy", "remote")}
+    assert status == {"live": QUEUED, "dead": FAILED, "legacy": FAILED, "remote": QUEUED}
@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from ledger import ApplicationLedger, parse_date
+from llm import FakeStreamingModel
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return ApplicationLedger(tmp_path / "applications.sqlite3")
+
+
+def page_all(ledger, **filters):
+    """Every page of a query, following next_cursor."""
+    pages, cursor = [], None
+    while True:
+        page = ledger.query(cursor=cursor, **filters)
+        pages.append(page["applications"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_every_row_once(ledger):
+    ids = [ledger.append(f"Company {i}", "Engineer") for i in range(23)]
+    pages = page_all(ledger, limit=5)
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 3]
+    assert [row["id"] for page in pages for row in page] == sorted(ids, reverse=True)
+
+
+def test_exact_multiple_of_page_size_has_no_empty_page(ledger):
+    for i in range(10):
+        ledger.append(f"Company {i}", "Engineer")
+    assert [len(p) for p in page_all(ledger, limit=5)] == [5, 5]
+
+
+def test_new_rows_do_not_shift_later_pages(ledger):
+    for i in range(10):
+        ledger.append(f"Company {i}", "Engineer")
+    first = ledger.query(limit=4)
+    ledger.append("Newcomer", "Engineer")
+    second = ledger.query(limit=4, cursor=first["next_cursor"])
+    assert second["applications"][0]["id"] == first["applications"][-1]["id"] - 1
+
+
+def test_filters(ledger):
+    ledger.append("Acme Corp", "Data Engineer")
+    ledger.append("acme_corp", "Data  Engineer", status="Interview")
+    ledger.append("Initech", "Data Engineer")
+    assert len(ledger.query(company="ACME corp")["applications"]) == 2
+    assert [r["company"] for r in ledger.query(company="acme corp", status="Interview")["applications"]] == ["acme_corp"]
+    assert len(ledger.query(role="data engineer")["applications"]) == 3
+
+
+def test_date_filters(ledger):
+    old = ledger.append("Old Co", "Engineer")
+    new = ledger.append("New Co", "Engineer")
+    with sqlite3.connect(ledger.db_path) as conn:
+        conn.execute("UPDATE applications SET created = ? WHERE id = ?", (parse_date("2024-01-15", "%Y-%m-%d") + 3600, old))
+    assert [r["id"] for r in ledger.query(date_to="2024-01-15")["applications"]] == [old]
+    assert [r["id"] for r in ledger.query(date_from="2024-01-16")["applications"]] == [new]
+    with pytest.raises(ValueError):
+        ledger.query(date_from="15/01/2024")
+
+
+def test_limit_is_clamped(ledger):
+    for i in range(3):
+        ledger.append(f"Company {i}", "Engineer")
+    assert len(ledger.query(limit=0)["applications"]) == 1
+
+
+def test_record_is_idempotent_across_threads(ledger):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ledger.record("Acme", "Engineer")))
+               for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(created for _, created in results) == 1
+    assert ledger.count() == 1
+
+
+def test_status_transitions(ledger):
+    app_id = ledger.append("Acme", "Engineer")
+    assert ledger.update_status(app_id, "Interview")["status"] == "Interview"
+    with pytest.raises(ValueError):
+        ledger.update_status(app_id, "Applied")
+    with pytest.raises(ValueError):
+        ledger.update_status(app_id, "Hired")
+    with pytest.raises(KeyError):
+        ledger.update_status(app_id + 100, "Offer")
+
+
+def test_applications_endpoint_pages(client, app_module):
+    for i in range(7):
+        app_module.ledger.append(f"Paging Co {i}", "Engineer")
+    first = client.get("/applications?limit=3").get_json()
+    second = client.get(f"/applications?limit=3&cursor={first['next_cursor']}").get_json()
+    assert len(first["applications"]) == len(second["applications"]) == 3
+    assert first["applications"][-1]["id"] > second["applications"][0]["id"]
+    assert client.get("/applications?date_from=yesterday").status_code == 400
+
+
+def test_duplicate_tailor_warns_unless_blocking(client, app_module, sample_resume, use_model):
+    app_module.ledger.append("Dup Co", "Backend Engineer")
+    model = use_model(FakeStreamingModel(reply=json.dumps(sample_resume), interval=0))
+    body = {"jd_text": "Python backend role", "company": "Dup Co", "role": "Backend Engineer", "no_cache": True}
+
+    blocked = client.post("/tailor", json={**body, "block_duplicates": True})
+    assert blocked.status_code == 409
+    assert blocked.get_json()["application"]["company"] == "Dup Co"
+    assert model.prompts == []
+
+    response = client.post("/tailor", json=body)
+    assert response.status_code == 200
+    assert "Already applied to Dup Co" in response.get_json()["duplicate"]["warning"]
+
+
+def test_connections_are_closed(ledger, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+    monkeypatch.setattr(sqlite3, "connect", tracking_connect)
+
+    ledger.record("Closing Co", "Engineer")
+    ledger.query(company="closing co")
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_applied_endpoint_records_in_ledger(client, app_module):
+    first = client.post("/applied", json={"company": "Ledger Co", "role": "Engineer"}).get_json()
+    assert "Excel" not in first["message"]
+    assert first["application"]["status"] == "Applied"
+    again = client.post("/applied", json={"company": "Ledger Co", "role": "Engineer"}).get_json()
+    assert again["message"].startswith("ℹ️ Already tracked")
+    assert again["application"]["id"] == first["application"]["id"]
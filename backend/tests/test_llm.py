@@ -0,0 +1,65 @@
+import pytest
+
+from llm import (FakeStreamingModel, InstrumentedProvider, RecordingProvider, ReplayProvider,
+                 SimulatedError, get_model, model_id)
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    """A recordings file with two prompts, written through RecordingProvider."""
+    path = tmp_path / "llm_recordings.jsonl"
+    recorder = RecordingProvider(FakeStreamingModel(reply='{"score": 80}', interval=0), path)
+    recorder.generate_content("score this")
+    recorder.inner.reply = "streamed answer"
+    assert "".join(c.text for c in recorder.generate_content("chat this", stream=True)) == "streamed answer"
+    return path
+
+
+def test_replay_returns_recorded_text(recordings):
+    replay = ReplayProvider(recordings, latency=0)
+    assert replay.generate_content("score this").text == '{"score": 80}'
+    assert "".join(c.text for c in replay.generate_content("chat this", stream=True)) == "streamed answer"
+    assert replay.calls == 2
+
+
+def test_strict_replay_rejects_unknown_prompts(recordings):
+    with pytest.raises(KeyError):
+        ReplayProvider(recordings, latency=0, strict=True).generate_content("never recorded")
+
+
+def test_loose_replay_picks_deterministically(recordings):
+    first = ReplayProvider(recordings, latency=0).generate_content("drifted prompt").text
+    again = ReplayProvider(recordings, latency=0).generate_content("drifted prompt").text
+    assert first == again
+    assert first in ('{"score": 80}', "streamed answer")
+
+
+def test_seeded_error_rate_is_reproducible(recordings):
+    def outcomes(seed):
+        replay = ReplayProvider(recordings, latency=0, error_rate=0.5, seed=seed)
+        results = []
+        for _ in range(20):
+            try:
+                replay.generate_content("score this")
+                results.append("ok")
+            except SimulatedError:
+                results.append("429")
+        return results
+
+    assert outcomes(7) == outcomes(7)
+    assert "ok" in outcomes(7) and "429" in outcomes(7)
+
+
+def test_instrumented_provider_passes_through():
+    fake = FakeStreamingModel(reply="hi", interval=0)
+    wrapped = InstrumentedProvider(fake)
+    assert wrapped.generate_content("p").text == "hi"
+    assert "".join(c.text for c in wrapped.generate_content("p", stream=True)) == "hi"
+    assert wrapped.name == "fake"
+
+
+def test_shared_client_uses_swapped_provider(use_model):
+    fake = use_model(FakeStreamingModel(reply="hi", interval=0))
+    assert get_model().generate_content("p").text == "hi"
+    assert model_id() == "fake"
+    assert fake.prompts == ["p"]
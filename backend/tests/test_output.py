@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import output
+from llm import FakeStreamingModel
+from output import MATCH_SCHEMA, RESUME_SCHEMA, OutputError, parse_output, repair_json, validate
+
+
+@pytest.mark.parametrize("text, data, repairs", [
+    ('{"score": 80}', {"score": 80}, []),
+    ('```json\n{"score": 80}\n```', {"score": 80}, []),
+    ('Here you go:\n{"score": 80}\nHope that helps!', {"score": 80}, ["leading_text", "trailing_text"]),
+    ('Sure:\n```json\n{"score": 80}\n```', {"score": 80}, ["leading_text"]),
+    ('{"skills": ["a", "b",], "x": 1,}', {"skills": ["a", "b"], "x": 1}, ["trailing_comma"]),
+])
+def test_repair_json(text, data, repairs):
+    assert repair_json(text) == (data, repairs, False)
+
+
+def test_fences_inside_strings_are_content():
+    text = '{"reason": "show ```code``` samples"}'
+    assert repair_json(text)[0] == {"reason": "show ```code``` samples"}
+    assert repair_json(f"```json\n{text}\n```")[0] == {"reason": "show ```code``` samples"}
+
+
+def test_truncated_output_is_closed():
+    data, repairs, truncated = repair_json('{"Skills": ["Python", "SQL"], "Summary": "Backend eng')
+    assert truncated and repairs == ["truncated"]
+    assert data == {"Skills": ["Python", "SQL"], "Summary": "Backend eng"}
+
+
+def test_no_json_raises():
+    with pytest.raises(OutputError):
+        repair_json("I can't help with that.")
+
+
+def test_bullet_markers_stripped_only_from_bullet_fields():
+    data = {"Skills": ["- C++", " Python "],
+            "Project Experience": [{"Title": "1. Top project", "Tech Stack": "",
+                                    "Bullet Points": ["- built x", "1. shipped y", "• led z"]}],
+            "Achievements and Certifications": ["* AWS Certified"]}
+    data, problems, repairs = validate(data, RESUME_SCHEMA)
+    assert problems == []
+    assert data["Skills"] == ["- C++", "Python"]
+    assert data["Project Experience"][0]["Title"] == "1. Top project"
+    assert data["Project Experience"][0]["Bullet Points"] == ["built x", "shipped y", "led z"]
+    assert data["Achievements and Certifications"] == ["AWS Certified"]
+    assert repairs.count("bullet_symbol") == 4
+
+
+def test_validate_coerces_and_fills_defaults():
+    data, problems, repairs = validate({"score": "85%", "reason": None}, MATCH_SCHEMA)
+    assert data == {"score": 85, "reason": ""} and problems == []
+    data, problems, repairs = validate({"Summary": "x", "Skills": "Python, SQL"}, RESUME_SCHEMA)
+    assert data["Skills"] == ["Python", "SQL"] and "split_list" in repairs
+    assert data["Work Experience"] == [] and problems == []
+
+
+def test_invalid_fragment_is_re_requested_alone():
+    model = FakeStreamingModel(reply="72", interval=0)
+    data = parse_output('{"score": "high", "reason": "Strong Python match"}', "PROMPT", MATCH_SCHEMA, model)
+    assert data == {"score": 72, "reason": "Strong Python match"}
+    assert len(model.prompts) == 1
+    assert '["score"]' in model.prompts[0] and "PROMPT" in model.prompts[0]
+
+
+def test_unusable_response_gets_one_full_retry():
+    model = FakeStreamingModel(reply='{"score": 64, "reason": "ok"}', interval=0)
+    assert parse_output("no JSON here", "PROMPT", MATCH_SCHEMA, model) == {"score": 64, "reason": "ok"}
+    assert model.prompts == ["PROMPT"]
+
+
+def test_without_prompt_invalid_output_raises():
+    with pytest.raises(OutputError):
+        parse_output('{"score": "high", "reason": "x"}', None, MATCH_SCHEMA, FakeStreamingModel(interval=0))
+
+
+def test_stats_count_repairs():
+    before = output.stats()["repaired"]
+    parse_output('```json\n{"score": 1, "reason": "x",}\n```', None, MATCH_SCHEMA, FakeStreamingModel(interval=0))
+    assert output.stats()["repaired"] == before + 1
+
+
+def test_cut_off_list_is_re_requested_whole(sample_resume):
+    jobs = [{"Company Name": f"C{i}", "Role": "Engineer", "Date": "2020",
+             "Bullet Points": [f"did thing {i}"]} for i in range(3)]
+    full = {k: v for k, v in sample_resume.items() if k != "Work Experience"}
+    full["Work Experience"] = jobs                          # written last, so the cut lands in it
+    text = json.dumps(full)
+    cut = text[:text.index('"did thing 1"') + 5]             # inside C1's bullets; C2 never arrives
+
+    data, repairs, truncated = repair_json(cut)
+    assert truncated
+    _, problems, _ = validate(data, RESUME_SCHEMA, truncated)
+    assert problems == [(("Work Experience",), "cut off")]
+
+    model = FakeStreamingModel(reply=json.dumps(jobs), interval=0)
+    result = parse_output(cut, "PROMPT", RESUME_SCHEMA, model)
+    assert [job["Company Name"] for job in result["Work Experience"]] == ["C0", "C1", "C2"]
+    assert len(model.prompts) == 1 and '["Work Experience"]' in model.prompts[0]
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+import pdf_writer
+from reportlab.pdfbase import pdfmetrics
+
+
+@pytest.fixture
+def page():
+    return pdf_writer._Page(io.BytesIO())
+
+
+def fits(page, lines, font, size, width):
+    return all(pdfmetrics.stringWidth(line, font, size) <= width for line in lines)
+
+
+def test_wraps_at_spaces(page):
+    text = " ".join(["pipeline"] * 60)
+    lines = page.wrap(text, page.regular, 10)
+    assert len(lines) > 1
+    assert fits(page, lines, page.regular, 10, page.usable_width)
+    assert " ".join(lines) == text
+
+
+def test_breaks_words_longer_than_the_line(page):
+    url = "https://example.com/" + "a" * 300
+    lines = page.wrap(f"Portfolio: {url} (live)", page.regular, 10)
+    assert len(lines) >= 3
+    assert fits(page, lines, page.regular, 10, page.usable_width)
+    assert lines[0] == "Portfolio:"
+    assert "".join(lines[1:]).replace(" (live)", "") == url
+    assert lines[-1].endswith(" (live)")          # text after the word joins its last piece
+
+
+def test_narrow_width_still_makes_progress(page):
+    lines = page.wrap("jane.doe@example.com", page.regular, 10, width=1)
+    assert lines == list("jane.doe@example.com")
+
+
+def test_newlines_start_new_lines(page):
+    assert page.wrap("First line\nSecond line\n\nAfter a blank", page.regular, 10) == [
+        "First line", "Second line", "", "After a blank"]
+    assert page.wrap("", page.regular, 10) == [""]
+
+
+def test_build_pdf_with_long_words(tmp_path, sample_resume):
+    sample_resume["Details"]["LinkedIn"] = "linkedin.com/in/" + "x" * 200
+    sample_resume["Summary"] = "Line one.\nLine two with " + "y" * 250
+    out = tmp_path / "resume.pdf"
+    pdf_writer.build_pdf(sample_resume, out)
+    assert out.read_bytes().startswith(b"%PDF")
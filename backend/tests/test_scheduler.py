@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from llm import FakeStreamingModel, SimulatedError, ThrottlingModel
+from scheduler import Scheduler, TokenBucket, current_priority, is_quota_error, priority, with_priority
+
+
+def run_threads(fn, n):
+    threads = [threading.Thread(target=fn) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+
+def test_buckets_keep_calls_under_the_quota():
+    model = ThrottlingModel(rpm=4, period=0.5)
+    scheduler = Scheduler(model, rpm=4, tpm=0, period=0.5, max_retries=0)
+    run_threads(lambda: scheduler.generate_content("p"), 10)
+    assert (model.served, model.rejected) == (10, 0)
+    assert scheduler.stats()["quota_errors"] == 0
+
+
+def test_quota_errors_are_retried_with_backoff():
+    model = ThrottlingModel(rpm=2, period=0.2)
+    scheduler = Scheduler(model, rpm=0, tpm=0, max_retries=10, backoff_base=0.05, backoff_max=0.2, seed=1)
+    for _ in range(6):
+        assert scheduler.generate_content("p").text == model.reply
+    assert model.served == 6 and model.rejected > 0
+    assert scheduler.stats()["retries"]["interactive"] == model.rejected
+
+
+def test_gives_up_after_max_retries():
+    model = ThrottlingModel(rpm=1, period=60)
+    scheduler = Scheduler(model, rpm=0, tpm=0, max_retries=0)
+    scheduler.generate_content("p")
+    with pytest.raises(SimulatedError):
+        scheduler.generate_content("p")
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_interactive_calls_jump_the_bulk_queue():
+    model = FakeStreamingModel(interval=0, first_token_delay=0)
+    scheduler = Scheduler(model, rpm=2, tpm=0, period=0.2)     # one call every 0.1 s after the first
+    bulk = with_priority("bulk", lambda: scheduler.generate_content("bulk"))
+    threads = [threading.Thread(target=bulk) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    scheduler.generate_content("chat")
+    for t in threads:
+        t.join(10)
+    assert len(model.prompts) == 6
+    assert model.prompts.index("chat") <= 2
+
+
+def test_streamed_call_is_cancelled_upstream_when_closed():
+    model = FakeStreamingModel(reply="a long streamed answer", chunk_size=2, interval=0)
+    scheduler = Scheduler(model, rpm=0, tpm=0)
+    stream = scheduler.generate_content("p", stream=True)
+    next(stream)
+    stream.close()
+    assert model.cancelled
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_priority_context():
+    assert current_priority() == "interactive"
+    with priority("bulk"):
+        assert current_priority() == "bulk"
+        assert with_priority("background", current_priority)() == "background"
+    with pytest.raises(ValueError):
+        with priority("urgent"):
+            pass
+
+
+def test_quota_error_detection():
+    assert is_quota_error(SimulatedError("429 Resource has been exhausted"))
+    assert not is_quota_error(ValueError("bad JSON"))
+
+
+def test_token_bucket_burst_is_a_share_of_the_quota():
+    bucket = TokenBucket(10, period=60, burst=0.2)
+    assert bucket.capacity == 2
+    bucket.take(2)
+    assert bucket.wait_time(1) == pytest.approx(60 / 8, rel=0.01)
@@ -0,0 +1,70 @@
+import scoring
+
+JDS = [
+    "Python engineer for machine learning and artificial intelligence work. Python, SQL, Docker.",
+    "Platform role: Kubernetes, containers, GitHub Actions and ELT tooling. Kubernetes on AWS.",
+    "Java developer. Java, Spring, Hibernate, Java microservices.",
+]
+
+
+def test_batch_scores_match_single_scores(sample_resume):
+    batch = scoring.score_many(sample_resume, JDS)
+    assert batch == [scoring.score(sample_resume, jd) for jd in JDS]
+    # and don't depend on what else is in the batch
+    assert scoring.score_many(sample_resume, JDS[:1] + JDS[2:]) == [batch[0], batch[2]]
+
+
+def test_matched_and_missing_keywords(sample_resume):
+    result = scoring.score(sample_resume, JDS[0])
+    assert {"python", "sql", "docker", "machine learning", "artificial intelligence"} <= set(result["matched"])
+    assert result["missing"] == []
+    assert 0 < result["score"] <= 100
+
+    java = scoring.score(sample_resume, JDS[2])
+    assert "java" in java["missing"]
+    assert java["score"] < result["score"]
+
+
+def test_matching_terms_are_not_down_weighted():
+    resume = {"Skills": ["Python", "SQL", "Docker"], "Summary": "Python engineer"}
+    result = scoring.score(resume, "Python SQL Docker engineer. Python.")
+    assert result["missing"] == []
+    assert result["score"] >= 90
+
+
+def test_aliases_map_to_canonical_terms():
+    terms = scoring.extract_terms("ML/AI, JS and k8s")
+    assert {"machine learning", "artificial intelligence", "javascript", "kubernetes"} <= set(terms)
+
+
+def test_slash_aliases_still_win():
+    terms = set(scoring.extract_terms("CI/CD and PL/SQL"))
+    assert {"ci/cd", "sql"} <= terms
+    assert "pl" not in terms
+
+
+def test_related_tools_are_not_synonyms():
+    terms = set(scoring.extract_terms("github containers elt"))
+    assert not terms & {"git", "docker", "etl"}
+
+
+def test_empty_batch(sample_resume):
+    assert scoring.score_many(sample_resume, []) == []
+
+
+def test_match_score_batch_endpoint(client, sample_resume):
+    response = client.post("/match_score", json={"mode": "local", "jd_texts": JDS})
+    assert response.status_code == 200
+    assert response.get_json()["results"] == scoring.score_many(sample_resume, JDS)
+
+
+def test_match_score_rejects_unknown_mode(client):
+    response = client.post("/match_score", json={"mode": "locl", "jd_text": JDS[0]})
+    assert response.status_code == 400
+
+
+def test_match_score_rejects_bad_jd_texts(client):
+    for bad in ("one JD", [JDS[0], 3], {"jd": JDS[0]}):
+        response = client.post("/match_score", json={"mode": "local", "jd_texts": bad})
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "jd_texts must be a list of strings"
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from sessions import DEFAULT_SESSION, InvalidSession, SessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    legacy = {"resume": tmp_path / "resume_fixed.json", "tailored": tmp_path / "tailored_resume.json"}
+    return SessionStore(legacy, root=tmp_path / "sessions")
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_write_through_hits_disk_before_returning(store, tmp_path):
+    store.set(DEFAULT_SESSION, "resume", {"Summary": "v1"})
+    assert json.loads((tmp_path / "resume_fixed.json").read_text()) == {"Summary": "v1"}
+    store.set("abc", "tailored", {"Summary": "t"})
+    assert json.loads((tmp_path / "sessions" / "abc" / "tailored.json").read_text()) == {"Summary": "t"}
+    assert store.stats()["dirty"] == 0
+
+
+def test_external_write_is_picked_up_by_mtime(store, tmp_path):
+    path = tmp_path / "resume_fixed.json"
+    store.set(DEFAULT_SESSION, "resume", {"Summary": "v1"})
+    path.write_text(json.dumps({"Summary": "from the CLI"}))
+    bump_mtime(path)
+    assert store.get(DEFAULT_SESSION, "resume") == {"Summary": "from the CLI"}
+
+
+def test_unchanged_file_is_not_reread(store):
+    store.set(DEFAULT_SESSION, "resume", {"Summary": "v1"})
+    first = store.get(DEFAULT_SESSION, "resume")
+    assert store.get(DEFAULT_SESSION, "resume") is first
+
+
+def test_write_behind_flushes_later(tmp_path):
+    legacy = {"resume": tmp_path / "r.json", "tailored": tmp_path / "t.json"}
+    store = SessionStore(legacy, root=tmp_path / "sessions", write_behind=True)
+    store.set(DEFAULT_SESSION, "resume", {"Summary": "v1"})
+    assert store.get(DEFAULT_SESSION, "resume") == {"Summary": "v1"}
+    assert store.stats()["dirty"] == 1
+    store.flush()
+    assert json.loads((tmp_path / "r.json").read_text()) == {"Summary": "v1"}
+
+
+def test_evicted_sessions_are_reloaded_from_disk(tmp_path):
+    store = SessionStore({"resume": tmp_path / "r.json", "tailored": tmp_path / "t.json"},
+                         root=tmp_path / "sessions", max_sessions=1, write_behind=True)
+    store.set("one", "resume", {"Summary": "one"})
+    store.set("two", "resume", {"Summary": "two"})       # evicts "one", flushing it
+    assert store.stats()["sessions"] == 1
+    assert store.get("one", "resume") == {"Summary": "one"}
+
+
+def test_missing_and_corrupt_files_read_as_unset(store, tmp_path, capsys):
+    assert store.get("new", "resume") is None
+    (tmp_path / "resume_fixed.json").write_text("{not json")
+    assert store.get(DEFAULT_SESSION, "resume") is None
+    assert "unreadable session file" in capsys.readouterr().out
+
+
+def test_invalid_session_id(store):
+    with pytest.raises(InvalidSession):
+        store.get("../etc", "resume")
@@ -0,0 +1,62 @@
+import json
+
+from llm import FakeStreamingModel
+from streaming import sse, stream_model
+
+
+def parse(events):
+    """[(event name, data), ...] from SSE strings."""
+    parsed = []
+    for raw in events:
+        fields = dict(line.split(": ", 1) for line in raw.strip().split("\n"))
+        parsed.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return parsed
+
+
+def test_sse_format():
+    assert sse({"text": "hi"}) == 'data: {"text": "hi"}\n\n'
+    assert sse({"a": 1}, event="done") == 'event: done\ndata: {"a": 1}\n\n'
+
+
+def test_stream_model_emits_chunks_then_done():
+    model = FakeStreamingModel(reply="Hello streaming world", chunk_size=5, interval=0)
+    events = parse(stream_model(model, "prompt"))
+    assert events[0][0] == "first_token"
+    chunks = [data["text"] for name, data in events if name == "message"]
+    assert "".join(chunks) == "Hello streaming world"
+    assert events[-1] == ("done", {"text": "Hello streaming world"})
+    assert model.prompts == ["prompt"]
+
+
+def test_stream_model_finish_builds_done_event():
+    model = FakeStreamingModel(reply="answer", interval=0)
+    events = parse(stream_model(model, "prompt", finish=lambda text: {"length": len(text)}))
+    assert events[-1] == ("done", {"length": 6})
+
+
+def test_finish_error_becomes_error_event():
+    def finish(text):
+        raise ValueError("not JSON")
+
+    events = parse(stream_model(FakeStreamingModel(reply="x", interval=0), "prompt", finish=finish))
+    assert events[-1] == ("error", {"error": "not JSON", "text": "x"})
+
+
+def test_client_disconnect_cancels_upstream():
+    model = FakeStreamingModel(reply="a long answer that keeps going", chunk_size=2, interval=0)
+    events = stream_model(model, "prompt")
+    next(events)          # first_token
+    next(events)          # first chunk
+    events.close()        # what Flask does when the client goes away
+    assert model.cancelled
+
+
+def test_chat_stream_endpoint(client, use_model):
+    model = use_model(FakeStreamingModel(reply="You led the ETL work at Acme.", interval=0))
+    response = client.post("/chat", json={"question": "What did I do at Acme?", "stream": True})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = parse(chunk for chunk in response.get_data(as_text=True).split("\n\n") if chunk.strip())
+    assert "".join(d["text"] for name, d in events if name == "message") == model.reply
+    assert events[-1][0] == "done"
+    assert "Acme" in model.prompts[0]
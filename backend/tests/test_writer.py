@@ -0,0 +1,42 @@
+import io
+
+import writer
+
+# Part by part: the zip headers carry the save time (2 s resolution), so whole
+# files only match when both renders land in the same tick.
+parts = writer.docx_parts
+
+
+def render(data, compiled):
+    buf = io.BytesIO()
+    writer.build_doc(data, buf, compiled=compiled)
+    return parts(buf.getvalue())
+
+
+def test_compiled_template_output_is_byte_identical(sample_resume):
+    assert render(sample_resume, compiled=True) == render(sample_resume, compiled=False)
+
+
+def test_template_is_not_mutated_between_renders(sample_resume):
+    first = render(sample_resume, compiled=True)
+    render({"Details": {"Name": "Someone Else"}, "Summary": "Different"}, compiled=True)
+    assert render(sample_resume, compiled=True) == first
+
+
+def test_sparse_resume_is_byte_identical():
+    data = {"Details": {"Name": "Jane Doe"}, "Education": [{"Degree": "B.S.", "Date": "2020"}]}
+    assert render(data, compiled=True) == render(data, compiled=False)
+
+
+def test_build_doc_writes_to_a_path(tmp_path, sample_resume):
+    out = tmp_path / "resume.docx"
+    writer.build_doc(sample_resume, out)
+    assert parts(out.read_bytes()) == render(sample_resume, compiled=False)
+
+
+def test_uncompiled_path_does_not_use_the_template(monkeypatch, sample_resume):
+    # The benchmark baseline must re-derive styles, page width and border from the .docx
+    def no_template():
+        raise AssertionError("uncompiled render used the compiled template")
+    monkeypatch.setattr(writer, "get_template", no_template)
+    render(sample_resume, compiled=False)
@@ -0,0 +1,31 @@
+"""
+One process pool shared by the CPU-bound work that would otherwise hold the
+GIL for the whole server: DOCX rendering for bulk exports and text
+extraction from large PDFs.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# ---------------- CONFIG ----------------
+PROCESS_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    The shared pool, started on first use and reused after. Workers are
+    spawned, not forked: a forked child copies locks that other server
+    threads hold. A spawned worker re-imports the script that started the
+    server under the name __mp_main__; app.py skips its store and queue
+    setup under that name, so a worker only loads what its task imports.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool